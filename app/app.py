@@ -1,12 +1,9 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from utils.charts import create_histogram, create_pie_chart, create_churn_bar, create_avg_metric_bar
-from utils.colors import TITULO, POSITIVO, THEME
-from utils.load_data import load_data, cargar_sidebar
+from utils.load_data import load_frame, load_columns, cargar_sidebar, data_source, HOME_COLUMNS
 from utils.footer import load_footer
+from utils.warmup import start_warmup
 from utils.layout import apply_global_style
+from utils.tracing import end_page, span, trace_page
 
 # ========================================
 # CONFIGURACIÓN DE LA PÁGINA
@@ -22,15 +19,21 @@ st.set_page_config(
 # CUSTOM CSS
 # ========================================
 apply_global_style()
+trace_page("Inicio")
 
 # ========================================
 # CARGAR DATOS
 # ========================================
 
 try:
-    df = load_data("../clean_data/telco-customer.csv")
+    with span("load_frame") as traza:
+        DATA_PATH = data_source()
+        df = load_frame(DATA_PATH, columns=HOME_COLUMNS)
+        n_variables = len(load_columns(DATA_PATH))
+        traza.rows = len(df)
 except FileNotFoundError:
-    st.error("⚠️ No se encontró el archivo de datos. Por favor coloca 'telco-customer.csv' en la carpeta 'clean_data/'")
+    st.error("⚠️ No se encontró el archivo de datos. Por favor coloca 'telco-customer.parquet' en la carpeta 'clean_data/'")
+    end_page("sin datos")
     st.stop()
 
 # ========================================
@@ -100,7 +103,7 @@ with tab1:
             "Métrica": ["Total de Clientes", "Variables", "Clientes con baja", "% baja"],
             "Valor": [
                 f"{len(df):,}",
-                f"{len(df.columns)}",
+                f"{n_variables}",
                 f"{df['baja_binary'].sum():,}",
                 f"{churn_rate:.1f}%"
             ]
@@ -152,4 +155,8 @@ with tab2:
 # ========================================
 # FOOTER
 # ========================================
-load_footer()
\ No newline at end of file
+load_footer()
+
+# Primera visita del proceso: precarga el resto de vistas en segundo plano
+start_warmup()
+end_page()
@@ -2,24 +2,55 @@ import streamlit as st
 import numpy as np
 import pandas as pd
 
-from utils.load_data import load_data, cargar_logo
+from utils.load_data import (
+    load_frame, load_churn_cube, load_row_index, load_scan_aggregate, load_columns,
+    dataset_version, is_partitioned, cargar_logo, RANGE_COLUMNS,
+    data_source, DASHBOARD_COLUMNS,
+)
+from utils.churn_cube import MONTHLY_BIN_WIDTH, SUM_COLS
+from utils.figure_cache import state_key
 from utils.footer import load_footer
+from utils.warmup import start_warmup
+from utils.tracing import end_page, plotly_chart, set_tags, span, trace_page
 from utils.colors import THEME
 from utils.charts import (
     create_pie_chart,
     create_churn_bar,
     create_histogram,
     create_avg_metric_bar,
+    nice_edges,
 )
 from utils.layout import apply_global_style
 
 st.set_page_config(page_title="Panel Ejecutivo - Telco", page_icon="📊", layout="wide")
 apply_global_style()
-
-df = load_data("../clean_data/telco-customer.csv")
-
-if "totalcharges" in df.columns:
-    df["totalcharges"] = pd.to_numeric(df["totalcharges"], errors="coerce")
+trace_page("Dashboard")
+
+# El mismo dataset que el resto de páginas; si es el particionado no se carga en memoria
+DATA_PATH = data_source()
+particionado = is_partitioned(DATA_PATH)
+
+version = dataset_version(DATA_PATH)
+columnas = load_columns(DATA_PATH)
+
+# Agregados precalculados: métricas y barras por dimensión sin recorrer filas
+with span("load_churn_cube"):
+    cube = load_churn_cube(DATA_PATH, version)
+
+if particionado:
+    df, row_index = None, None
+else:
+    with span("load_frame") as traza:
+        df = load_frame(DATA_PATH, columns=DASHBOARD_COLUMNS, version=version)
+        traza.rows = len(df)
+    with span("load_row_index"):
+        row_index = load_row_index(DATA_PATH, version)
+
+# Columnas de los gráficos por categoría que no son dimensiones del cubo
+SCAN_CATEGORY_COLS = tuple(
+    c for c in DASHBOARD_COLUMNS
+    if c in columnas and c not in cube.dimensions and c not in RANGE_COLUMNS + ["baja_binary"]
+)
 
 st.title("📊 Panel Ejecutivo de Clientes")
 st.markdown(
@@ -29,16 +60,16 @@ st.markdown(
 # =========================
 # FUNCIÓN FILTRO SIMPLE
 # =========================
-def select_todos(df, col, label):
-    if col not in df.columns:
-        return df
+def select_todos(filtros, col, label):
+    """Añade a ``filtros`` la opción elegida; las opciones salen del cubo con los filtros anteriores"""
+    if col not in cube.dimensions:
+        return
 
-    options = ["Todos"] + sorted(df[col].dropna().unique().tolist())
+    options = ["Todos"] + cube.options(col, cube.select(filtros))
     choice = st.sidebar.selectbox(label, options, key=f"sb_{col}")
 
-    if choice == "Todos":
-        return df
-    return df[df[col] == choice]
+    if choice != "Todos":
+        filtros[col] = choice
 
 
 # =========================
@@ -50,48 +81,97 @@ st.sidebar.image(cargar_logo(), use_container_width=True)
 st.sidebar.title("🔎 Filtros")
 st.sidebar.markdown("---")
 
-df_f = df.copy()
-df_f = select_todos(df_f, "contract", "Tipo de contrato")
-df_f = select_todos(df_f, "internetservice", "Servicio de internet")
-df_f = select_todos(df_f, "paymentmethod", "Método de pago")
-df_f = select_todos(df_f, "paperlessbilling", "Factura electrónica")
-df_f = select_todos(df_f, "seniorcitizen", "Cliente jubilado")
-df_f = select_todos(df_f, "partner", "Tiene pareja")
-df_f = select_todos(df_f, "dependents", "Tiene dependientes")
+filtros = {}
+with span("select_todos"):
+    select_todos(filtros, "contract", "Tipo de contrato")
+    select_todos(filtros, "internetservice", "Servicio de internet")
+    select_todos(filtros, "paymentmethod", "Método de pago")
+    select_todos(filtros, "paperlessbilling", "Factura electrónica")
+    select_todos(filtros, "seniorcitizen", "Cliente jubilado")
+    select_todos(filtros, "partner", "Tiene pareja")
+    select_todos(filtros, "dependents", "Tiene dependientes")
 
 with st.sidebar.expander("🎚️ Filtros por rango"):
-    if "tenure" in df.columns:
-        tmin, tmax = int(df["tenure"].min()), int(df["tenure"].max())
-        tenure_range = st.slider("Antigüedad (meses)", tmin, tmax, (tmin, tmax), key="tenure_slider")
-        df_f = df_f[df_f["tenure"].between(*tenure_range)]
-
-    if "monthlycharges" in df.columns:
-        mcmin, mcmax = float(df["monthlycharges"].min()), float(df["monthlycharges"].max())
-        monthly_range = st.slider(
-            "Pago mensual ($)",
-            float(round(mcmin, 2)),
-            float(round(mcmax, 2)),
-            (float(round(mcmin, 2)), float(round(mcmax, 2))),
-            key="monthly_slider"
-        )
-        df_f = df_f[df_f["monthlycharges"].between(*monthly_range)]
-
-if df_f.empty:
+    tmin, tmax = int(cube.cells["tenure_bin"].min()), int(cube.cells["tenure_bin"].max())
+    tenure_range = st.slider("Antigüedad (meses)", tmin, tmax, (tmin, tmax), key="tenure_slider")
+
+    # El pago mensual se filtra por tramos de 1 $: [mínimo, máximo)
+    mcmin = float(cube.cells["monthly_bin"].min())
+    mcmax = float(cube.cells["monthly_bin"].max()) + MONTHLY_BIN_WIDTH
+    monthly_range = st.slider(
+        "Pago mensual ($)",
+        mcmin,
+        mcmax,
+        (mcmin, mcmax),
+        step=MONTHLY_BIN_WIDTH,
+        key="monthly_slider"
+    )
+
+# Clave de caché de las figuras: mismo dataset y mismos filtros -> misma figura
+clave_figuras = (version, state_key(filtros, tenure_range, monthly_range))
+set_tags(filtros=filtros, tenure=tenure_range, monthlycharges=monthly_range, estado=clave_figuras[1])
+
+with span("cube.select") as traza:
+    seleccion = cube.select(filtros, tenure_range, monthly_range)
+    traza.rows = len(seleccion)
+
+if not seleccion.any():
     st.warning("No hay datos con los filtros seleccionados.")
+    end_page("sin datos")
     st.stop()
-    
+
+rangos = {
+    "tenure": tenure_range,
+    "monthlycharges": (*monthly_range, "left"),
+}
+
+if particionado:
+    # Una pasada por lotes sobre las particiones y grupos de filas que cumplen los filtros
+    with span("load_scan_aggregate") as traza:
+        agg = load_scan_aggregate(
+            DATA_PATH, version, SCAN_CATEGORY_COLS, tuple(SUM_COLS),
+            hist_edges={col: nice_edges(*cube.value_range(seleccion, col), 50) for col in RANGE_COLUMNS},
+            filters=filtros,
+            ranges=rangos,
+        )
+        kpis = agg.kpis()
+        traza.rows = kpis["total"]
+    filas = None
+else:
+    agg = None
+    kpis = cube.kpis(seleccion)
+    # Filas seleccionadas (posiciones en df) para los gráficos que necesitan el detalle por cliente
+    with span("row_index.positions") as traza:
+        filas = row_index.positions(filtros, rangos)
+        traza.rows = len(filas)
+
+
+def churn_bar(category_col):
+    """Barras de baja por categoría: desde el cubo si es una dimensión, si no desde las filas filtradas (o el recorrido por lotes)"""
+    if category_col in cube.dimensions:
+        return create_churn_bar(
+            None, category_col, theme=THEME, cache_key=clave_figuras,
+            churn_pct=cube.churn_pct(seleccion, category_col)
+        )
+    if particionado:
+        return create_churn_bar(
+            None, category_col, theme=THEME, cache_key=clave_figuras,
+            churn_pct=agg.churn_pct(category_col)
+        )
+    return create_churn_bar(df, category_col, theme=THEME, rows=filas, cache_key=clave_figuras)
+
 
 # =========================
 # MÉTRICAS PRINCIPALES
 # =========================
-total = len(df_f)
-bajas = int(df_f["baja_binary"].sum())
-tasa_baja = (bajas / total) * 100
+total = kpis["total"]
+bajas = kpis["bajas"]
+tasa_baja = kpis["tasa_baja"]
 
-ingreso_medio = df_f["monthlycharges"].mean()
-antiguedad_media = df_f["tenure"].mean()
+ingreso_medio = kpis["monthlycharges_media"]
+antiguedad_media = kpis["tenure_media"]
 
-tasa_global = (df["baja_binary"].sum() / len(df)) * 100
+tasa_global = cube.kpis(cube.select())["tasa_baja"]
 
 col1, col2, col3, col4 = st.columns(4)
 col1.metric("👥 Total clientes", f"{total:,}")
@@ -119,22 +199,22 @@ with tab1:
     c1, c2 = st.columns(2)
 
     with c1:
-        fig = create_pie_chart(df_f, color_by="baja_binary", title="Distribución de clientes (activos vs baja)", theme=THEME)
-        st.plotly_chart(fig, use_container_width=True, key="pie_general")
+        fig = create_pie_chart(df, color_by="baja_binary", title="Distribución de clientes (activos vs baja)", theme=THEME, rows=filas, counts=agg.class_counts() if particionado else None, cache_key=clave_figuras)
+        plotly_chart(fig, use_container_width=True, key="pie_general")
 
     with c2:
-        fig = create_churn_bar(df_f, "contract", theme=THEME)
-        st.plotly_chart(fig, use_container_width=True, key="bar_contrato_general")
+        fig = churn_bar("contract")
+        plotly_chart(fig, use_container_width=True, key="bar_contrato_general")
 
     c3, c4 = st.columns(2)
 
     with c3:
-        fig = create_histogram(df_f, "tenure", title="Antigüedad según estado del cliente", theme=THEME)
-        st.plotly_chart(fig, use_container_width=True, key="hist_antiguedad")
+        fig = create_histogram(df, "tenure", title="Antigüedad según estado del cliente", theme=THEME, rows=filas, binned=agg.histogram("tenure") if particionado else None, cache_key=clave_figuras)
+        plotly_chart(fig, use_container_width=True, key="hist_antiguedad")
 
     with c4:
-        fig = create_histogram(df_f, "monthlycharges", title="Pago mensual según estado del cliente", theme=THEME)
-        st.plotly_chart(fig, use_container_width=True, key="hist_pago")
+        fig = create_histogram(df, "monthlycharges", title="Pago mensual según estado del cliente", theme=THEME, rows=filas, binned=agg.histogram("monthlycharges") if particionado else None, cache_key=clave_figuras)
+        plotly_chart(fig, use_container_width=True, key="hist_pago")
 
 # =========================
 # SERVICIOS
@@ -147,12 +227,12 @@ with tab2:
         "techsupport", "streamingtv", "streamingmovies"
     ]
 
-    service_cols = [c for c in service_cols if c in df_f.columns]
+    service_cols = [c for c in service_cols if c in columnas]
 
     if service_cols:
         servicio = st.selectbox("Selecciona un servicio", service_cols, key="servicio_select")
-        fig = create_churn_bar(df_f, servicio, theme=THEME)
-        st.plotly_chart(fig, use_container_width=True, key="bar_servicio")
+        fig = churn_bar(servicio)
+        plotly_chart(fig, use_container_width=True, key="bar_servicio")
 
 # =========================
 # CONTRATO Y PAGOS
@@ -162,29 +242,31 @@ with tab3:
     c1, c2 = st.columns(2)
 
     with c1:
-        fig = create_churn_bar(df_f, "contract", theme=THEME)
-        st.plotly_chart(fig, use_container_width=True, key="bar_contrato_tab3")
+        fig = churn_bar("contract")
+        plotly_chart(fig, use_container_width=True, key="bar_contrato_tab3")
 
     with c2:
-        fig = create_churn_bar(df_f, "paymentmethod", theme=THEME)
-        st.plotly_chart(fig, use_container_width=True, key="bar_pago_tab3")
+        fig = churn_bar("paymentmethod")
+        plotly_chart(fig, use_container_width=True, key="bar_pago_tab3")
 
     c3, c4 = st.columns(2)
 
     with c3:
-        fig = create_churn_bar(df_f, "paperlessbilling", theme=THEME)
-        st.plotly_chart(fig, use_container_width=True, key="bar_factura")
+        fig = churn_bar("paperlessbilling")
+        plotly_chart(fig, use_container_width=True, key="bar_factura")
 
     with c4:
         fig = create_avg_metric_bar(
-            df_f,
+            None,
             metric_col="monthlycharges",
+            avg_data=cube.avg_by_churn(seleccion, "monthlycharges"),
+            cache_key=clave_figuras,
             title="Ingreso mensual promedio por estado",
             yaxis_title="$",
             is_currency=True,
             theme=THEME
         )
-        st.plotly_chart(fig, use_container_width=True, key="avg_pago_tab3")
+        plotly_chart(fig, use_container_width=True, key="avg_pago_tab3")
 
 # =========================
 # PERFIL
@@ -192,12 +274,16 @@ with tab3:
 with tab4:
 
     perfil_cols = ["gender", "seniorcitizen", "partner", "dependents"]
-    perfil_cols = [c for c in perfil_cols if c in df_f.columns]
+    perfil_cols = [c for c in perfil_cols if c in columnas]
 
     if perfil_cols:
         variable = st.selectbox("Selecciona variable de perfil", perfil_cols, key="perfil_select")
-        fig = create_churn_bar(df_f, variable, theme=THEME)
-        st.plotly_chart(fig, use_container_width=True, key="bar_perfil")
+        fig = churn_bar(variable)
+        plotly_chart(fig, use_container_width=True, key="bar_perfil")
 
 st.markdown("---")
 load_footer()
+
+# Primera visita del proceso: precarga el resto de vistas en segundo plano
+start_warmup()
+end_page()
@@ -1,12 +1,12 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import numpy as np
 import sys
 import os
-import plotly.graph_objects as go
 from utils.footer import load_footer
-from utils.load_data import cargar_sidebar, load_data, cargar_logo
+from utils.warmup import start_warmup
+from utils.load_data import cargar_sidebar, load_frame, load_moment_stats, load_churn_summaries, dataset_version, cargar_logo, data_source, EDA_COLUMNS
+from utils.figure_cache import state_key
+from utils.tracing import end_page, plotly_chart, set_tags, span, trace_page
 
 # Agregar path para importar utils
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -14,8 +14,24 @@ from utils.colors import TITULO, POSITIVO, NEGATIVO, PRINCIPAL, THEME
 from utils.charts import create_histogram, create_churn_bar, create_pie_chart, create_avg_metric_bar, create_correlation_heatmap
 
 st.set_page_config(page_title="EDA - Telco", page_icon="📈", layout="wide")
+trace_page("EDA")
 
-df = load_data("../clean_data/telco-customer.csv")
+DATA_PATH = data_source()
+version = dataset_version(DATA_PATH)
+with span("load_frame") as traza:
+    df = load_frame(DATA_PATH, columns=EDA_COLUMNS, version=version)
+    traza.rows = len(df)
+
+# Conteos, sumas y productos cruzados por estado de baja (correlaciones y medias)
+with span("load_moment_stats"):
+    stats = load_moment_stats(DATA_PATH, version)
+
+# Conteo, media, varianza, extremos y cuartiles aproximados por estado de baja
+with span("load_churn_summaries"):
+    resumenes = load_churn_summaries(DATA_PATH, version)
+
+# Sin filtros: la clave de caché de las figuras solo depende del dataset
+clave_figuras = (version, state_key())
 
 cargar_sidebar()
 
@@ -51,14 +67,16 @@ with tab1:
 
     # Columna real del dataframe
     var_num_col = var_num_dict[var_num_label]
+    set_tags(numerica=var_num_col)
 
     fig = create_histogram(
         df,
         var_num_col,
         title=f"Distribución de {var_num_label} por baja",
-        theme=THEME
+        theme=THEME,
+        cache_key=clave_figuras
     )
-    st.plotly_chart(fig, use_container_width=True)
+    plotly_chart(fig, use_container_width=True)
 
     # Estadísticas comparativas
     col1, col2 = st.columns(2)
@@ -66,14 +84,14 @@ with tab1:
     with col1:
         st.markdown("#### 📊 Alta")
         st.dataframe(
-            df[df['baja_binary'] == 0][var_num_col].describe(),
+            resumenes.describe(var_num_col, 0),
             use_container_width=True
         )
 
     with col2:
         st.markdown("#### 📊 Baja")
         st.dataframe(
-            df[df['baja_binary'] == 1][var_num_col].describe(),
+            resumenes.describe(var_num_col, 1),
             use_container_width=True
         )
         
@@ -108,6 +126,7 @@ with tab2:
         "Múltiples líneas de teléfono": "multiplelines",
         "Jubilados": "seniorcitizen",
     }
+    set_tags(categorica=var_cat_map[var_cat])
 
     # ========================================
     # CASO ESPECIAL: SENIOR CITIZEN
@@ -130,9 +149,10 @@ with tab2:
                     df_no_senior,
                     color_by='baja_binary',
                     title="No jubilado",
-                    theme=THEME
+                    theme=THEME,
+                    cache_key=(version, state_key({"seniorcitizen": "noSeniorCitizen"}))
                 )
-                st.plotly_chart(fig_pie_no, use_container_width=True)
+                plotly_chart(fig_pie_no, use_container_width=True)
             else:
                 st.warning("⚠️ No hay datos para No Senior Citizen")
 
@@ -142,17 +162,18 @@ with tab2:
                     df_senior,
                     color_by='baja_binary',
                     title="Jubilado",
-                    theme=THEME
+                    theme=THEME,
+                    cache_key=(version, state_key({"seniorcitizen": "SeniorCitizen"}))
                 )
-                st.plotly_chart(fig_pie_senior, use_container_width=True)
+                plotly_chart(fig_pie_senior, use_container_width=True)
             else:
                 st.warning("⚠️ No hay datos para Senior Citizen")
     
-    fig = create_pie_chart(df, var_cat_map[var_cat], theme=THEME)
-    st.plotly_chart(fig, use_container_width=True)
+    fig = create_pie_chart(df, var_cat_map[var_cat], theme=THEME, cache_key=clave_figuras)
+    plotly_chart(fig, use_container_width=True)
     
-    fig = create_churn_bar(df, var_cat_map[var_cat], theme=THEME)
-    st.plotly_chart(fig, use_container_width=True)
+    fig = create_churn_bar(df, var_cat_map[var_cat], theme=THEME, cache_key=clave_figuras)
+    plotly_chart(fig, use_container_width=True)
         
     if var_cat == "Jubilados":
         st.markdown("""
@@ -183,43 +204,47 @@ with tab3:
     # ==============================
     # 1️⃣ MATRIZ DE CORRELACIÓN
     # ==============================
-    numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
-    corr_matrix = df[numeric_cols].corr()
-
+    # Calculada a partir de los estadísticos suficientes guardados del dataset
+    corr_matrix = stats.corr()
 
     fig_corr = create_correlation_heatmap(
         corr_matrix=corr_matrix,
-        theme=THEME
+        theme=THEME,
+        cache_key=clave_figuras
     )
 
-    st.plotly_chart(fig_corr, use_container_width=True)
+    plotly_chart(fig_corr, use_container_width=True)
 
     # ==============================
     # 2️⃣ ANTIGÜEDAD PROMEDIO
     # ==============================
     fig_tenure = create_avg_metric_bar(
-        df,
+        None,
         metric_col='tenure',
+        avg_data=stats.class_means('tenure'),
         title="Antigüedad Promedio por Estado",
         yaxis_title="Antigüedad Promedio (Meses)",
-        theme=THEME
+        theme=THEME,
+        cache_key=clave_figuras
     )
 
-    st.plotly_chart(fig_tenure, use_container_width=True)
+    plotly_chart(fig_tenure, use_container_width=True)
 
     # ==============================
     # 3️⃣ CARGOS TOTALES PROMEDIO
     # ==============================
     fig_charges = create_avg_metric_bar(
-        df,
+        None,
         metric_col='totalcharges',
+        avg_data=stats.class_means('totalcharges'),
         title="Cargos Totales Promedio por Estado",
         yaxis_title="Cargos Totales Promedio ($)",
         is_currency=True,
-        theme=THEME
+        theme=THEME,
+        cache_key=clave_figuras
     )
 
-    st.plotly_chart(fig_charges, use_container_width=True)
+    plotly_chart(fig_charges, use_container_width=True)
 
 with tab4:
     st.subheader("💡 Insights Clave del Análisis")
@@ -240,4 +265,9 @@ with tab4:
     - **Cargos mensuales altos sin antigüedad**: Clientes nuevos con precios altos se van
     """)
     
-load_footer()
\ No newline at end of file
+load_footer()
+
+# Primera visita del proceso: precarga el resto de vistas en segundo plano
+start_warmup()
+end_page()
+
@@ -2,11 +2,16 @@ import streamlit as st
 import pandas as pd
 import os
 from utils.colors import TITULO, POSITIVO, NEGATIVO, THEME
-from utils.charts import create_gauge_chart
-from utils.load_data import cargar_sidebar, load_data
+from utils.charts import create_gauge_chart, create_what_if_curves, create_what_if_heatmap
+from utils.load_data import cargar_sidebar, get_model_registry, get_prediction_cache, load_batch_model, load_encoder
 from utils.footer import load_footer
+from utils.warmup import start_warmup
+from utils.tracing import end_page, plotly_chart, span, trace_page
+from utils.scoring import score_frame, iter_chunks, RISK_LEVELS
+from utils.what_if import sweep, default_grid, PAYMENT_METHODS
 
 st.set_page_config(page_title="Predictor - Telco", page_icon="🎯", layout="wide")
+trace_page("Predictor")
 
 st.title("🎯 Predictor de baja de cliente")
 st.markdown("Predice la probabilidad de que un cliente abandone el servicio")
@@ -15,8 +20,14 @@ st.info("ℹ️ **Modelo ML utilizado**: XGBOOST")
 # =========================
 # 1️⃣ Cargar modelo
 # =========================
-# Carga los datos desde el metodo utils/load_data.py
-model = load_data("../models/xgboost_model.pkl")
+# Modelo compartido por todas las sesiones (formato nativo de XGBoost, recarga automática)
+with span("modelo"):
+    model_version = get_model_registry().current()
+    model = model_version.model
+    encoder = load_encoder()
+    # Resultados ya calculados para la versión vigente del modelo (compartidos entre sesiones)
+    prediction_cache = get_prediction_cache()
+st.caption(f"Versión del modelo: `{model_version.version}` · cargado en {model_version.load_seconds*1000:.0f} ms")
 
 cargar_sidebar()   
 
@@ -53,28 +64,30 @@ with st.form("prediction_form"):
 # 3️⃣ Predicción con ML
 # =========================
 if submitted:
-    # Crear DataFrame con la misma estructura que usó el modelo
-    input_df = pd.DataFrame([{
+    # Registro con los valores crudos del formulario (mismo vocabulario que clean_data)
+    cliente = {
         "tenure": tenure,
         "monthlycharges": monthly_charges,
-        "seniorcitizen": 1 if senior_citizen == "Yes" else 0,
+        "seniorcitizen": "SeniorCitizen" if senior_citizen == "Yes" else "noSeniorCitizen",
         "contract": contract,
         "internetservice": internet_service,
         "multiplelines": multiple_lines,
         "paymentmethod": payment_method,
         "techsupport": tech_support,
         "streamingtv": streaming_tv
-    }])
+    }
 
-    # Si el modelo fue entrenado con OneHotEncoder:
-    input_encoded = pd.get_dummies(input_df)
+    # El panel what-if sigue disponible tras volver a ejecutar la página
+    st.session_state["cliente_what_if"] = cliente
 
-    # Asegurarse de que las columnas coincidan con las del modelo
-    model_cols = model.get_booster().feature_names
-    input_encoded = input_encoded.reindex(columns=model_cols, fill_value=0)
+    # Codificación directa a la fila del modelo (mismas columnas que en el entrenamiento)
+    with span("encoder.transform_row"):
+        input_encoded = encoder.transform_row(cliente)
 
-    # Obtener probabilidad de churn
-    churn_prob = model.predict_proba(input_encoded)[0][1]
+    # Obtener probabilidad de churn (de la caché si el perfil ya se puntuó con este modelo)
+    with span("prediction_cache.predict") as traza:
+        churn_prob = float(prediction_cache.predict(input_encoded, model, model_version.version)[0])
+        traza.rows = len(input_encoded)
 
     # =========================
     # 4️⃣ Visualización del resultado
@@ -86,7 +99,7 @@ if submitted:
     
     with col1:
         fig = create_gauge_chart(churn_prob, theme=THEME)
-        st.plotly_chart(fig, use_container_width=True)
+        plotly_chart(fig, use_container_width=True)
     
     with col2:
         st.markdown("### 📈 Interpretación")
@@ -141,5 +154,134 @@ if submitted:
            - Sugerir servicios complementarios
            - Promociones en bundles
         """)
-        
-load_footer()
\ No newline at end of file
+
+# =========================
+# 6️⃣ Análisis what-if
+# =========================
+cliente_what_if = st.session_state.get("cliente_what_if")
+if cliente_what_if is not None:
+    st.markdown("---")
+    st.subheader("🔀 ¿Y si...? Sensibilidad de la predicción")
+
+    # Toda la rejilla (antigüedad 0-72 x contrato x método de pago) en una sola predicción
+    with span("what_if.sweep") as traza:
+        escenarios, segundos = sweep(model, encoder, cliente_what_if, default_grid())
+        traza.rows = len(escenarios)
+    st.caption(f"{len(escenarios):,} escenarios puntuados en {segundos*1000:.1f} ms con una sola llamada al modelo")
+
+    tenure_actual = cliente_what_if["tenure"]
+    pago_actual = cliente_what_if["paymentmethod"]
+    contrato_actual = cliente_what_if["contract"]
+    actual = escenarios[
+        (escenarios["tenure"] == tenure_actual)
+        & (escenarios["contract"] == contrato_actual)
+        & (escenarios["paymentmethod"] == pago_actual)
+    ]["churn_probability"].iloc[0]
+
+    col1, col2 = st.columns(2)
+    with col1:
+        pago = st.selectbox("Método de pago de las curvas", PAYMENT_METHODS, index=PAYMENT_METHODS.index(pago_actual))
+        fig = create_what_if_curves(
+            escenarios[escenarios["paymentmethod"] == pago],
+            current=(tenure_actual, actual) if pago == pago_actual else None,
+            title=f"Probabilidad según antigüedad · {pago}",
+            theme=THEME,
+        )
+        plotly_chart(fig, use_container_width=True)
+    with col2:
+        meses = st.slider("Meses adicionales de permanencia", 0, 72 - tenure_actual, 0) if tenure_actual < 72 else 0
+        fig = create_what_if_heatmap(
+            escenarios[escenarios["tenure"] == tenure_actual + meses],
+            title=f"Contrato x método de pago · {tenure_actual + meses} meses",
+            theme=THEME,
+        )
+        plotly_chart(fig, use_container_width=True)
+
+    # Cambios concretos respecto a la situación actual
+    def _prob(tenure=tenure_actual, contract=contrato_actual, payment=pago_actual):
+        fila = escenarios[
+            (escenarios["tenure"] == tenure) & (escenarios["contract"] == contract)
+            & (escenarios["paymentmethod"] == payment)
+        ]
+        return fila["churn_probability"].iloc[0]
+
+    col1, col2, col3 = st.columns(3)
+    anual = _prob(contract="One year")
+    bianual = _prob(contract="Two year")
+    automatico = min(_prob(payment="Bank transfer (automatic)"), _prob(payment="Credit card (automatic)"))
+    col1.metric("Con contrato anual", f"{anual*100:.1f}%", f"{(anual - actual)*100:+.1f} pp", delta_color="inverse")
+    col2.metric("Con contrato de dos años", f"{bianual*100:.1f}%", f"{(bianual - actual)*100:+.1f} pp", delta_color="inverse")
+    col3.metric("Con pago automático", f"{automatico*100:.1f}%", f"{(automatico - actual)*100:+.1f} pp", delta_color="inverse")
+
+# =========================
+# 7️⃣ Scoring por lotes
+# =========================
+st.markdown("---")
+st.subheader("📂 Predicción por lotes")
+st.markdown("Sube un CSV con el mismo formato que `clean_data/telco-customer.csv` para puntuar todos los clientes a la vez.")
+
+uploaded = st.file_uploader("Archivo CSV de clientes", type=["csv"], key="batch_upload")
+resultados = None
+
+if uploaded is None:
+    # Sin archivo se libera el resultado anterior de la sesión
+    st.session_state.pop("lote", None)
+else:
+    # El lote se puntúa una sola vez por archivo y versión del modelo: los reruns
+    # (p. ej. al mover el what-if) reutilizan el resultado guardado en la sesión
+    clave_lote = (uploaded.file_id, model_version.version)
+    lote = st.session_state.get("lote")
+    if lote is None or lote["clave"] != clave_lote:
+        lote = {"clave": clave_lote, "resultados": None, "csv": None, "error": None}
+        try:
+            with span("score_frame", file=uploaded.name) as traza:
+                # Los lotes se puntúan con el booster nativo, más rápido que el compilado para muchas filas
+                batch_model = load_batch_model(model_version.path, model_version.version)
+                partes = []
+                for chunk in iter_chunks(uploaded):
+                    partes.append(chunk.join(score_frame(chunk, batch_model, encoder, prediction_cache, model_version.version)))
+                lote["resultados"] = pd.concat(partes, ignore_index=True)
+                lote["csv"] = lote["resultados"].to_csv(index=False).encode("utf-8")
+                traza.rows = len(lote["resultados"])
+        except ValueError as e:
+            lote["error"] = str(e)
+        st.session_state["lote"] = lote
+
+    resultados = lote["resultados"]
+    if lote["error"] is not None:
+        st.error(f"⚠️ No se pudo puntuar el archivo: {lote['error']}")
+
+if resultados is not None:
+    col1, col2 = st.columns([1, 2])
+
+    with col1:
+        st.metric("Clientes puntuados", f"{len(resultados):,}")
+        st.metric("Probabilidad media de baja", f"{resultados['churn_probability'].mean()*100:.1f}%")
+
+    with col2:
+        st.dataframe(
+            resultados["risk_level"].value_counts().reindex(RISK_LEVELS).rename("Clientes"),
+            use_container_width=True
+        )
+
+    st.dataframe(resultados.head(100), use_container_width=True)
+    st.download_button(
+        "⬇️ Descargar resultados (CSV)",
+        lote["csv"],
+        file_name="predicciones_baja.csv",
+        mime="text/csv"
+    )
+
+cache_stats = prediction_cache.stats()
+if cache_stats["hits"] + cache_stats["misses"]:
+    st.caption(
+        f"Caché de predicciones: {cache_stats['hit_rate']:.0%} de aciertos "
+        f"({cache_stats['hits']:,} de {cache_stats['hits'] + cache_stats['misses']:,}) · "
+        f"{cache_stats['saved_seconds'] * 1000:.1f} ms ahorrados · {cache_stats['entries']:,} entradas"
+    )
+
+load_footer()
+
+# Primera visita del proceso: precarga el resto de vistas en segundo plano
+start_warmup()
+end_page()
@@ -1,34 +1,93 @@
+import numpy as np
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
+from .figure_cache import cached_figure
+from .tracing import span, traced
+from .lazy import lazy_import
 from .colors import POSITIVO, NEGATIVO, PRINCIPAL, SECUNDARIO, TITULO, get_color_by_baja_binary, get_color_map, get_color_by_labels
 
-def create_histogram(df, column, color_by='baja_binary', title=None, theme='light'):
-    """Crea histograma con colores corporativos y etiquetas amigables"""
-    
-    df_plot = df.copy()
+# Plotly se importa al crear el primer gráfico, no al importar este módulo
+px = lazy_import("plotly.express")
+go = lazy_import("plotly.graph_objects")
+
+BAJA_LABELS = {0: 'Alta', 1: 'Baja'}
+
+def _column(df, col, rows=None):
+    """Valores de una columna (solo las filas ``rows`` si se indican) como array NumPy"""
+    series = df[col]
+    # Las categóricas se mantienen como códigos (pd.Categorical), no como objetos
+    values = series.array if isinstance(series.dtype, pd.CategoricalDtype) else series.to_numpy()
+    return values if rows is None else values.take(rows)
 
-    # Mapear valores binarios a etiquetas
+def _labels(df, color_by, rows=None):
+    """Valores de ``color_by``, pares ``(valor, etiqueta)`` en orden de leyenda y mapa de colores"""
+    values = _column(df, color_by, rows)
     if color_by == 'baja_binary':
-        df_plot[color_by] = df_plot[color_by].map({
-            0: 'Alta',
-            1: 'Baja'
-        })
+        pairs = [(v, BAJA_LABELS[v]) for v in sorted(pd.unique(values))]
+        return values, pairs, get_color_by_baja_binary()
+    uniques = list(pd.unique(values))
+    return values, [(v, v) for v in uniques], get_color_by_labels(uniques)
+
+def nice_edges(vmin, vmax, nbins):
+    """Bordes de intervalo con paso 'redondo' (1, 2, 2.5 o 5 x 10^k), como los de Plotly"""
+    if not vmax > vmin:
+        vmax = vmin + 1
+    raw = (vmax - vmin) / nbins
+    magnitude = 10 ** np.floor(np.log10(raw))
+    step = next(m * magnitude for m in (1, 2, 2.5, 5, 10) if m * magnitude >= raw)
+    start = np.floor(vmin / step) * step
+    n = int(np.floor((vmax - start) / step)) + 1
+    return start + step * np.arange(n + 1)
+
+@traced(tags=("column",))
+@cached_figure
+def create_histogram(df, column, color_by='baja_binary', title=None, theme='light', rows=None, binned=None):
+    """Crea histograma con colores corporativos y etiquetas amigables.
+
+    Los conteos por intervalo y estado se calculan en el servidor, así que
+    la figura solo lleva las barras (su tamaño no depende del número de
+    filas). ``rows`` (posiciones, p. ej. de ``RowIndex.positions``) limita
+    el gráfico a esas filas. Con ``binned`` (``(bordes, {estado: conteos})``,
+    p. ej. de ``ScanAggregate.histogram``) no se recorre ``df``.
+    """
+
+    if binned is not None:
+        edges, hist = binned
         color_map = get_color_by_baja_binary()
+        traces = [(BAJA_LABELS[key], counts) for key, counts in hist.items()]
     else:
-        color_map = get_color_by_labels(df_plot[color_by].unique())
+        values = _column(df, column, rows).astype(float)
+        groups, pairs, color_map = _labels(df, color_by, rows)
 
-    fig = px.histogram(
-        df_plot,
-        x=column,
-        color=color_by,
-        nbins=50,
-        color_discrete_map=color_map,
+        finite = np.isfinite(values)
+        values, groups = values[finite], groups[finite]
+        if len(values):
+            edges = nice_edges(values.min(), values.max(), 50)
+        else:
+            edges = np.arange(2, dtype=float)
+        traces = [(label, np.histogram(values[groups == key], bins=edges)[0]) for key, label in pairs]
+
+    centers = (edges[:-1] + edges[1:]) / 2
+    x_label = column.replace('_', ' ').title()
+
+    fig = go.Figure()
+    for label, counts in traces:
+        fig.add_trace(go.Bar(
+            name=str(label),
+            x=centers,
+            y=counts,
+            width=edges[1] - edges[0],
+            marker_color=color_map[label],
+            customdata=np.column_stack([edges[:-1], edges[1:]]),
+            hovertemplate=f"Estado={label}<br>{x_label}=%{{customdata[0]:g}}–%{{customdata[1]:g}}<br>count=%{{y}}<extra></extra>"
+        ))
+
+    fig.update_layout(
+        barmode='relative',
+        bargap=0,
         title=title or f"Distribución de {column}",
-        labels={
-            column: column.replace('_', ' ').title(),
-            color_by: "Estado"
-        }
+        xaxis_title=x_label,
+        yaxis_title="count",
+        legend_title_text="Estado"
     )
 
     if theme == 'dark':
@@ -41,24 +100,33 @@ def create_histogram(df, column, color_by='baja_binary', title=None, theme='ligh
 
     return fig
 
-def create_pie_chart(df, color_by='baja_binary', title=None, theme='light'):
-    """Crea gráfico tipo pie con colores corporativos y etiquetas amigables"""
-    
-    df_plot = df.copy()
-    
-     # Mapear valores binarios a etiquetas
-    if color_by == 'baja_binary':
-        df_plot[color_by] = df_plot[color_by].map({
-            0: 'Alta',
-            1: 'Baja'
-        })
-        color_map = get_color_by_baja_binary()
+@traced(tags=("color_by",))
+@cached_figure
+def create_pie_chart(df, color_by='baja_binary', title=None, theme='light', rows=None, counts=None):
+    """Crea gráfico tipo pie con colores corporativos y etiquetas amigables.
+
+    Solo se envían los conteos por categoría (calculados en el servidor).
+    ``rows`` (posiciones, p. ej. de ``RowIndex.positions``) limita el gráfico a esas filas.
+    Con ``counts`` (``{valor: clientes}`` ya agregado) no se recorre ``df``.
+    """
+
+    if counts is not None:
+        if color_by == 'baja_binary':
+            pairs, color_map = [(k, BAJA_LABELS[k]) for k in sorted(counts)], get_color_by_baja_binary()
+        else:
+            pairs, color_map = [(k, k) for k in counts], get_color_by_labels(list(counts))
     else:
-        color_map = get_color_by_labels((df[color_by].unique()))
-    
+        values, pairs, color_map = _labels(df, color_by, rows)
+        counts = pd.Series(values).value_counts()
+    df_plot = pd.DataFrame({
+        color_by: [label for _, label in pairs],
+        'clientes': [int(counts.get(key, 0)) for key, _ in pairs]
+    })
+
     fig = px.pie(
         df_plot,
         names=color_by,
+        values='clientes',
         color=color_by,
         color_discrete_map=color_map,
         title=title or "Distribución"
@@ -73,14 +141,30 @@ def create_pie_chart(df, color_by='baja_binary', title=None, theme='light'):
     
     return fig
 
-def create_churn_bar(df, category_col, title=None, theme='light'):
-    """Crea gráfico de barras apiladas de churn por categoría"""
+def churn_counts(categories, churn):
+    """Porcentaje de alta/baja por categoría a partir de dos arrays (columnas 0 y 1 siempre presentes)"""
+    counts = (
+        pd.DataFrame({'categoria': categories, 'baja_binary': churn})
+        .groupby(['categoria', 'baja_binary'], observed=True)
+        .size()
+        .unstack(fill_value=0)
+        .reindex(columns=[0, 1], fill_value=0)
+    )
+    return counts.div(counts.sum(axis=1), axis=0) * 100
+
+@traced(tags=("category_col",))
+@cached_figure
+def create_churn_bar(df, category_col, title=None, theme='light', churn_pct=None, rows=None):
+    """Crea gráfico de barras apiladas de churn por categoría.
+
+    Si se pasa ``churn_pct`` (porcentajes ya agregados, p. ej. desde el
+    cubo de baja) no se recorre ``df``. ``rows`` limita el cálculo a esas filas.
+    """
 
-    churn_pct = pd.crosstab(
-        df[category_col],
-        df['baja_binary'],
-        normalize='index'
-    ) * 100
+    if churn_pct is None:
+        with span("churn_counts") as s:
+            churn_pct = churn_counts(_column(df, category_col, rows), _column(df, 'baja_binary', rows))
+            s.rows = len(df) if rows is None else len(rows)
 
     fig = go.Figure()
 
@@ -111,6 +195,7 @@ def create_churn_bar(df, category_col, title=None, theme='light'):
 
     return fig
 
+@traced()
 def create_gauge_chart(value, title="Probabilidad de baja", theme='light'):
     """Crea gauge chart para probabilidad de baja"""
     fig = go.Figure(go.Indicator(
@@ -141,16 +226,77 @@ def create_gauge_chart(value, title="Probabilidad de baja", theme='light'):
         )
     return fig
 
-def create_avg_metric_bar(df, metric_col, title=None, yaxis_title=None, is_currency=False, theme='light'):
-    """Crea gráfico de barras para promedio de una métrica por estado de churn"""
-    
-    import pandas as pd
+@traced()
+def create_what_if_curves(scenarios, x='tenure', color='contract', current=None, title=None, theme='light'):
+    """Curvas de probabilidad de baja (%) frente a ``x``, una por valor de ``color``.
 
-    avg_data = (
-        df.groupby('baja_binary')[metric_col]
-        .mean()
-        .reset_index()
+    ``current`` (``(x, probabilidad)``) marca la situación actual del cliente.
+    """
+    palette = [POSITIVO, PRINCIPAL, NEGATIVO, SECUNDARIO, TITULO]
+    fig = go.Figure()
+    for i, (label, group) in enumerate(scenarios.groupby(color, sort=False)):
+        fig.add_trace(go.Scatter(
+            x=group[x],
+            y=group['churn_probability'] * 100,
+            mode='lines',
+            name=str(label),
+            line=dict(color=palette[i % len(palette)], width=3),
+        ))
+    if current is not None:
+        fig.add_trace(go.Scatter(
+            x=[current[0]],
+            y=[current[1] * 100],
+            mode='markers',
+            name='Actual',
+            marker=dict(color='#FF4136', size=12, symbol='diamond'),
+        ))
+    fig.add_hline(y=50, line_dash='dot', line_color=TITULO, opacity=0.5)
+    fig.update_layout(
+        title=title,
+        xaxis_title='Antigüedad (meses)' if x == 'tenure' else x,
+        yaxis_title='Probabilidad de baja (%)',
+        yaxis_range=[0, 100],
+        legend_title_text=color.title(),
     )
+    if theme == 'dark':
+        fig.update_layout(plot_bgcolor='black', paper_bgcolor='black', font=dict(color=TITULO))
+    return fig
+
+@traced()
+def create_what_if_heatmap(scenarios, rows='contract', columns='paymentmethod', title=None, theme='light'):
+    """Mapa de calor de probabilidad de baja (%) para cada combinación ``rows`` x ``columns``"""
+    pivot = scenarios.pivot_table(index=rows, columns=columns, values='churn_probability', sort=False) * 100
+    fig = px.imshow(
+        pivot.round(1),
+        text_auto=True,
+        color_continuous_scale=[POSITIVO, '#FFDC00', NEGATIVO, '#FF4136'],
+        zmin=0,
+        zmax=100,
+        aspect='auto',
+        title=title,
+        labels=dict(color='Baja (%)'),
+    )
+    fig.update_layout(xaxis_title=None, yaxis_title=None)
+    if theme == 'dark':
+        fig.update_layout(plot_bgcolor='black', paper_bgcolor='black', font=dict(color=TITULO))
+    return fig
+
+@traced(tags=("metric_col",))
+@cached_figure
+def create_avg_metric_bar(df, metric_col, title=None, yaxis_title=None, is_currency=False, theme='light', avg_data=None):
+    """Crea gráfico de barras para promedio de una métrica por estado de churn.
+
+    Si se pasa ``avg_data`` (medias ya agregadas por ``baja_binary``) no se recorre ``df``.
+    """
+
+    if avg_data is None:
+        avg_data = (
+            df.groupby('baja_binary')[metric_col]
+            .mean()
+            .reset_index()
+        )
+    else:
+        avg_data = avg_data.copy()
 
     # Mapear etiquetas
     avg_data['Estado'] = avg_data['baja_binary'].map({
@@ -181,6 +327,8 @@ def create_avg_metric_bar(df, metric_col, title=None, yaxis_title=None, is_curre
 
     return fig
 
+@traced()
+@cached_figure
 def create_correlation_heatmap(corr_matrix, title=None, theme='light'):
     """Crea mapa de calor de correlación con soporte para modo claro/oscuro"""
 
@@ -0,0 +1,158 @@
+"""
+Cubo de agregados de baja para el Panel Ejecutivo.
+
+Agrupa una sola vez a los clientes por las dimensiones de los filtros
+laterales, la antigüedad (en meses) y el pago mensual (en tramos de 1 $)
+y guarda, para cada celda y estado de baja, el número de clientes y las
+sumas de las métricas. Las métricas y gráficos del panel se responden
+sumando celdas, por lo que el coste de cada interacción depende del
+número de celdas (acotado) y no del número de clientes.
+"""
+import numpy as np
+import pandas as pd
+
+DIMENSIONS = [
+    "contract", "internetservice", "paymentmethod", "paperlessbilling",
+    "seniorcitizen", "partner", "dependents",
+]
+SUM_COLS = ["monthlycharges", "tenure"]
+MONTHLY_BIN_WIDTH = 1.0
+
+
+def monthly_bin(values):
+    """Tramo de pago mensual (límite inferior) de cada valor"""
+    return (np.floor(np.asarray(values, dtype=float) / MONTHLY_BIN_WIDTH) * MONTHLY_BIN_WIDTH).astype("float32")
+
+
+class ChurnCube:
+    """
+    Cubo de celdas ``dimensiones x antigüedad x tramo de pago x baja``.
+
+    Parameters
+    ----------
+    cells : pd.DataFrame
+        Una fila por celda no vacía con las dimensiones, ``tenure_bin``,
+        ``monthly_bin``, ``baja_binary``, ``n`` y las sumas de ``SUM_COLS``.
+    version : str, optional
+        Versión del dataset del que se construyó el cubo.
+    """
+
+    def __init__(self, cells, version=None):
+        self.cells = cells
+        self.version = version
+        self.dimensions = [d for d in DIMENSIONS if d in cells.columns]
+        self._n = cells["n"].to_numpy()
+        self._churn = cells["baja_binary"].to_numpy() == 1
+
+    @classmethod
+    def build(cls, df, version=None):
+        """Construye el cubo a partir de los clientes (una pasada groupby)"""
+        dims = [d for d in DIMENSIONS if d in df.columns]
+        keys = df[dims].assign(
+            tenure_bin=df["tenure"].to_numpy(),
+            monthly_bin=monthly_bin(df["monthlycharges"]),
+            baja_binary=df["baja_binary"].to_numpy(),
+        )
+        values = df[SUM_COLS].astype("float64")
+        values["n"] = 1
+
+        cells = (
+            pd.concat([keys, values], axis=1)
+            .groupby(list(keys.columns), observed=True, sort=False)
+            .sum()
+            .reset_index()
+        )
+        return cls(cells, version)
+
+    @classmethod
+    def from_frames(cls, frames, version=None):
+        """Construye el cubo lote a lote (p. ej. desde ``dataset_scan.iter_frames``) sin reunir las filas"""
+        cube = None
+        for df in frames:
+            part = cls.build(df)
+            cube = part if cube is None else cube.merge(part)
+        if cube is None:
+            raise ValueError("El dataset no tiene filas")
+        return cls(cube.cells, version)
+
+    def merge(self, other):
+        """Suma celda a celda dos cubos con las mismas dimensiones"""
+        keys = [c for c in self.cells.columns if c not in SUM_COLS and c != "n"]
+        cells = (
+            pd.concat([self.cells, other.cells], ignore_index=True)
+            .groupby(keys, observed=True, sort=False)
+            .sum()
+            .reset_index()
+        )
+        return ChurnCube(cells, self.version)
+
+    # ========================================
+    # SELECCIÓN
+    # ========================================
+    def select(self, filters=None, tenure_range=None, monthly_range=None):
+        """
+        Máscara de celdas que cumplen los filtros.
+
+        ``filters`` es un dict ``dimensión -> valor``; ``tenure_range`` es
+        inclusivo en ambos extremos y ``monthly_range`` selecciona los
+        tramos cuyo límite inferior está en ``[mínimo, máximo)``.
+        """
+        mask = np.ones(len(self.cells), dtype=bool)
+        for col, value in (filters or {}).items():
+            mask &= self.cells[col].to_numpy() == value
+        if tenure_range is not None:
+            t = self.cells["tenure_bin"].to_numpy()
+            mask &= (t >= tenure_range[0]) & (t <= tenure_range[1])
+        if monthly_range is not None:
+            m = self.cells["monthly_bin"].to_numpy()
+            mask &= (m >= monthly_range[0]) & (m < monthly_range[1])
+        return mask
+
+    def options(self, col, mask=None):
+        """Valores presentes de una dimensión dentro de la selección"""
+        values = self.cells[col] if mask is None else self.cells.loc[mask, col]
+        return sorted(values.unique().tolist())
+
+    def value_range(self, mask, col):
+        """Mínimo y máximo de ``tenure`` o ``monthlycharges`` (por tramos) dentro de la selección"""
+        if col == "tenure":
+            values = self.cells["tenure_bin"].to_numpy()[mask]
+            return float(values.min()), float(values.max())
+        values = self.cells["monthly_bin"].to_numpy()[mask]
+        return float(values.min()), float(values.max()) + MONTHLY_BIN_WIDTH
+
+    # ========================================
+    # CONSULTAS
+    # ========================================
+    def kpis(self, mask):
+        """Total de clientes, bajas, tasa de baja y medias de las métricas"""
+        n = self._n[mask]
+        total = int(n.sum())
+        bajas = int(n[self._churn[mask]].sum())
+        result = {
+            "total": total,
+            "bajas": bajas,
+            "tasa_baja": bajas / total * 100 if total else 0.0,
+        }
+        for col in SUM_COLS:
+            result[f"{col}_media"] = float(self.cells[col].to_numpy()[mask].sum() / total) if total else float("nan")
+        return result
+
+    def churn_pct(self, mask, category_col):
+        """Porcentaje de alta/baja por categoría (equivale a ``pd.crosstab(normalize='index') * 100``)"""
+        counts = (
+            self.cells.loc[mask]
+            .groupby([category_col, "baja_binary"], observed=True)["n"]
+            .sum()
+            .unstack(fill_value=0)
+            .reindex(columns=[0, 1], fill_value=0)
+        )
+        return counts.div(counts.sum(axis=1), axis=0) * 100
+
+    def avg_by_churn(self, mask, metric_col):
+        """Media de una métrica por estado de baja (como ``groupby('baja_binary').mean()``)"""
+        sums = self.cells.loc[mask].groupby("baja_binary")[[metric_col, "n"]].sum()
+        return pd.DataFrame({
+            "baja_binary": sums.index,
+            metric_col: (sums[metric_col] / sums["n"]).to_numpy(),
+        })
@@ -2,7 +2,17 @@ import streamlit as st
 """
 Paleta de colores corporativa Telco
 """
-THEME = st.get_option("theme.base")  # "light" o "dark"
+
+def get_theme():
+    """Tema base configurado en Streamlit: "light" o "dark" (None si no se fijó)"""
+    return st.get_option("theme.base")
+
+def __getattr__(name):
+    # ``THEME`` se lee al usarlo (``from utils.colors import THEME`` en cada
+    # ejecución de la página), no una sola vez al importar el módulo
+    if name == "THEME":
+        return get_theme()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 COLORES_TELCO = {
     'azul_profundo': '#0A2540',
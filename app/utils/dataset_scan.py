@@ -0,0 +1,317 @@
+"""
+Lectura por bloques de datasets Parquet particionados (estilo Hive).
+
+Un dataset particionado es una carpeta con subcarpetas ``columna=valor``
+(por ejemplo ``contract=Month-to-month/internetservice=DSL/part-0.parquet``). Los
+filtros de la barra lateral se convierten en una expresión de pyarrow:
+las condiciones sobre columnas de partición descartan carpetas enteras y
+el resto se comprueban contra las estadísticas de cada grupo de filas
+antes de leerlo. Los agregados del Panel Ejecutivo se calculan recorriendo
+los lotes resultantes, sin reunir las filas en un DataFrame.
+
+Crear el dataset particionado desde la carpeta ``app/``::
+
+    python -m utils.dataset_scan ../clean_data/telco-customer.parquet ../clean_data/telco-customer
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+PARTITION_COLS = ["contract", "internetservice"]
+BATCH_SIZE = 256 * 1024
+MAX_ROWS_PER_GROUP = 128 * 1024
+
+
+def is_dataset_dir(path):
+    """``True`` si ``path`` es una carpeta de dataset (particionado o no)"""
+    return os.path.isdir(path)
+
+
+def parquet_files(paths):
+    """Ficheros Parquet de una o varias rutas (las carpetas se expanden a sus ficheros)"""
+    if isinstance(paths, (str, os.PathLike)):
+        paths = [paths]
+    files = []
+    for path in paths:
+        files.extend(open_dataset(path).files if is_dataset_dir(path) else [path])
+    return files
+
+
+def path_version(path):
+    """Identificador barato de la versión de un fichero o carpeta (mtime y tamaño)"""
+    if is_dataset_dir(path):
+        stats = [os.stat(f) for f in parquet_files(path)]
+        mtime = max((s.st_mtime_ns for s in stats), default=0)
+        size = sum(s.st_size for s in stats)
+        return f"{mtime:x}-{size:x}-{len(stats):x}"
+    stat = os.stat(path)
+    return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+
+
+def read_columns(columns):
+    """Columnas a leer del fichero: ``baja_binary`` se deriva de ``baja``"""
+    if columns is None:
+        return None
+    read_cols = [c for c in columns if c != "baja_binary"]
+    if "baja_binary" in columns and "baja" not in read_cols:
+        read_cols.append("baja")
+    return read_cols
+
+
+def _partition_type(values):
+    if values <= {"true", "false"}:
+        return pa.bool_()
+    if all(v.lstrip("-").isdigit() for v in values):
+        return pa.int64()
+    return pa.string()
+
+
+def partitioning_for(path):
+    """
+    Particionado Hive de ``path`` con tipos explícitos.
+
+    pyarrow infiere como texto los booleanos escritos como ``true``/``false``;
+    aquí se tipan como ``bool`` para que coincidan con los valores del
+    Parquet original.
+    """
+    values = {}
+    for root, dirs, _ in os.walk(path):
+        for d in dirs:
+            if "=" in d:
+                key, value = d.split("=", 1)
+                values.setdefault(key, set()).add(value)
+    if not values:
+        return None
+    schema = pa.schema([(key, _partition_type(v)) for key, v in values.items()])
+    return ds.partitioning(schema, flavor="hive")
+
+
+def open_dataset(path):
+    """Dataset de pyarrow sobre un Parquet o una carpeta (particionada o no)"""
+    if is_dataset_dir(path):
+        return ds.dataset(path, format="parquet", partitioning=partitioning_for(path))
+    return ds.dataset(path, format="parquet")
+
+
+def _literal(field_type, value):
+    if pa.types.is_boolean(field_type) and isinstance(value, str):
+        return value.lower() == "true"
+    if pa.types.is_string(field_type) and not isinstance(value, str):
+        return str(value)
+    return value
+
+
+def filter_expression(schema, filters=None, ranges=None):
+    """
+    Expresión de pyarrow equivalente a un estado de filtros.
+
+    Parameters
+    ----------
+    schema : pa.Schema
+        Esquema del dataset (para convertir los valores al tipo de cada columna).
+    filters : dict, optional
+        ``columna -> valor`` (igualdad).
+    ranges : dict, optional
+        ``columna -> (mínimo, máximo)`` o ``(mínimo, máximo, inclusive)``
+        con ``inclusive`` como en ``pd.Series.between``.
+
+    Returns
+    -------
+    ds.Expression or None
+        ``None`` si no hay ningún filtro.
+    """
+    expr = None
+    conditions = []
+    for col, value in (filters or {}).items():
+        field_type = schema.field(col).type
+        if pa.types.is_dictionary(field_type):
+            field_type = field_type.value_type
+        conditions.append(ds.field(col) == _literal(field_type, value))
+
+    for col, bounds in (ranges or {}).items():
+        low, high = bounds[0], bounds[1]
+        inclusive = bounds[2] if len(bounds) > 2 else "both"
+        field = ds.field(col)
+        conditions.append(field >= low if inclusive in ("both", "left") else field > low)
+        conditions.append(field <= high if inclusive in ("both", "right") else field < high)
+
+    for condition in conditions:
+        expr = condition if expr is None else expr & condition
+    return expr
+
+
+def iter_frames(path, columns=None, filters=None, ranges=None, batch_size=BATCH_SIZE):
+    """
+    Lotes (DataFrames) de las filas que cumplen los filtros.
+
+    Solo se leen las columnas pedidas; ``baja_binary`` se deriva de ``baja``.
+    """
+    dataset = open_dataset(path)
+    expr = filter_expression(dataset.schema, filters, ranges)
+    for batch in dataset.to_batches(columns=read_columns(columns), filter=expr, batch_size=batch_size):
+        if batch.num_rows == 0:
+            continue
+        df = batch.to_pandas()
+        if "baja" in df.columns and (columns is None or "baja_binary" in columns):
+            df["baja_binary"] = (df["baja"] == "Yes").to_numpy().astype("int8")
+        yield df if columns is None else df[columns]
+
+
+def dataset_columns(path):
+    """Nombres de columnas del dataset (incluidas las de partición)"""
+    return open_dataset(path).schema.names
+
+
+# ========================================
+# AGREGADOS EN STREAMING
+# ========================================
+class ScanAggregate:
+    """
+    Agregados del Panel Ejecutivo acumulados lote a lote.
+
+    Parameters
+    ----------
+    category_cols : list of str
+        Columnas con conteos por categoría y estado de baja.
+    metric_cols : list of str
+        Columnas con sumas por estado de baja (medias).
+    hist_edges : dict, optional
+        ``columna -> bordes`` de los histogramas por estado de baja.
+    """
+
+    def __init__(self, category_cols, metric_cols, hist_edges=None):
+        self.category_cols = list(category_cols)
+        self.metric_cols = list(metric_cols)
+        self.hist_edges = {col: np.asarray(e, dtype=float) for col, e in (hist_edges or {}).items()}
+        self.n = np.zeros(2, dtype=np.int64)
+        self.sums = {col: np.zeros(2) for col in self.metric_cols}
+        self.counts = {col: None for col in self.category_cols}
+        self.hist = {col: np.zeros((2, len(e) - 1), dtype=np.int64) for col, e in self.hist_edges.items()}
+
+    def update(self, df):
+        y = df["baja_binary"].to_numpy()
+        churn = y == 1
+        self.n += [int((~churn).sum()), int(churn.sum())]
+
+        for col in self.metric_cols:
+            values = df[col].to_numpy(dtype=float)
+            self.sums[col] += [values[~churn].sum(), values[churn].sum()]
+
+        for col in self.category_cols:
+            counts = df.groupby([col, "baja_binary"], observed=True).size()
+            previous = self.counts[col]
+            self.counts[col] = counts if previous is None else previous.add(counts, fill_value=0)
+
+        for col, edges in self.hist_edges.items():
+            values = df[col].to_numpy(dtype=float)
+            for cls in (0, 1):
+                self.hist[col][cls] += np.histogram(values[y == cls], bins=edges)[0]
+        return self
+
+    @property
+    def total(self):
+        return int(self.n.sum())
+
+    def kpis(self):
+        """Mismo formato que ``ChurnCube.kpis``"""
+        total, bajas = self.total, int(self.n[1])
+        result = {
+            "total": total,
+            "bajas": bajas,
+            "tasa_baja": bajas / total * 100 if total else 0.0,
+        }
+        for col in self.metric_cols:
+            result[f"{col}_media"] = float(self.sums[col].sum() / total) if total else float("nan")
+        return result
+
+    def churn_pct(self, category_col):
+        """Porcentaje de alta/baja por categoría (mismo formato que ``ChurnCube.churn_pct``)"""
+        counts = self.counts[category_col]
+        if counts is None:
+            return pd.DataFrame(columns=[0, 1], dtype=float)
+        counts = counts.unstack(fill_value=0).reindex(columns=[0, 1], fill_value=0)
+        return counts.div(counts.sum(axis=1), axis=0) * 100
+
+    def avg_by_churn(self, metric_col):
+        """Media de una métrica por estado de baja (mismo formato que ``ChurnCube.avg_by_churn``)"""
+        present = self.n > 0
+        return pd.DataFrame({
+            "baja_binary": np.arange(2)[present],
+            metric_col: self.sums[metric_col][present] / self.n[present],
+        })
+
+    def class_counts(self):
+        """Clientes por estado de baja presente: ``{0: activos, 1: bajas}``"""
+        return {cls: int(n) for cls, n in enumerate(self.n) if n}
+
+    def histogram(self, col):
+        """``(bordes, {estado: conteos})`` para ``create_histogram(binned=...)``"""
+        return self.hist_edges[col], {cls: self.hist[col][cls] for cls in (0, 1) if self.n[cls]}
+
+
+def scan_aggregate(path, category_cols, metric_cols, hist_edges=None, filters=None, ranges=None,
+                   batch_size=BATCH_SIZE):
+    """Recorre las filas filtradas (con poda de particiones y grupos de filas) y acumula sus agregados"""
+    columns = list(dict.fromkeys([*category_cols, *metric_cols, *(hist_edges or {}), "baja_binary"]))
+    agg = ScanAggregate(category_cols, metric_cols, hist_edges)
+    for df in iter_frames(path, columns, filters, ranges, batch_size):
+        agg.update(df)
+    return agg
+
+
+# ========================================
+# ESCRITURA
+# ========================================
+def write_partitioned(source, dest, partition_cols=PARTITION_COLS, max_rows_per_group=MAX_ROWS_PER_GROUP,
+                      basename_template=None, replace=True):
+    """
+    Escribe ``source`` (Parquet, tabla de Arrow o DataFrame) como dataset Hive particionado.
+
+    Las filas se ordenan por ``tenure`` y ``monthlycharges`` dentro de cada
+    partición para que los grupos de filas tengan rangos estrechos y los
+    filtros por rango puedan descartarlos por sus estadísticas. Con
+    ``replace=False`` los ficheros nuevos (``basename_template``) se añaden a
+    las particiones existentes en lugar de sustituirlas.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        table = pq.read_table(source)
+    elif isinstance(source, pd.DataFrame):
+        table = pa.Table.from_pandas(source, preserve_index=False)
+    else:
+        table = source
+
+    sort_keys = [(c, "ascending") for c in ("tenure", "monthlycharges") if c in table.column_names]
+    if sort_keys:
+        table = table.sort_by(sort_keys)
+
+    ds.write_dataset(
+        table,
+        dest,
+        format="parquet",
+        partitioning=partition_cols,
+        partitioning_flavor="hive",
+        max_rows_per_group=max_rows_per_group,
+        basename_template=basename_template,
+        existing_data_behavior="delete_matching" if replace else "overwrite_or_ignore",
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convierte un Parquet en un dataset particionado (Hive)")
+    parser.add_argument("source", help="Parquet de entrada")
+    parser.add_argument("dest", help="Carpeta del dataset")
+    parser.add_argument("--by", nargs="+", default=PARTITION_COLS, help="Columnas de partición")
+    parser.add_argument("--rows-per-group", type=int, default=MAX_ROWS_PER_GROUP)
+    args = parser.parse_args(argv)
+
+    write_partitioned(args.source, args.dest, args.by, args.rows_per_group)
+    print(f"{len(open_dataset(args.dest).files)} ficheros -> {args.dest}")
+
+
+if __name__ == "__main__":
+    main()
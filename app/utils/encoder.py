@@ -0,0 +1,229 @@
+"""
+Codificador de variables precompilado para el modelo de baja.
+
+Sustituye ``pd.get_dummies`` + ``reindex`` por un mapeo directo
+``valor -> índice de columna`` sobre una fila (o lote) NumPy preasignada.
+El orden y los nombres de columnas son exactamente los de
+``OneHotEncoder.get_feature_names_out`` usados al entrenar en
+``notebooks/ML.ipynb``.
+
+Generar el artefacto desde la carpeta ``app/``::
+
+    python -m utils.encoder
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+MODELS_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "models"
+)
+DEFAULT_ENCODER_PATH = os.path.join(MODELS_DIR, "feature_encoder.json")
+
+NUMERIC_COLS = ["tenure", "monthlycharges", "totalcharges"]
+BOOL_COLS = ["cliente_larga_duracion", "phone_and_internet"]
+
+# Servicios que valen "No internet service" cuando no hay internet contratado
+INTERNET_SERVICES = [
+    "onlinesecurity", "onlinebackup", "deviceprotection",
+    "techsupport", "streamingtv", "streamingmovies",
+]
+
+# 'contract' tiene tres categorías; un booleano (mes a mes o no) no distingue
+# los contratos de uno y dos años y el modelo los trata por separado.
+CONTRACT_ERROR = "'contract' debe traer el tipo de contrato (Month-to-month, One year, Two year), no un booleano"
+
+
+def _is_bool_label(value):
+    return isinstance(value, (bool, np.bool_)) or str(value) in ("True", "False")
+
+
+def check_contract(values):
+    """Devuelve ``values`` (Series de 'contract') o lanza ``ValueError`` si vienen como booleanos"""
+    labels = values.cat.categories if isinstance(values.dtype, pd.CategoricalDtype) else pd.unique(values)
+    if values.dtype == bool or any(_is_bool_label(v) for v in labels):
+        raise ValueError(CONTRACT_ERROR)
+    return values
+
+
+class FeatureEncoder:
+    """
+    Codificador ajustado y serializable (JSON) con el esquema de entrenamiento.
+
+    Parameters
+    ----------
+    feature_names : list of str
+        Columnas del modelo en orden (``model.get_booster().feature_names``).
+    categories : dict
+        ``columna -> lista de categorías`` en el orden de ``OneHotEncoder``.
+    defaults : dict
+        Valor usado para cada campo categórico que no venga en la entrada.
+    """
+
+    def __init__(self, feature_names, categories, defaults):
+        self.feature_names = list(feature_names)
+        self.categories = {col: list(cats) for col, cats in categories.items()}
+        self.defaults = dict(defaults)
+
+        position = {name: j for j, name in enumerate(self.feature_names)}
+        self.numeric_index = [(col, position[col]) for col in NUMERIC_COLS + BOOL_COLS]
+        self.category_index = {
+            col: {cat: position[f"{col}_{cat}"] for cat in cats}
+            for col, cats in self.categories.items()
+        }
+        self._lookup = {
+            col: (pd.Index(cats), np.array([position[f"{col}_{cat}"] for cat in cats], dtype=np.intp))
+            for col, cats in self.categories.items()
+        }
+
+    @property
+    def n_features(self):
+        return len(self.feature_names)
+
+    # ========================================
+    # AJUSTE
+    # ========================================
+    @classmethod
+    def fit(cls, df, feature_names):
+        """Ajusta el codificador: categorías desde ``feature_names`` y valores por defecto (moda) desde ``df``"""
+        numeric = set(NUMERIC_COLS + BOOL_COLS)
+        categories = {}
+        for name in feature_names:
+            if name in numeric:
+                continue
+            col, cat = name.split("_", 1)
+            categories.setdefault(col, []).append(cat)
+
+        defaults = {}
+        for col in categories:
+            values = check_contract(df[col]) if col == "contract" else df[col]
+            defaults[col] = str(values.astype(str).mode().iloc[0])
+
+        return cls(feature_names, categories, defaults)
+
+    # ========================================
+    # SERIALIZACIÓN
+    # ========================================
+    def save(self, path=DEFAULT_ENCODER_PATH):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({
+                "feature_names": self.feature_names,
+                "categories": self.categories,
+                "defaults": self.defaults,
+            }, f, ensure_ascii=False, indent=2)
+
+    @classmethod
+    def load(cls, path=DEFAULT_ENCODER_PATH):
+        with open(path, encoding="utf-8") as f:
+            spec = json.load(f)
+        return cls(spec["feature_names"], spec["categories"], spec["defaults"])
+
+    # ========================================
+    # CODIFICACIÓN
+    # ========================================
+    def complete(self, record):
+        """
+        Completa un registro con los campos que faltan.
+
+        Los campos categóricos ausentes toman su valor por defecto (o
+        "No internet service" si no hay internet) y las variables derivadas
+        se calculan como en ``data_cleaning.ipynb``.
+        """
+        rec = dict(record)
+        sin_internet = rec.get("internetservice") == "No"
+
+        for col, default in self.defaults.items():
+            if col not in rec:
+                rec[col] = "No internet service" if sin_internet and col in INTERNET_SERVICES else default
+
+        if "totalcharges" not in rec:
+            rec["totalcharges"] = rec["tenure"] * rec["monthlycharges"]
+        if "cliente_larga_duracion" not in rec:
+            rec["cliente_larga_duracion"] = rec["tenure"] >= 24
+        if "phone_and_internet" not in rec:
+            rec["phone_and_internet"] = rec["phoneservice"] == "Yes" and rec["internetservice"] != "No"
+
+        return rec
+
+    def transform_row(self, record, out=None):
+        """
+        Codifica un único cliente (dict con valores crudos) en una fila ``(1, n_features)``.
+
+        Raises
+        ------
+        ValueError
+            Si algún campo categórico trae una categoría no vista al entrenar.
+        """
+        rec = self.complete(record)
+        row = np.zeros((1, self.n_features), dtype=np.float32) if out is None else out
+        if out is not None:
+            row.fill(0.0)
+
+        for col, j in self.numeric_index:
+            row[0, j] = rec[col]
+
+        for col, index in self.category_index.items():
+            value = rec[col]
+            try:
+                row[0, index[str(value)]] = 1.0
+            except KeyError:
+                # Un booleano nunca es una categoría de 'contract': solo se mira al fallar la búsqueda
+                if col == "contract" and _is_bool_label(value):
+                    raise ValueError(CONTRACT_ERROR) from None
+                raise ValueError(f"Categoría desconocida en '{col}': {value!r}") from None
+
+        return row
+
+    def transform(self, df, out=None):
+        """
+        Codifica un lote de clientes en una matriz ``(len(df), n_features)`` float32.
+
+        Raises
+        ------
+        ValueError
+            Si falta alguna columna o aparece una categoría no vista al entrenar.
+        """
+        n = len(df)
+        X = np.zeros((n, self.n_features), dtype=np.float32) if out is None else out[:n]
+        if out is not None:
+            X.fill(0.0)
+
+        missing = [col for col, _ in self.numeric_index if col not in df.columns]
+        missing += [col for col in self._lookup if col not in df.columns]
+        if missing:
+            raise ValueError(f"Faltan columnas en la entrada: {missing}")
+
+        for col, j in self.numeric_index:
+            X[:, j] = df[col].to_numpy(dtype=np.float32, na_value=np.nan)
+
+        rows = np.arange(n)
+        for col, (cats, idx) in self._lookup.items():
+            raw = check_contract(df[col]) if col == "contract" else df[col]
+            codes = cats.get_indexer(raw.astype(str))
+            unknown = codes < 0
+            if unknown.any():
+                bad = pd.unique(raw[unknown].astype(str))[:5].tolist()
+                raise ValueError(f"Categorías desconocidas en '{col}': {bad}")
+            X[rows, idx[codes]] = 1.0
+
+        return X
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ajusta y guarda el codificador de variables del modelo")
+    parser.add_argument("--data", default=os.path.join(os.path.dirname(MODELS_DIR), "clean_data", "telco-customer.parquet"))
+    parser.add_argument("--model", default=os.path.join(MODELS_DIR, "xgboost_model.pkl"))
+    parser.add_argument("--out", default=DEFAULT_ENCODER_PATH)
+    args = parser.parse_args(argv)
+
+    model = pd.read_pickle(args.model)
+    encoder = FeatureEncoder.fit(pd.read_parquet(args.data), model.get_booster().feature_names)
+    encoder.save(args.out)
+    print(f"Codificador guardado en {args.out} ({encoder.n_features} variables)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,456 @@
+"""
+Pipeline ETL incremental: CSV en bruto -> dataset Parquet particionado.
+
+Aplica las mismas transformaciones que ``notebooks/data_cleaning.ipynb``
+(``TotalCharges`` numérico, ``cliente_larga_duracion``, ``phone_and_internet``,
+``SeniorCitizen`` recategorizado, ``Churn`` -> ``baja`` y columnas en
+minúsculas) bloque a bloque y en un pool de procesos, y escribe
+un dataset particionado por ``contract`` e ``internetservice`` (ver
+``utils.dataset_scan``).
+
+Es incremental: ``_row_index.parquet`` (dentro del dataset) guarda un hash
+del contenido en bruto de cada ``customerID``. En cada ejecución solo se
+limpian y escriben los clientes nuevos o modificados, y solo se reescriben
+los ficheros que contenían versiones anteriores o clientes eliminados.
+
+Cada ejecución escribe ficheros con su propio prefijo y el índice guarda
+(en sus metadatos) los prefijos de los ficheros vigentes. Si una ejecución
+se interrumpe antes de guardar el índice, la siguiente borra primero los
+ficheros de prefijos que el índice no recoge y después repite el trabajo.
+
+Tras actualizar el dataset se regenera por defecto el Parquet único que
+está junto a la carpeta (``<dest>.parquet``), el que leen el notebook de
+modelado, la búsqueda de hiperparámetros y el generador sintético; la app
+lee la carpeta (ver ``utils.load_data.data_source``).
+
+Uso desde la carpeta ``app/``::
+
+    python -m utils.etl ../csv/Telco-Customer-Churn.csv ../clean_data/telco-customer --workers 4
+    python -m utils.etl ../csv/Telco-Customer-Churn.csv ../clean_data/telco-customer \\
+        --export ../clean_data/telco-customer.parquet ../clean_data/telco-customer.csv
+    python -m utils.etl ../csv/Telco-Customer-Churn.csv ../clean_data/telco-customer --no-export
+"""
+import argparse
+import csv
+import json
+import os
+import shutil
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pv
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from .dataset_scan import PARTITION_COLS, open_dataset, write_partitioned
+
+RAW_ID_COL = "customerID"
+ID_COL = "customerid"
+INDEX_FILE = "_row_index.parquet"
+# Clave de los metadatos del índice con los prefijos de ejecución de los ficheros vigentes
+RUNS_KEY = b"etl_runs"
+DEFAULT_BLOCK_SIZE = 16 * 1024 * 1024
+
+# Columnas (y orden) de ``clean_data/telco-customer.*``
+CLEAN_COLUMNS = [
+    "gender", "seniorcitizen", "partner", "dependents", "tenure", "phoneservice",
+    "multiplelines", "internetservice", "onlinesecurity", "onlinebackup",
+    "deviceprotection", "techsupport", "streamingtv", "streamingmovies", "contract",
+    "paperlessbilling", "paymentmethod", "monthlycharges", "totalcharges", "baja",
+    "cliente_larga_duracion", "phone_and_internet",
+]
+
+# Columnas de texto que se guardan como categóricas (diccionario en Parquet)
+CATEGORICAL_COLS = [
+    "gender", "seniorcitizen", "partner", "dependents", "phoneservice",
+    "multiplelines", "internetservice", "onlinesecurity", "onlinebackup",
+    "deviceprotection", "techsupport", "streamingtv", "streamingmovies", "contract",
+    "paperlessbilling", "paymentmethod", "baja",
+]
+
+
+# ========================================
+# TRANSFORMACIONES
+# ========================================
+def read_raw(source, block_size=DEFAULT_BLOCK_SIZE):
+    """
+    Lotes (``pa.RecordBatch``) del CSV en bruto de ``block_size`` bytes.
+
+    Todo se lee como texto para que el hash no dependa de la inferencia de tipos.
+    """
+    with open(source, newline="", encoding="utf-8") as f:
+        names = next(csv.reader(f))
+    return pv.open_csv(
+        source,
+        read_options=pv.ReadOptions(block_size=block_size),
+        convert_options=pv.ConvertOptions(column_types={name: pa.string() for name in names}),
+    )
+
+
+def row_hash(batch):
+    """
+    Hash (uint64) del contenido en bruto de cada fila de un lote de Arrow.
+
+    Cada columna se codifica como diccionario y solo se calcula el hash de
+    sus valores distintos; los hashes de las columnas se combinan en orden.
+    """
+    h = np.zeros(batch.num_rows, dtype=np.uint64)
+    for column in batch.columns:
+        encoded = pc.dictionary_encode(column)
+        values = pd.util.hash_array(encoded.dictionary.to_numpy(zero_copy_only=False), categorize=False)
+        h = (h * np.uint64(1_000_003)) ^ values[encoded.indices.to_numpy()]
+    return h
+
+
+def clean_chunk(raw):
+    """
+    Transformaciones de ``data_cleaning.ipynb`` sobre un bloque en bruto.
+
+    Se conserva ``customerid`` (clave del índice incremental); el resto de
+    columnas y tipos coinciden con ``clean_data/telco-customer.parquet``.
+    """
+    df = raw.copy()
+    df["TotalCharges"] = pd.to_numeric(df["TotalCharges"].str.strip(), errors="coerce").fillna(0)
+    df["tenure"] = df["tenure"].astype("int64")
+    df["MonthlyCharges"] = df["MonthlyCharges"].astype("float64")
+    df["cliente_larga_duracion"] = df["tenure"] >= 24
+    df["phone_and_internet"] = (df["PhoneService"] == "Yes") & (df["InternetService"] != "No")
+    df["SeniorCitizen"] = df["SeniorCitizen"].map({"0": "noSeniorCitizen", "1": "SeniorCitizen"})
+    df = df.rename(columns={"Churn": "baja"})
+    df.columns = [col.lower() for col in df.columns]
+    for col in CATEGORICAL_COLS:
+        df[col] = df[col].astype("category")
+    return df
+
+
+def _to_table(df):
+    # Sin metadatos de pandas: las tablas de distintos bloques se concatenan sin conflictos
+    return pa.Table.from_pandas(df, preserve_index=False).replace_schema_metadata(None)
+
+
+# ========================================
+# ÍNDICE DE HASHES
+# ========================================
+INDEX_SCHEMA = pa.schema([
+    (ID_COL, pa.string()),
+    ("row_hash", pa.uint64()),
+    ("position", pa.int64()),
+    ("contract", pa.string()),
+    ("internetservice", pa.string()),
+])
+
+
+def load_index(path):
+    """Índice ``customerid -> (hash, posición en el CSV, partición)`` o vacío si no existe"""
+    if not os.path.exists(path):
+        return INDEX_SCHEMA.empty_table()
+    return pq.read_table(path, schema=INDEX_SCHEMA)
+
+
+def load_runs(path):
+    """
+    Prefijos de ejecución de los ficheros que recoge el índice.
+
+    Conjunto vacío si no hay índice y ``None`` si el índice no los guarda
+    (creado por una versión anterior del pipeline).
+    """
+    if not os.path.exists(path):
+        return set()
+    metadata = pq.read_schema(path).metadata or {}
+    return set(json.loads(metadata[RUNS_KEY])) if RUNS_KEY in metadata else None
+
+
+def save_index(index, path, runs):
+    tmp = f"{path}.tmp"
+    pq.write_table(index.replace_schema_metadata({RUNS_KEY: json.dumps(sorted(runs))}), tmp)
+    os.replace(tmp, path)
+
+
+def _index_lookup(index):
+    return pd.Index(index[ID_COL].to_numpy(zero_copy_only=False)), index["row_hash"].to_numpy()
+
+
+# Índice en cada proceso del pool: se carga una única vez por worker
+_worker_ids = None
+_worker_hashes = None
+
+
+def _init_worker(index_path):
+    global _worker_ids, _worker_hashes
+    _worker_ids, _worker_hashes = _index_lookup(load_index(index_path))
+
+
+def process_chunk(batch, offset, ids_index=None, hashes=None):
+    """
+    Compara un lote con el índice y limpia solo las filas nuevas o modificadas.
+
+    Returns
+    -------
+    tuple
+        ``(entradas del índice del lote, tabla Arrow de las filas a escribir o None,
+        customerID modificados, filas ya presentes en el índice)``.
+    """
+    ids_index = _worker_ids if ids_index is None else ids_index
+    hashes = _worker_hashes if hashes is None else hashes
+
+    ids = batch.column(RAW_ID_COL).to_numpy(zero_copy_only=False)
+    new_hashes = row_hash(batch)
+    pos = ids_index.get_indexer(ids)
+    known = pos >= 0
+    dirty = ~known
+    dirty[known] = hashes[pos[known]] != new_hashes[known]
+
+    entries = pa.table({
+        ID_COL: batch.column(RAW_ID_COL),
+        "row_hash": pa.array(new_hashes),
+        "position": pa.array(np.arange(offset, offset + batch.num_rows, dtype=np.int64)),
+        "contract": batch.column("Contract"),
+        "internetservice": batch.column("InternetService"),
+    }, schema=INDEX_SCHEMA)
+    # Solo las filas nuevas o modificadas pasan a pandas y se limpian
+    table = _to_table(clean_chunk(batch.filter(pa.array(dirty)).to_pandas())) if dirty.any() else None
+    return entries, table, ids[known & dirty], int(known.sum())
+
+
+# ========================================
+# ESCRITURA INCREMENTAL
+# ========================================
+def _partition_key(fragment):
+    keys = ds.get_partition_keys(fragment.partition_expression)
+    return tuple(keys.get(col) for col in PARTITION_COLS)
+
+
+def run_prefix_of(path):
+    """Prefijo de ejecución de un fichero (``<prefijo>-{i}.parquet``)"""
+    return os.path.basename(path).rsplit("-", 1)[0]
+
+
+def remove_orphans(dest, runs):
+    """
+    Borra los ficheros de ``dest`` cuyo prefijo de ejecución no está en ``runs``.
+
+    Son los de ejecuciones que se interrumpieron antes de guardar el índice;
+    sin borrarlos, repetir la ejecución duplicaría sus filas.
+
+    Returns
+    -------
+    int
+        Ficheros eliminados.
+    """
+    removed = 0
+    for path in open_dataset(dest).files:
+        if run_prefix_of(path) not in runs:
+            os.remove(path)
+            removed += 1
+    return removed
+
+
+def remove_rows(dest, ids, partitions, keep_prefix):
+    """
+    Quita las filas con ``customerid`` en ``ids`` de los ficheros de ``partitions``.
+
+    Solo se reescriben (de forma atómica) los ficheros que contienen alguna
+    de esas filas; los de la ejecución actual (``keep_prefix``) no se tocan.
+
+    Returns
+    -------
+    int
+        Ficheros reescritos o eliminados.
+    """
+    if not len(ids) or not partitions:
+        return 0
+    value_set = ids if isinstance(ids, pa.Array) else pa.array(list(ids), type=pa.string())
+    touched = 0
+    for fragment in open_dataset(dest).get_fragments():
+        path = fragment.path
+        if _partition_key(fragment) not in partitions or os.path.basename(path).startswith(keep_prefix):
+            continue
+        # ParquetFile (no read_table) para no añadir las columnas de partición de la ruta
+        hit = pc.is_in(pq.ParquetFile(path).read(columns=[ID_COL])[ID_COL], value_set=value_set)
+        if not pc.any(hit).as_py():
+            continue
+        kept = pq.ParquetFile(path).read().filter(pc.invert(hit))
+        if kept.num_rows:
+            tmp = f"{os.path.dirname(path)}/.{os.path.basename(path)}.tmp"
+            pq.write_table(kept, tmp)
+            os.replace(tmp, path)
+        else:
+            os.remove(path)
+        touched += 1
+    return touched
+
+
+def run_pipeline(source, dest, block_size=DEFAULT_BLOCK_SIZE, workers=0, snapshot=True, full=False):
+    """
+    Actualiza el dataset particionado ``dest`` a partir del CSV en bruto ``source``.
+
+    Con ``workers > 0`` los lotes se comparan y limpian en un pool de
+    procesos, con como mucho ``2 * workers`` lotes en vuelo.
+
+    Parameters
+    ----------
+    snapshot : bool
+        ``source`` contiene a todos los clientes: los que no aparecen se
+        eliminan del dataset. Con ``False`` es un fichero de altas y cambios.
+    full : bool
+        Ignora el índice y reconstruye el dataset desde cero.
+
+    Returns
+    -------
+    dict
+        Filas leídas, nuevas, modificadas, eliminadas, ficheros reescritos,
+        ficheros huérfanos borrados y segundos.
+    """
+    start = time.perf_counter()
+    index_path = os.path.join(dest, INDEX_FILE)
+    if full and os.path.exists(dest):
+        shutil.rmtree(dest)
+    os.makedirs(dest, exist_ok=True)
+
+    old_index = load_index(index_path)
+    # Ficheros de una ejecución interrumpida: no están en el índice y se repiten ahora
+    runs = load_runs(index_path)
+    orphans = remove_orphans(dest, runs) if runs is not None else 0
+    run_prefix = f"part-{time.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+    entries, tables, changed = [], [], []
+    known = 0
+    offset = 0
+
+    def collect(result):
+        nonlocal known
+        chunk_entries, table, chunk_changed, chunk_known = result
+        entries.append(chunk_entries)
+        if table is not None:
+            tables.append(table)
+        changed.extend(chunk_changed)
+        known += chunk_known
+
+    batches = read_raw(source, block_size)
+    if workers > 0:
+        pending = deque()
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(index_path,)) as pool:
+            for batch in batches:
+                pending.append(pool.submit(process_chunk, batch, offset))
+                offset += batch.num_rows
+                if len(pending) >= 2 * workers:
+                    collect(pending.popleft().result())
+            while pending:
+                collect(pending.popleft().result())
+    else:
+        ids_index, hashes = _index_lookup(old_index)
+        for batch in batches:
+            collect(process_chunk(batch, offset, ids_index, hashes))
+            offset += batch.num_rows
+
+    seen = pa.concat_tables(entries) if entries else INDEX_SCHEMA.empty_table()
+    if pc.count_distinct(seen[ID_COL]).as_py() != seen.num_rows:
+        raise ValueError(f"{RAW_ID_COL} duplicados en {source}")
+
+    if snapshot:
+        # Solo hay clientes eliminados si no se han visto todos los del índice
+        if known < old_index.num_rows:
+            deleted = old_index.filter(pc.invert(pc.is_in(old_index[ID_COL], value_set=seen[ID_COL])))[ID_COL]
+        else:
+            deleted = pa.chunked_array([], type=pa.string())
+        new_index = seen
+    else:
+        deleted = pa.chunked_array([], type=pa.string())
+        kept = old_index.filter(pc.invert(pc.is_in(old_index[ID_COL], value_set=seen[ID_COL])))
+        shift = pc.max(kept["position"]).as_py() + 1 if kept.num_rows else 0
+        seen = seen.set_column(2, "position", pc.add(seen["position"], shift))
+        new_index = pa.concat_tables([kept, seen])
+
+    remove_ids = pa.concat_arrays([pa.array(changed, type=pa.string()), *deleted.chunks])
+
+    # 1) filas nuevas y modificadas en ficheros nuevos
+    written = sum(t.num_rows for t in tables)
+    if tables:
+        write_partitioned(
+            pa.concat_tables(tables, promote_options="permissive"),
+            dest,
+            basename_template=run_prefix + "-{i}.parquet",
+            replace=False,
+        )
+
+    # 2) versiones anteriores y clientes eliminados fuera de los ficheros previos
+    partitions = set()
+    if len(remove_ids):
+        previous = old_index.filter(pc.is_in(old_index[ID_COL], value_set=remove_ids)).select(PARTITION_COLS)
+        partitions = set(zip(*(previous[col].to_pylist() for col in PARTITION_COLS)))
+    touched = remove_rows(dest, remove_ids, partitions, run_prefix)
+
+    # 3) índice al final, con los prefijos de los ficheros vigentes: si algo falla
+    # antes, la siguiente ejecución borra los ficheros nuevos y lo repite
+    save_index(new_index, index_path, {run_prefix_of(path) for path in open_dataset(dest).files})
+
+    return {
+        "rows": new_index.num_rows,
+        "read": offset,
+        "new": written - len(changed),
+        "changed": len(changed),
+        "deleted": len(deleted),
+        "files_rewritten": touched,
+        "orphans_removed": orphans,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+# ========================================
+# EXPORTACIÓN
+# ========================================
+def export(dest, out):
+    """
+    Escribe el dataset como un único CSV o Parquet con el formato de ``data_cleaning.ipynb``
+    (sin ``customerid`` y en el orden del CSV en bruto).
+    """
+    table = open_dataset(dest).to_table()
+    order = load_index(os.path.join(dest, INDEX_FILE)).select([ID_COL, "position"]).to_pandas()
+    df = table.to_pandas()
+    df = df.merge(order, on=ID_COL, how="left").sort_values("position", kind="stable")
+
+    df = df[CLEAN_COLUMNS].reset_index(drop=True)
+    for col in CATEGORICAL_COLS:
+        df[col] = df[col].astype("category")
+
+    if out.endswith(".csv"):
+        df.to_csv(out, index=False)
+    else:
+        df.to_parquet(out, index=False, engine="pyarrow", compression="snappy")
+    return len(df)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ETL incremental del CSV de clientes a Parquet particionado")
+    parser.add_argument("source", help="CSV en bruto (formato de csv/Telco-Customer-Churn.csv)")
+    parser.add_argument("dest", help="Carpeta del dataset particionado")
+    parser.add_argument("--block-mb", type=int, default=DEFAULT_BLOCK_SIZE >> 20, help="Tamaño de cada lote del CSV (MB)")
+    parser.add_argument("--workers", type=int, default=0, help="Procesos del pool (0 = sin pool)")
+    parser.add_argument("--delta", action="store_true", help="El CSV solo trae altas y cambios (no elimina clientes)")
+    parser.add_argument("--full", action="store_true", help="Reconstruye el dataset ignorando el índice")
+    parser.add_argument("--export", nargs="*", default=None,
+                        help="Ficheros .parquet/.csv únicos a regenerar (por defecto <dest>.parquet)")
+    parser.add_argument("--no-export", action="store_true", help="Solo actualiza el dataset particionado")
+    args = parser.parse_args(argv)
+
+    stats = run_pipeline(args.source, args.dest, args.block_mb << 20, args.workers, not args.delta, args.full)
+    print(
+        f"{stats['read']:,} filas leídas en {stats['seconds']:.1f}s: {stats['new']:,} nuevas, "
+        f"{stats['changed']:,} modificadas, {stats['deleted']:,} eliminadas "
+        f"({stats['files_rewritten']} ficheros reescritos, {stats['orphans_removed']} huérfanos borrados) -> {args.dest}"
+    )
+    exports = [] if args.no_export else args.export
+    if exports is None:
+        exports = [os.path.normpath(args.dest) + ".parquet"]
+    for out in exports:
+        print(f"{export(args.dest, out):,} filas -> {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Caché de figuras Plotly para los constructores ``create_*`` de ``charts.py``.
+
+Las figuras se guardan por (versión del dataset, hash del estado de
+filtros, parámetros del gráfico, tema) en un LRU acotado por tamaño en
+memoria. Un gráfico que no ha cambiado entre reruns se resuelve con una
+búsqueda en lugar de copiar datos y reconstruir la figura.
+"""
+import functools
+import hashlib
+import inspect
+import threading
+from collections import OrderedDict
+
+from .tracing import TRACER
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Argumentos derivados del estado de filtros: ya van en ``cache_key``
+_EXCLUDED_ARGS = {"rows", "churn_pct", "avg_data", "binned", "counts"}
+
+
+def state_key(*parts):
+    """Hash corto y estable de un estado de filtros (dicts, tuplas, valores simples)"""
+    normalized = repr([sorted(p.items(), key=repr) if isinstance(p, dict) else p for p in parts])
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:16]
+
+
+class FigureCache:
+    """
+    LRU de figuras acotado por bytes (tamaño del JSON de cada figura).
+
+    Parameters
+    ----------
+    max_bytes : int
+        Memoria máxima; al superarla se expulsan las figuras menos usadas.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, fig):
+        size = len(fig.to_json())
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self._entries[key] = (fig, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.bytes -= evicted
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        """Contadores de aciertos/fallos, expulsiones y ocupación"""
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+# Caché única por proceso, compartida por todas las sesiones
+FIGURE_CACHE = FigureCache()
+TRACER.register_stats("figure_cache", FIGURE_CACHE.stats)
+
+
+def cached_figure(func):
+    """
+    Decorador: si la llamada recibe ``cache_key`` (p. ej. ``(versión, state_key(...))``)
+    la figura se busca/guarda en ``FIGURE_CACHE``; sin ``cache_key`` no cambia nada.
+
+    El primer argumento (los datos) no forma parte de la clave: lo
+    identifican la versión y el estado de filtros de ``cache_key``.
+    """
+    signature = inspect.signature(func)
+    data_arg = next(iter(signature.parameters))
+
+    @functools.wraps(func)
+    def wrapper(*args, cache_key=None, **kwargs):
+        if cache_key is None:
+            return func(*args, **kwargs)
+
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        params = tuple(
+            (name, value) for name, value in bound.arguments.items()
+            if name != data_arg and name not in _EXCLUDED_ARGS
+        )
+        key = (func.__name__, cache_key, params)
+
+        fig = FIGURE_CACHE.get(key)
+        if fig is None:
+            fig = func(*args, **kwargs)
+            FIGURE_CACHE.put(key, fig)
+        return fig
+
+    return wrapper
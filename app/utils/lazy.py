@@ -0,0 +1,50 @@
+"""
+Importación diferida de módulos pesados.
+
+``lazy_import("plotly.express")`` devuelve un sustituto del módulo: el
+import real ocurre en el primer acceso a uno de sus atributos. Así una
+página que no dibuja gráficos no paga lo que cuesta importar Plotly, y el
+calentamiento en segundo plano (``utils.warmup``) puede cargarlo antes de
+que nadie lo necesite.
+
+El import pasa por ``importlib.import_module``, que ya serializa por módulo
+las importaciones concurrentes: si el calentamiento y una sesión piden el
+mismo módulo a la vez, la segunda espera a que termine la primera en lugar
+de ver el módulo a medio ejecutar.
+"""
+import importlib
+import sys
+import time
+
+
+class LazyModule:
+    """Sustituto de un módulo que lo importa en el primer acceso a un atributo"""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        module = self._module
+        if module is None:
+            module = self._module = importlib.import_module(self._name)
+        return getattr(module, attr)
+
+    def __repr__(self):
+        state = "cargado" if self._module is not None else "diferido"
+        return f"<LazyModule {self._name!r} ({state})>"
+
+
+def lazy_import(name):
+    """Módulo ``name`` si ya está importado; si no, un ``LazyModule`` que lo importará al usarse"""
+    return sys.modules.get(name) or LazyModule(name)
+
+
+def preload(*names):
+    """Importa los módulos ``names`` y devuelve los segundos que tardó cada uno"""
+    seconds = {}
+    for name in names:
+        start = time.perf_counter()
+        importlib.import_module(name)
+        seconds[name] = time.perf_counter() - start
+    return seconds
@@ -1,55 +1,317 @@
 from click import Path
 import streamlit as st
 import pandas as pd
+import pyarrow.parquet as pq
 import os
-from typing import Callable, Optional
+from typing import TYPE_CHECKING, Callable, List, Optional
 from pathlib import Path
 
+# Cubo, lectura de datasets (``pyarrow.dataset``), índices, estadísticos, trazas y
+# modelo se importan dentro de cada cargador: importar este módulo solo cuesta
+# streamlit, pandas y ``pyarrow.parquet``, y no retrasa el primer render
+if TYPE_CHECKING:
+    from utils.churn_cube import ChurnCube
+    from utils.dataset_scan import ScanAggregate
+    from utils.model_registry import ModelRegistry
+    from utils.prediction_cache import PredictionCache
+    from utils.row_index import RowIndex
+    from utils.shared_table import SharedTable
+    from utils.sketches import ChurnSummaries
+    from utils.suff_stats import MomentStats
+
+# Datos por defecto de cada página (``utils.warmup`` los precarga con los mismos argumentos).
+# ``TELCO_DATA_PATH`` los sustituye, p. ej. por datos de ``utils.synthetic`` en las pruebas de carga
+DATA_PATH = os.environ.get("TELCO_DATA_PATH", "../clean_data/telco-customer.parquet")
+# Dataset particionado por contrato e internet (``utils.etl`` o ``utils.dataset_scan``), junto al
+# Parquet. Si existe, todas las páginas lo leen en lugar del Parquet (ver ``data_source``)
+PARTITIONED_PATH = os.path.splitext(DATA_PATH)[0]
+HOME_COLUMNS = ["tenure", "monthlycharges", "baja_binary"]
+# Solo las columnas que usa el panel (filtros, métricas y gráficos)
+DASHBOARD_COLUMNS = [
+    "contract", "internetservice", "paymentmethod", "paperlessbilling",
+    "seniorcitizen", "partner", "dependents", "gender",
+    "phoneservice", "multiplelines", "onlinesecurity", "onlinebackup",
+    "deviceprotection", "techsupport", "streamingtv", "streamingmovies",
+    "tenure", "monthlycharges", "baja_binary",
+]
+EDA_COLUMNS = [
+    "tenure", "monthlycharges", "totalcharges", "baja_binary",
+    "contract", "internetservice", "multiplelines", "seniorcitizen",
+]
+
+RANGE_COLUMNS = ["tenure", "monthlycharges"]
+
+# A partir de este tamaño los Parquet se leen con memory-map
+MMAP_MIN_BYTES = 64 * 1024 * 1024
+
+def cube_columns() -> List[str]:
+    """Columnas del cubo de agregados (dimensiones, sumas y ``baja_binary``)"""
+    from utils.churn_cube import DIMENSIONS, SUM_COLS
+    return DIMENSIONS + SUM_COLS + ["baja_binary"]
+
+def shared_columns() -> List[str]:
+    """Columnas de la tabla compartida (``load_frame``): las de todas las páginas e índices"""
+    return list(dict.fromkeys(HOME_COLUMNS + DASHBOARD_COLUMNS + EDA_COLUMNS + cube_columns()))
+
+def _resolve_path(relative_path: str) -> str:
+    base_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(base_path, relative_path)
+
+def _compact_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """Enteros al tipo más pequeño posible y texto de baja cardinalidad a category"""
+    for col in df.select_dtypes(include="integer").columns:
+        df[col] = pd.to_numeric(df[col], downcast="integer")
+    for col in df.select_dtypes(include="object").columns:
+        if df[col].nunique() <= max(len(df) // 2, 1):
+            df[col] = df[col].astype("category")
+    return df
+
 @st.cache_data
 def load_data(
     relative_path: str,
-    transform_func: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None
+    transform_func: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None,
+    columns: Optional[List[str]] = None,
+    version: Optional[str] = None,
+    filters: Optional[dict] = None
 ) -> pd.DataFrame:
     """
     Función genérica para cargar datasets (CSV, PKL, Parquet, JSON)
     con opción de transformación.
 
+    Parquet se lee con pyarrow (memory-map en ficheros grandes) y conserva
+    los tipos category/bool de ``data_cleaning.ipynb``. Una carpeta se lee
+    como dataset Parquet particionado (Hive, ver ``utils.dataset_scan``). En todos los
+    formatos tabulares los enteros se reducen al tipo más pequeño posible y
+    el texto de baja cardinalidad se guarda como category.
+
     Parameters
     ----------
     relative_path : str
         Ruta relativa desde la carpeta streamlit_app.
-        Ejemplo: "clean_data/telco-customer.csv"
+        Ejemplo: "clean_data/telco-customer.parquet"
 
     transform_func : Callable, optional
         Función que recibe el dataframe y devuelve el dataframe transformado.
 
+    columns : list of str, optional
+        Columnas a leer. Solo se leen del disco las columnas pedidas
+        (``baja_binary`` se deriva de ``baja``).
+
+    version : str, optional
+        Versión del fichero (ver ``dataset_version``). Solo forma parte de
+        la clave de caché: al cambiar el fichero se vuelve a leer.
+
+    filters : dict, optional
+        ``columna -> valor`` para Parquet y datasets particionados. Se
+        aplica al leer: descarta particiones y grupos de filas completos.
+
     Returns
     -------
     pd.DataFrame
     """
 
-    base_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    file_path = os.path.join(base_path, relative_path)
+    df = _read_frame(relative_path, columns, filters)
+
+    # Aplicar transformación si existe
+    if transform_func:
+        df = transform_func(df)
+
+    return df
+
+def _read_frame(relative_path: str, columns: Optional[List[str]] = None, filters: Optional[dict] = None) -> pd.DataFrame:
+    """Lectura de ``load_data`` sin caché ni transformación"""
+    from utils.dataset_scan import filter_expression, is_dataset_dir, open_dataset, read_columns
+    file_path = _resolve_path(relative_path)
 
     # Detectar extensión y usar método adecuado
     ext = os.path.splitext(file_path)[1].lower()
+    read_cols = read_columns(columns)
 
-    if ext == ".csv":
-        df = pd.read_csv(file_path)
-        # Asegurar que baja_binary existe
-        if 'baja_binary' not in df.columns and 'baja' in df.columns:
-            df['baja_binary'] = df['baja'].map({'Yes': 1, 'No': 0})
+    if is_dataset_dir(file_path):
+        dataset = open_dataset(file_path)
+        table = dataset.to_table(columns=read_cols, filter=filter_expression(dataset.schema, filters))
+        df = table.to_pandas()
+    elif ext == ".parquet":
+        table = pq.read_table(
+            file_path,
+            columns=read_cols,
+            filters=filter_expression(pq.read_schema(file_path), filters),
+            memory_map=os.path.getsize(file_path) >= MMAP_MIN_BYTES
+        )
+        df = table.to_pandas()
+    elif ext == ".csv":
+        df = pd.read_csv(file_path, usecols=read_cols)
+    elif ext == ".json":
+        df = pd.read_json(file_path)
+        if read_cols is not None:
+            df = df[read_cols]
     elif ext == ".pkl":
-        df = pd.read_pickle(file_path)
+        return pd.read_pickle(file_path)
     else:
         raise ValueError(f"Formato de archivo no soportado: {ext}")
 
-    # Aplicar transformación si existe
-    if transform_func:
-        df = transform_func(df)
+    # Asegurar que baja_binary existe
+    if 'baja_binary' not in df.columns and 'baja' in df.columns:
+        df['baja_binary'] = (df['baja'] == 'Yes').astype('int8')
 
+    df = _compact_dtypes(df)
+    if columns is not None:
+        df = df[columns]
     return df
 
+@st.cache_resource(max_entries=4)
+def load_shared_table(relative_path: str, version: str) -> "SharedTable":
+    """
+    Tabla de Arrow de solo lectura con ``shared_columns()``, una por proceso y versión.
+
+    Con ``TELCO_ARROW_DIR`` se mapea en memoria desde un fichero IPC de esa
+    carpeta, compartido por todos los procesos de la máquina.
+    """
+    from utils.shared_table import ARROW_DIR_ENV, SharedTable
+    return SharedTable.open(
+        _resolve_path(relative_path), version,
+        read_frame=lambda: _read_frame(relative_path, shared_columns()),
+        ipc_dir=os.environ.get(ARROW_DIR_ENV),
+    )
+
+def load_frame(relative_path: str, columns: Optional[List[str]] = None, version: Optional[str] = None) -> pd.DataFrame:
+    """
+    Columnas ``columns`` del dataset como DataFrame compartido de solo lectura.
+
+    A diferencia de ``load_data`` no se copian los datos en cada llamada:
+    cada sesión recibe una copia superficial de un DataFrame construido
+    sobre la tabla de Arrow de ``load_shared_table``. Se pueden añadir o
+    quitar columnas; los valores no se deben escribir en sitio
+    (``df.copy()`` si hace falta).
+    """
+    return load_shared_table(relative_path, version or dataset_version(relative_path)).frame(columns)
+
+def dataset_version(relative_path: str) -> str:
+    """Identificador barato de la versión de un fichero o carpeta (mtime y tamaño)"""
+    from utils.dataset_scan import path_version
+    return path_version(_resolve_path(relative_path))
+
+def is_partitioned(relative_path: str) -> bool:
+    """``True`` si la ruta es una carpeta de dataset particionado"""
+    from utils.dataset_scan import is_dataset_dir
+    return is_dataset_dir(_resolve_path(relative_path))
+
+def data_source() -> str:
+    """
+    Dataset que leen todas las páginas: el particionado si existe, si no el Parquet único.
+
+    Se decide en cada rerun (no al importar), así que el ETL puede crear la
+    carpeta con la app en marcha y todas las vistas cambian a la vez.
+    """
+    return PARTITIONED_PATH if is_partitioned(PARTITIONED_PATH) else DATA_PATH
+
+@st.cache_resource(max_entries=4)
+def load_churn_cube(relative_path: str, version: str) -> "ChurnCube":
+    """Cubo de agregados del dataset, reconstruido solo cuando cambia ``version``"""
+    from utils.churn_cube import ChurnCube
+    from utils.dataset_scan import iter_frames
+    if is_partitioned(relative_path):
+        # Dataset particionado: el cubo se acumula lote a lote
+        return ChurnCube.from_frames(iter_frames(_resolve_path(relative_path), cube_columns()), version)
+    df = load_frame(relative_path, columns=cube_columns(), version=version)
+    return ChurnCube.build(df, version)
+
+@st.cache_resource(max_entries=4)
+def load_row_index(relative_path: str, version: str) -> "RowIndex":
+    """Índice de filas (bitsets y órdenes) del dataset, reconstruido solo cuando cambia ``version``"""
+    from utils.churn_cube import DIMENSIONS
+    from utils.row_index import RowIndex
+    df = load_frame(relative_path, columns=DIMENSIONS + RANGE_COLUMNS, version=version)
+    return RowIndex.build(df, DIMENSIONS, RANGE_COLUMNS, version)
+
+@st.cache_resource(max_entries=4)
+def load_moment_stats(relative_path: str, version: str) -> "MomentStats":
+    """Estadísticos suficientes del dataset, leídos de disco si ya se calcularon para ``version``"""
+    from utils.suff_stats import load_or_compute
+    return load_or_compute(_resolve_path(relative_path), version)
+
+@st.cache_resource(max_entries=4)
+def load_churn_summaries(relative_path: str, version: str) -> "ChurnSummaries":
+    """Resúmenes con sketches de cuantiles por estado de baja, reconstruidos solo cuando cambia ``version``"""
+    from utils.sketches import build_summaries
+    return build_summaries(_resolve_path(relative_path))
+
+@st.cache_data(max_entries=256)
+def load_scan_aggregate(
+    relative_path: str,
+    version: str,
+    category_cols: tuple,
+    metric_cols: tuple,
+    hist_edges: Optional[dict] = None,
+    filters: Optional[dict] = None,
+    ranges: Optional[dict] = None
+) -> "ScanAggregate":
+    """
+    Agregados de las filas filtradas recorriendo el dataset por lotes.
+
+    Los filtros se aplican en la lectura (poda de particiones y de grupos de
+    filas por estadísticas); se guarda en caché por versión y estado de filtros.
+    """
+    from utils.dataset_scan import scan_aggregate
+    return scan_aggregate(
+        _resolve_path(relative_path), list(category_cols), list(metric_cols),
+        hist_edges, filters, ranges
+    )
+
+@st.cache_data
+def load_columns(relative_path: str) -> List[str]:
+    """Nombres de columnas de un dataset (incluida ``baja_binary``) sin leer los datos"""
+    from utils.dataset_scan import dataset_columns, is_dataset_dir
+    file_path = _resolve_path(relative_path)
+    if is_dataset_dir(file_path):
+        names = dataset_columns(file_path)
+    elif file_path.endswith(".parquet"):
+        names = pq.read_schema(file_path).names
+    else:
+        names = pd.read_csv(file_path, nrows=0).columns.tolist()
+    if "baja_binary" not in names and "baja" in names:
+        names.append("baja_binary")
+    return names
+
+@st.cache_resource
+def get_model_registry() -> "ModelRegistry":
+    """
+    Registro de modelos único por proceso.
+
+    ``st.cache_resource`` devuelve siempre la misma instancia (sin copiar ni
+    serializar), así que todas las sesiones comparten un único booster.
+    """
+    from utils.model_registry import ModelRegistry
+    return ModelRegistry()
+
+@st.cache_resource(max_entries=2)
+def load_batch_model(path: str, version: str):
+    """
+    Modelo para el scoring por lotes: el booster nativo de XGBoost de ``path``.
+
+    Con lotes de miles de filas el booster es unas dos veces más rápido que
+    el ensemble compilado que usa el formulario (el mismo criterio que
+    ``utils.scoring``). Se carga, e importa ``xgboost``, con el primer lote
+    de cada ``version`` del modelo.
+    """
+    from utils.scoring import load_model
+    return load_model(path)
+
+@st.cache_resource
+def get_prediction_cache() -> "PredictionCache":
+    """Caché de predicciones compartida por todas las sesiones (se vacía sola al cambiar el modelo)"""
+    from utils.prediction_cache import PredictionCache
+    from utils.tracing import TRACER
+    cache = PredictionCache()
+    TRACER.register_stats("prediction_cache", cache.stats)
+    return cache
+
+@st.cache_resource
+def load_encoder():
+    """Carga (una vez por proceso) el codificador de variables del modelo"""
+    from utils.encoder import FeatureEncoder
+    return FeatureEncoder.load()
+
 def cargar_logo():
     current_dir = Path(__file__).parent
     logo_path = current_dir.parent / "assets" / "logo.png"
@@ -0,0 +1,284 @@
+"""
+Registro de modelos compartido por todo el proceso.
+
+Carga el modelo una sola vez y lo comparte entre sesiones. El registro
+vigila el booster en formato nativo de XGBoost (JSON/UBJSON), que es lo que
+escribe ``notebooks/ML.ipynb``, pero predice con el ensemble compilado a
+NumPy (``.npz`` con el mismo nombre, ver ``utils.tree_model``): el ``.npz``
+guarda el hash del fichero nativo del que sale y, si no coincide (o no
+existe), se vuelve a compilar al cargar. Con un ``.npz`` al día no se
+importa ``xgboost`` en ningún momento. Si el fichero del modelo cambia
+(mtime y hash) se carga la nueva versión en segundo plano y se sustituye de
+forma atómica: las predicciones en curso siguen usando la versión anterior y
+nunca esperan a la recarga.
+
+Exportar el modelo entrenado al formato nativo y al compilado desde la
+carpeta ``app/``::
+
+    python -m utils.model_registry ../models/xgboost_model.pkl ../models/xgboost_model.ubj
+"""
+import argparse
+import hashlib
+import logging
+import os
+import threading
+import time
+import zipfile
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+import pandas as pd
+
+from .tree_model import TreeEnsemble, export_booster
+
+try:
+    import psutil
+except ImportError:  # pragma: no cover - psutil es opcional
+    psutil = None
+
+MODELS_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "models"
+)
+DEFAULT_NATIVE_MODEL_PATH = os.path.join(MODELS_DIR, "xgboost_model.ubj")
+# Se vigila el nativo; el compilado se elige (o se regenera) en cada carga
+DEFAULT_MODEL_PATH = DEFAULT_NATIVE_MODEL_PATH
+
+# Errores de un fichero a medio escribir o inválido (un .npz truncado no es un zip válido)
+LOAD_ERRORS = (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ModelVersion:
+    """Una versión cargada del modelo junto con sus métricas de carga"""
+    model: object = field(repr=False)  # XGBClassifier o TreeEnsemble
+    path: str
+    sha256: str
+    mtime: float
+    size_bytes: int
+    load_seconds: float
+    memory_bytes: Optional[int]
+    loaded_at: float
+
+    @property
+    def version(self):
+        return self.sha256[:12]
+
+
+def _file_hash(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def file_version(path):
+    """Versión corta (12 primeros caracteres del SHA-256) del fichero de un modelo, como ``ModelVersion.version``"""
+    return _file_hash(path)[:12]
+
+
+def _rss():
+    return psutil.Process().memory_info().rss if psutil else None
+
+
+def load_native(path):
+    """Carga un ``XGBClassifier`` desde un fichero nativo (.json / .ubj)"""
+    from xgboost import XGBClassifier  # solo este formato necesita xgboost
+
+    model = XGBClassifier()
+    model.load_model(path)
+    return model
+
+
+def load_model_file(path):
+    """Carga el modelo según la extensión: ``.npz`` compilado o nativo de XGBoost"""
+    if path.endswith(".npz"):
+        return TreeEnsemble.load(path)
+    return load_native(path)
+
+
+def compiled_path_for(path):
+    """Ruta del ensemble compilado de un modelo nativo (mismo nombre con extensión ``.npz``)"""
+    return os.path.splitext(path)[0] + ".npz"
+
+
+def load_compiled(path, sha256=None):
+    """
+    Modelo listo para predecir a partir del fichero nativo ``path``.
+
+    Usa el ``.npz`` de al lado si se compiló de este mismo fichero
+    (``sha256``); si no existe o está desfasado, compila el booster y lo
+    guarda. Si el booster no se puede compilar se devuelve el nativo.
+    """
+    if path.endswith(".npz"):
+        return TreeEnsemble.load(path)
+    sha256 = sha256 or _file_hash(path)
+    compiled_path = compiled_path_for(path)
+    if os.path.exists(compiled_path):
+        try:
+            compiled = TreeEnsemble.load(compiled_path)
+            if compiled.source_sha256 == sha256:
+                return compiled
+        except LOAD_ERRORS:
+            pass  # se regenera a partir del nativo
+
+    native = load_native(path)
+    try:
+        compiled = export_booster(native)
+    except ValueError:
+        return native
+    compiled.source_sha256 = sha256
+    try:
+        compiled.save(compiled_path)
+    except OSError:
+        logger.warning("No se pudo guardar el modelo compilado en %s", compiled_path, exc_info=True)
+    return compiled
+
+
+class ModelRegistry:
+    """
+    Mantiene la versión vigente del modelo y la recarga cuando cambia el fichero.
+
+    Parameters
+    ----------
+    path : str
+        Ruta del modelo en formato nativo (.json o .ubj) o compilado (.npz).
+    check_interval : float
+        Segundos mínimos entre dos comprobaciones del fichero.
+    background : bool
+        Si es True la recarga se hace en un hilo y ``get`` nunca espera.
+    compile : bool
+        Si es True un modelo nativo se sirve con su ensemble compilado
+        (``load_compiled``); con False se usa el booster de XGBoost.
+    """
+
+    def __init__(self, path=DEFAULT_MODEL_PATH, check_interval=2.0, background=True, compile=True):
+        self.path = path
+        self.check_interval = check_interval
+        self.background = background
+        self.compile = compile
+        self.history: List[ModelVersion] = []
+        self._reload_lock = threading.Lock()
+        self._last_check = 0.0
+        self._failed_mtime = None
+        self._current = self._load()
+
+    # ========================================
+    # CARGA
+    # ========================================
+    def _load(self, sha256=None):
+        stat = os.stat(self.path)
+        sha256 = sha256 or _file_hash(self.path)
+        rss_before = _rss()
+        start = time.perf_counter()
+        model = load_compiled(self.path, sha256) if self.compile else load_model_file(self.path)
+        load_seconds = time.perf_counter() - start
+        rss_after = _rss()
+
+        version = ModelVersion(
+            model=model,
+            path=self.path,
+            sha256=sha256,
+            mtime=stat.st_mtime,
+            size_bytes=stat.st_size,
+            load_seconds=load_seconds,
+            memory_bytes=max(rss_after - rss_before, 0) if rss_before is not None else None,
+            loaded_at=time.time(),
+        )
+        self.history.append(version)
+        return version
+
+    def _reload(self, mtime):
+        try:
+            current = self._current
+            sha256 = _file_hash(self.path)
+            if sha256 != current.sha256:
+                self._current = self._load(sha256)
+            else:
+                current.mtime = os.stat(self.path).st_mtime
+        except Exception:  # noqa: BLE001 - el hilo de recarga no debe morir
+            # Fichero a medio escribir o inválido: se mantiene la versión vigente
+            # y no se reintenta hasta que el fichero vuelva a cambiar
+            self._failed_mtime = mtime
+            logger.warning("No se pudo recargar el modelo %s; se mantiene la versión %s",
+                           self.path, self._current.version, exc_info=True)
+        finally:
+            self._reload_lock.release()
+
+    def _check(self):
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return
+        self._last_check = now
+
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            return
+        if mtime in (self._current.mtime, self._failed_mtime) or not self._reload_lock.acquire(blocking=False):
+            return
+
+        if self.background:
+            threading.Thread(target=self._reload, args=(mtime,), daemon=True).start()
+        else:
+            self._reload(mtime)
+
+    # ========================================
+    # API
+    # ========================================
+    def current(self) -> ModelVersion:
+        """Versión vigente (comprobando antes si el fichero ha cambiado)"""
+        self._check()
+        return self._current
+
+    def get(self):
+        """Modelo vigente, compartido por todas las sesiones"""
+        return self.current().model
+
+    def stats(self):
+        """Tabla con las versiones cargadas, tiempo de carga y memoria"""
+        return pd.DataFrame([
+            {
+                "version": v.version,
+                "path": os.path.basename(v.path),
+                "size_kb": v.size_bytes / 1024,
+                "load_ms": v.load_seconds * 1000,
+                "memory_mb": v.memory_bytes / 2**20 if v.memory_bytes is not None else None,
+                "loaded_at": pd.Timestamp(v.loaded_at, unit="s"),
+            }
+            for v in self.history
+        ])
+
+
+def export_native(source, dest):
+    """Convierte un modelo serializado con pickle/joblib al formato nativo de XGBoost"""
+    model = pd.read_pickle(source)
+    tmp = f"{dest}.tmp{os.path.splitext(dest)[1]}"
+    model.save_model(tmp)
+    # Sustitución atómica para que el registro nunca lea un fichero a medias
+    os.replace(tmp, dest)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exporta el modelo al formato nativo de XGBoost y al compilado")
+    parser.add_argument("source", nargs="?", default=os.path.join(MODELS_DIR, "xgboost_model.pkl"))
+    parser.add_argument("dest", nargs="?", default=DEFAULT_NATIVE_MODEL_PATH)
+    parser.add_argument("--compiled", default=None,
+                        help="Ruta del ensemble compilado a NumPy (por defecto junto al nativo, '' para no generarlo)")
+    args = parser.parse_args(argv)
+
+    export_native(args.source, args.dest)
+    print(f"Modelo exportado a {args.dest}")
+    compiled_path = compiled_path_for(args.dest) if args.compiled is None else args.compiled
+    if compiled_path:
+        # Con el hash del nativo el registro lo usa sin tener que recompilarlo
+        compiled = export_booster(pd.read_pickle(args.source))
+        compiled.source_sha256 = _file_hash(args.dest)
+        compiled.save(compiled_path)
+        print(f"Modelo compilado exportado a {compiled_path}")
+
+
+if __name__ == "__main__":
+    main()
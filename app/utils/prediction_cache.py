@@ -0,0 +1,127 @@
+"""
+Caché LRU de predicciones compartida por el Predictor, el scoring por lotes y el servicio.
+
+La clave es la fila ya codificada (``FeatureEncoder``, float32): dos
+entradas que el codificador normaliza al mismo vector comparten resultado.
+Cada caché guarda la versión del modelo con la que se calcularon sus
+entradas; al pedir una predicción con otra versión se vacía entera, así
+que nunca se devuelve una probabilidad de un modelo anterior.
+
+El tiempo ahorrado es una estimación: aciertos por el coste medio por fila
+de los fallos (codificación excluida, solo ``predict_proba``).
+"""
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+DEFAULT_MAX_ENTRIES = 50_000
+
+
+class PredictionCache:
+    """
+    Caché LRU acotada y segura entre hilos de ``fila codificada -> probabilidad``.
+
+    Parameters
+    ----------
+    max_entries : int
+        Entradas máximas; al superarlas se descartan las menos usadas.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.miss_seconds = 0.0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _keys(X):
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        return [row.tobytes() for row in X]
+
+    def _use_version(self, version):
+        # Llamar con el lock adquirido
+        if version != self.version:
+            if self.version is not None:
+                self.invalidations += 1
+            self._data.clear()
+            self.version = version
+
+    def lookup(self, X, version):
+        """
+        Busca las filas de ``X`` para la versión ``version`` del modelo.
+
+        Returns
+        -------
+        tuple
+            ``(probabilidades, aciertos)``: float32 con NaN en los fallos y
+            máscara booleana de aciertos.
+        """
+        keys = self._keys(X)
+        prob = np.full(len(keys), np.nan, dtype=np.float32)
+        hit = np.zeros(len(keys), dtype=bool)
+        with self._lock:
+            self._use_version(version)
+            for i, key in enumerate(keys):
+                value = self._data.get(key)
+                if value is not None:
+                    self._data.move_to_end(key)
+                    prob[i] = value
+                    hit[i] = True
+            n_hits = int(hit.sum())
+            self.hits += n_hits
+            self.misses += len(keys) - n_hits
+        return prob, hit
+
+    def store(self, X, prob, version, seconds=None):
+        """Guarda las probabilidades calculadas para ``X`` (``seconds``: lo que costó calcularlas)"""
+        keys = self._keys(X)
+        with self._lock:
+            if version != self.version:
+                # Resultado de una versión que ya no es la vigente de la caché
+                return
+            if seconds is not None:
+                self.miss_seconds += seconds
+            for key, value in zip(keys, np.asarray(prob, dtype=np.float32)):
+                self._data[key] = float(value)
+                self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def predict(self, X, model, version):
+        """Probabilidad de baja de cada fila de ``X``, calculando con ``model`` solo los fallos"""
+        prob, hit = self.lookup(X, version)
+        if not hit.all():
+            missing = ~hit
+            start = time.perf_counter()
+            prob[missing] = model.predict_proba(X[missing])[:, 1]
+            self.store(X[missing], prob[missing], version, time.perf_counter() - start)
+        return prob
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        """Entradas, aciertos, tasa de acierto y tiempo ahorrado estimado"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            per_row = self.miss_seconds / self.misses if self.misses else 0.0
+            return {
+                "entries": len(self._data),
+                "max_entries": self.max_entries,
+                "model_version": self.version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "saved_seconds": self.hits * per_row,
+                "invalidations": self.invalidations,
+            }
@@ -0,0 +1,142 @@
+"""
+Índices de filas para filtrar el Panel Ejecutivo sin copiar DataFrames.
+
+Se construyen una vez por versión del dataset:
+
+- columnas categóricas: un bitset empaquetado (1 bit por fila) por categoría;
+- columnas numéricas de rango: las posiciones de las filas ordenadas por
+  valor, de forma que un rango se localiza con dos búsquedas binarias.
+
+Un estado de filtros se resuelve con ANDs sobre los bitsets y devuelve una
+única máscara o un array de posiciones que los gráficos usan directamente.
+"""
+import numpy as np
+import pandas as pd
+
+# Un rango con menos de ``n_rows / SPARSE_RATIO`` filas dentro (o fuera) se
+# escribe bit a bit; por encima sale más barato pasar por una máscara completa
+SPARSE_RATIO = 128
+
+
+class RowIndex:
+    """
+    Bitsets por categoría y órdenes por valor para un DataFrame fijo.
+
+    Parameters
+    ----------
+    n_rows : int
+        Número de filas del DataFrame indexado.
+    bitmaps : dict
+        ``columna -> {valor: bitset empaquetado (np.uint8)}``.
+    sorted_index : dict
+        ``columna -> (valores ordenados, posiciones en ese orden)``.
+    version : str, optional
+        Versión del dataset del que se construyó el índice.
+    """
+
+    def __init__(self, n_rows, bitmaps, sorted_index, version=None):
+        self.n_rows = n_rows
+        self.bitmaps = bitmaps
+        self.sorted_index = sorted_index
+        self.version = version
+        self._empty = np.zeros((n_rows + 7) // 8, dtype=np.uint8)
+
+    @classmethod
+    def build(cls, df, categorical_cols, range_cols, version=None):
+        """Construye los bitsets de ``categorical_cols`` y los órdenes de ``range_cols``"""
+        bitmaps = {}
+        for col in categorical_cols:
+            values = pd.Categorical(df[col])
+            codes = values.codes
+            bitmaps[col] = {
+                cat: np.packbits(codes == k)
+                for k, cat in enumerate(values.categories.tolist())
+            }
+
+        sorted_index = {}
+        for col in range_cols:
+            values = df[col].to_numpy()
+            order = np.argsort(values, kind="stable").astype(np.int64 if len(df) > 2**31 - 1 else np.int32)
+            sorted_index[col] = (values[order], order)
+
+        return cls(len(df), bitmaps, sorted_index, version)
+
+    @property
+    def nbytes(self):
+        total = sum(b.nbytes for col in self.bitmaps.values() for b in col.values())
+        total += sum(v.nbytes + o.nbytes for v, o in self.sorted_index.values())
+        return total
+
+    # ========================================
+    # RESOLUCIÓN DE FILTROS
+    # ========================================
+    def _range_bits(self, col, low, high, inclusive="both"):
+        values, order = self.sorted_index[col]
+        lo = np.searchsorted(values, low, side="left" if inclusive in ("both", "left") else "right")
+        hi = np.searchsorted(values, high, side="right" if inclusive in ("both", "right") else "left")
+        sparse = self.n_rows // SPARSE_RATIO
+        if hi - lo <= sparse:
+            return self._scatter_bits(order[lo:hi])
+        if self.n_rows - (hi - lo) <= sparse:
+            # Casi todas las filas: se marcan las de fuera y se invierte
+            bits = np.invert(self._scatter_bits(np.concatenate([order[:lo], order[hi:]])))
+            if self.n_rows % 8:
+                bits[-1] &= np.uint8((0xFF << (8 - self.n_rows % 8)) & 0xFF)  # bits de relleno a 0
+            return bits
+        mask = np.zeros(self.n_rows, dtype=bool)
+        mask[order[lo:hi]] = True
+        return np.packbits(mask)
+
+    def _scatter_bits(self, positions):
+        """Bitset (como ``np.packbits``) con los bits de ``positions`` a 1, sin máscara intermedia"""
+        bits = self._empty.copy()
+        np.bitwise_or.at(bits, positions >> 3, np.uint8(0x80) >> (positions & 7).astype(np.uint8))
+        return bits
+
+    def resolve(self, filters=None, ranges=None):
+        """
+        Bitset empaquetado de las filas que cumplen todos los filtros.
+
+        Parameters
+        ----------
+        filters : dict, optional
+            ``columna -> valor`` (igualdad) sobre columnas categóricas.
+        ranges : dict, optional
+            ``columna -> (mínimo, máximo)`` o ``(mínimo, máximo, inclusive)``
+            con ``inclusive`` como en ``pd.Series.between``.
+
+        Returns
+        -------
+        np.ndarray or None
+            ``None`` si no hay ningún filtro (todas las filas).
+        """
+        bits = None
+        for col, value in (filters or {}).items():
+            b = self.bitmaps[col].get(value, self._empty)
+            bits = b.copy() if bits is None else np.bitwise_and(bits, b, out=bits)
+
+        for col, bounds in (ranges or {}).items():
+            values = self.sorted_index[col][0]
+            low, high = bounds[0], bounds[1]
+            inclusive = bounds[2] if len(bounds) > 2 else "both"
+            # Un rango que cubre todos los valores no filtra nada
+            if inclusive == "both" and low <= values[0] and high >= values[-1]:
+                continue
+            b = self._range_bits(col, low, high, inclusive)
+            bits = b if bits is None else np.bitwise_and(bits, b, out=bits)
+
+        return bits
+
+    def mask(self, filters=None, ranges=None):
+        """Máscara booleana (una posición por fila) de la selección"""
+        bits = self.resolve(filters, ranges)
+        if bits is None:
+            return np.ones(self.n_rows, dtype=bool)
+        return np.unpackbits(bits, count=self.n_rows).view(bool)
+
+    def positions(self, filters=None, ranges=None):
+        """Posiciones (ordenadas) de las filas seleccionadas, o ``None`` si son todas"""
+        bits = self.resolve(filters, ranges)
+        if bits is None:
+            return None
+        return np.flatnonzero(np.unpackbits(bits, count=self.n_rows))
@@ -0,0 +1,232 @@
+"""
+Motor de scoring por lotes para el modelo XGBoost de baja.
+
+Lee un CSV o Parquet con la forma de ``clean_data/telco-customer.*`` en
+bloques de tamaño fijo, codifica cada bloque de una sola vez con el
+``FeatureEncoder`` ajustado (``models/feature_encoder.json``) y escribe probabilidad y nivel de
+riesgo en Parquet, sin cargar nunca el fichero completo en memoria.
+
+Uso desde la carpeta ``app/``::
+
+    python -m utils.scoring ../clean_data/telco-customer.parquet ../scores.parquet
+    python -m utils.scoring clientes.csv scores.parquet --chunksize 500000 --workers 4
+    python -m utils.scoring clientes.csv scores.parquet --cache 100000
+"""
+import argparse
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .encoder import FeatureEncoder, DEFAULT_ENCODER_PATH
+from .model_registry import DEFAULT_NATIVE_MODEL_PATH, file_version, load_model_file
+from .prediction_cache import PredictionCache
+
+# Mismos cortes que usa el Predictor (> 0.3, > 0.5, > 0.7)
+RISK_THRESHOLDS = np.array([0.3, 0.5, 0.7])
+RISK_LEVELS = np.array(["bajo", "moderado", "alto", "crítico"])
+
+# Para lotes grandes el booster nativo rinde más que el ensemble compilado
+DEFAULT_MODEL_PATH = DEFAULT_NATIVE_MODEL_PATH
+DEFAULT_CHUNKSIZE = 100_000
+
+# ========================================
+# NIVELES DE RIESGO
+# ========================================
+def risk_level(prob):
+    """Devuelve el nivel de riesgo ('bajo', 'moderado', 'alto', 'crítico') de una o varias probabilidades"""
+    levels = RISK_LEVELS[np.searchsorted(RISK_THRESHOLDS, prob, side="left")]
+    return levels if np.ndim(prob) else str(levels)
+
+
+# ========================================
+# LECTURA POR BLOQUES
+# ========================================
+def iter_chunks(source, chunksize=DEFAULT_CHUNKSIZE, columns=None) -> Iterator[pd.DataFrame]:
+    """Itera un CSV o Parquet (ruta o fichero abierto) en bloques de ``chunksize`` filas"""
+    name = source if isinstance(source, (str, os.PathLike)) else getattr(source, "name", "")
+    ext = os.path.splitext(str(name))[1].lower()
+
+    if ext == ".parquet":
+        pf = pq.ParquetFile(source)
+        for batch in pf.iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+    elif ext == ".csv":
+        yield from pd.read_csv(source, chunksize=chunksize, usecols=columns)
+    else:
+        raise ValueError(f"Formato de archivo no soportado: {ext}")
+
+
+# ========================================
+# SCORING
+# ========================================
+def load_model(model_path=DEFAULT_MODEL_PATH):
+    if model_path.endswith(".pkl"):
+        return pd.read_pickle(model_path)
+    return load_model_file(model_path)
+
+
+def load_encoder(encoder_path=DEFAULT_ENCODER_PATH):
+    return FeatureEncoder.load(encoder_path)
+
+
+def score_frame(df, model, encoder=None, cache=None, model_version=None):
+    """
+    Puntúa un DataFrame de clientes.
+
+    Con ``cache`` (``PredictionCache``) solo se evalúan con el modelo las
+    filas que no estén ya en la caché para ``model_version``.
+
+    Returns
+    -------
+    pd.DataFrame
+        Columnas ``churn_probability`` y ``risk_level`` con el mismo índice que ``df``.
+
+    Raises
+    ------
+    ValueError
+        Si faltan columnas o alguna categoría no se vio al entrenar.
+    """
+    encoder = encoder or load_encoder()
+    X = encoder.transform(df)
+    if cache is not None:
+        prob = cache.predict(X, model, model_version)
+    else:
+        prob = model.predict_proba(X)[:, 1].astype(np.float32)
+
+    return pd.DataFrame({
+        "churn_probability": prob,
+        "risk_level": pd.Categorical(risk_level(prob), categories=RISK_LEVELS),
+    }, index=df.index)
+
+
+# Estado por proceso del pool: el modelo se carga una única vez por worker
+_worker_model = None
+_worker_encoder = None
+_worker_cache = None
+_worker_version = None
+
+
+def _init_worker(model_path, encoder_path, cache_entries=0):
+    global _worker_model, _worker_encoder, _worker_cache, _worker_version
+    _worker_model = load_model(model_path)
+    _worker_encoder = load_encoder(encoder_path)
+    if cache_entries:
+        _worker_cache = PredictionCache(cache_entries)
+        _worker_version = file_version(model_path)
+
+
+def _score_worker(df):
+    return score_frame(df, _worker_model, _worker_encoder, _worker_cache, _worker_version)
+
+
+def _to_table(scores, offset, ids=None):
+    out = {
+        "row": pa.array(np.arange(offset, offset + len(scores), dtype=np.int64)),
+        "churn_probability": pa.array(scores["churn_probability"].to_numpy()),
+        "risk_level": pa.array(scores["risk_level"]),
+    }
+    if ids is not None:
+        out = {"id": pa.array(ids.to_numpy()), **out}
+    return pa.table(out)
+
+
+def score_file(
+    source,
+    dest,
+    model_path=DEFAULT_MODEL_PATH,
+    encoder_path=DEFAULT_ENCODER_PATH,
+    chunksize=DEFAULT_CHUNKSIZE,
+    workers=0,
+    id_col: Optional[str] = None,
+    cache_entries=0,
+):
+    """
+    Puntúa ``source`` por bloques y escribe el resultado en ``dest`` (Parquet).
+
+    Con ``workers > 0`` los bloques se reparten en un pool de procesos. Como
+    mucho hay ``2 * workers`` bloques en vuelo, por lo que la memoria queda
+    acotada independientemente del tamaño del fichero. El orden de salida
+    coincide siempre con el de entrada. Con ``cache_entries > 0`` cada
+    proceso usa una ``PredictionCache`` de ese tamaño (útil con filas
+    repetidas).
+
+    Returns
+    -------
+    dict
+        Filas puntuadas, segundos y filas por segundo (y estadísticas de la
+        caché cuando se usa sin pool).
+    """
+    start = time.perf_counter()
+    writer = None
+    rows = 0
+
+    def write(scores, ids):
+        nonlocal writer, rows
+        table = _to_table(scores, rows, ids)
+        if writer is None:
+            writer = pq.ParquetWriter(dest, table.schema)
+        writer.write_table(table)
+        rows += len(scores)
+
+    chunks = iter_chunks(source, chunksize)
+
+    try:
+        if workers > 0:
+            pending = deque()
+            initargs = (model_path, encoder_path, cache_entries)
+            with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=initargs) as pool:
+                for chunk in chunks:
+                    ids = chunk[id_col] if id_col else None
+                    pending.append((pool.submit(_score_worker, chunk), ids))
+                    if len(pending) >= 2 * workers:
+                        future, ids = pending.popleft()
+                        write(future.result(), ids)
+                while pending:
+                    future, ids = pending.popleft()
+                    write(future.result(), ids)
+        else:
+            model = load_model(model_path)
+            encoder = load_encoder(encoder_path)
+            cache = PredictionCache(cache_entries) if cache_entries else None
+            version = file_version(model_path) if cache_entries else None
+            for chunk in chunks:
+                write(score_frame(chunk, model, encoder, cache, version), chunk[id_col] if id_col else None)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    elapsed = time.perf_counter() - start
+    stats = {"rows": rows, "seconds": elapsed, "rows_per_second": rows / elapsed if elapsed else 0.0}
+    if cache_entries and workers == 0:
+        stats["cache"] = cache.stats()
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scoring por lotes del modelo de baja")
+    parser.add_argument("source", help="CSV o Parquet con la forma de clean_data/telco-customer.*")
+    parser.add_argument("dest", help="Parquet de salida")
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH, help="Ruta del modelo")
+    parser.add_argument("--encoder", default=DEFAULT_ENCODER_PATH, help="Ruta del codificador de variables")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE, help="Filas por bloque")
+    parser.add_argument("--workers", type=int, default=0, help="Procesos del pool (0 = sin pool)")
+    parser.add_argument("--id-col", default=None, help="Columna identificadora a copiar en la salida")
+    parser.add_argument("--cache", type=int, default=0, help="Entradas de la caché de predicciones (0 = sin caché)")
+    args = parser.parse_args(argv)
+
+    stats = score_file(args.source, args.dest, args.model, args.encoder, args.chunksize, args.workers, args.id_col,
+                       args.cache)
+    print(f"{stats['rows']:,} filas en {stats['seconds']:.1f}s ({stats['rows_per_second']:,.0f} filas/s)")
+    if "cache" in stats:
+        print(f"Caché: {stats['cache']['hit_rate']:.1%} de aciertos, {stats['cache']['saved_seconds']:.2f}s ahorrados")
+
+
+if __name__ == "__main__":
+    main()
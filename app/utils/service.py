@@ -0,0 +1,386 @@
+"""
+Servicio HTTP de scoring de baja con micro-batching.
+
+Expone el modelo del Predictor fuera de Streamlit: mismo registro de
+modelos (``ModelRegistry``, con recarga automática) y mismo esquema de
+entrada (``FeatureEncoder``: los campos crudos del formulario, con los
+ausentes completados por defecto). Las peticiones concurrentes se agrupan
+durante una ventana corta (2 ms por defecto) en una sola llamada a
+``predict_proba``. La cola de peticiones es acotada: si se llena, el
+servicio responde 503 en lugar de acumular latencia. Las filas que ya
+están en la ``PredictionCache`` para la versión vigente se responden sin
+pasar por la cola.
+
+Endpoints:
+
+- ``POST /predict``: un cliente (objeto JSON) o ``{"instances": [...]}``.
+- ``GET /schema``: campos, categorías admitidas y valores por defecto.
+- ``GET /metrics``: throughput e histogramas de latencia y tamaño de lote.
+- ``GET /health``: estado y versión del modelo.
+
+Uso desde la carpeta ``app/``::
+
+    python -m utils.service --port 8080 --window-ms 2
+    curl -s localhost:8080/predict -d '{"tenure": 12, "monthlycharges": 70, "contract": "Month-to-month"}'
+"""
+import argparse
+import json
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from .encoder import BOOL_COLS, DEFAULT_ENCODER_PATH, NUMERIC_COLS
+from .model_registry import DEFAULT_MODEL_PATH, ModelRegistry
+from .prediction_cache import DEFAULT_MAX_ENTRIES, PredictionCache
+from .scoring import load_encoder, risk_level
+from .tracing import Histogram
+
+DEFAULT_PORT = 8080
+DEFAULT_WINDOW_MS = 2.0
+DEFAULT_MAX_BATCH = 256
+DEFAULT_MAX_QUEUE = 1024
+REQUEST_TIMEOUT = 5.0
+MAX_BODY_BYTES = 1 << 20
+THROUGHPUT_WINDOW = 10.0
+
+LATENCY_BUCKETS_MS = (0.5, 1, 2, 5, 10, 20, 50, 100, 250, 500, 1000)
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+
+
+class Overloaded(Exception):
+    """La cola de peticiones está llena"""
+
+
+# ========================================
+# MÉTRICAS
+# ========================================
+class ServiceMetrics:
+    """Contadores, throughput reciente e histogramas del servicio (seguros entre hilos)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self.requests = 0
+        self.rows = 0
+        self.rejected = 0
+        self.errors = 0
+        self.batches = 0
+        self.latency_ms = Histogram(LATENCY_BUCKETS_MS)
+        self.inference_ms = Histogram(LATENCY_BUCKETS_MS)
+        self.batch_rows = Histogram(BATCH_BUCKETS)
+        self._recent = deque()
+
+    def observe_request(self, rows, seconds):
+        now = time.monotonic()
+        with self._lock:
+            self.requests += 1
+            self.rows += rows
+            self.latency_ms.observe(seconds * 1000)
+            self._recent.append((now, rows))
+            while self._recent and now - self._recent[0][0] > THROUGHPUT_WINDOW:
+                self._recent.popleft()
+
+    def observe_batch(self, rows, seconds):
+        with self._lock:
+            self.batches += 1
+            self.batch_rows.observe(rows)
+            self.inference_ms.observe(seconds * 1000)
+
+    def observe_rejected(self):
+        with self._lock:
+            self.rejected += 1
+
+    def observe_error(self):
+        with self._lock:
+            self.errors += 1
+
+    def snapshot(self):
+        now = time.monotonic()
+        with self._lock:
+            recent = [(t, n) for t, n in self._recent if now - t <= THROUGHPUT_WINDOW]
+            uptime = time.time() - self.started_at
+            return {
+                "uptime_seconds": round(uptime, 1),
+                "requests": self.requests,
+                "rows": self.rows,
+                "rejected": self.rejected,
+                "errors": self.errors,
+                "batches": self.batches,
+                "mean_batch_rows": round(self.batch_rows.sum / self.batches, 2) if self.batches else None,
+                "requests_per_second": round(len(recent) / THROUGHPUT_WINDOW, 2),
+                "rows_per_second": round(sum(n for _, n in recent) / THROUGHPUT_WINDOW, 2),
+                "latency_ms": self.latency_ms.snapshot(),
+                "inference_ms": self.inference_ms.snapshot(),
+                "batch_rows": self.batch_rows.snapshot(),
+            }
+
+
+# ========================================
+# MICRO-BATCHING
+# ========================================
+class MicroBatcher:
+    """
+    Agrupa las filas de peticiones concurrentes en llamadas a ``predict_proba``.
+
+    Un único hilo toma la primera petición de la cola y sigue recogiendo
+    hasta que pasa ``window`` segundos o el lote llega a ``max_batch``
+    filas. Cada petición recibe su tramo de probabilidades por un
+    ``Future``.
+
+    Parameters
+    ----------
+    registry : ModelRegistry
+        Registro del modelo; cada lote usa la versión vigente.
+    window : float
+        Segundos máximos de espera desde la primera petición del lote.
+    max_batch : int
+        Filas máximas por lote.
+    max_queue : int
+        Peticiones máximas en espera; por encima ``submit`` lanza ``Overloaded``.
+    metrics : ServiceMetrics, optional
+    """
+
+    def __init__(self, registry, window=DEFAULT_WINDOW_MS / 1000, max_batch=DEFAULT_MAX_BATCH,
+                 max_queue=DEFAULT_MAX_QUEUE, metrics=None):
+        self.registry = registry
+        self.window = window
+        self.max_batch = max_batch
+        self.metrics = metrics or ServiceMetrics()
+        self._queue = queue.Queue(max_queue)
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    @property
+    def depth(self):
+        return self._queue.qsize()
+
+    def submit(self, X) -> Future:
+        """Encola las filas codificadas ``X`` de una petición"""
+        future = Future()
+        try:
+            self._queue.put_nowait((X, future))
+        except queue.Full:
+            raise Overloaded from None
+        return future
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        items, rows = [first], len(first[0])
+        deadline = time.perf_counter() + self.window
+        while rows < self.max_batch:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is None:
+                # Se atiende el lote en curso y se vuelve a encolar la señal de parada
+                self._queue.put(None)
+                break
+            items.append(item)
+            rows += len(item[0])
+        return items
+
+    def _run(self):
+        while True:
+            items = self._collect()
+            if items is None:
+                return
+            X = items[0][0] if len(items) == 1 else np.concatenate([x for x, _ in items])
+            version = self.registry.current()
+            start = time.perf_counter()
+            try:
+                prob = version.model.predict_proba(X)[:, 1]
+            except Exception as exc:  # el error se entrega a cada petición
+                for _, future in items:
+                    future.set_exception(exc)
+                continue
+            self.metrics.observe_batch(len(X), time.perf_counter() - start)
+
+            offset = 0
+            for x, future in items:
+                future.set_result((prob[offset:offset + len(x)], version.version))
+                offset += len(x)
+
+
+# ========================================
+# HTTP
+# ========================================
+class ScoringHandler(BaseHTTPRequestHandler):
+    server_version = "ChurnScoring/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send(self, status, body, headers=None):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        server = self.server
+        if self.path == "/health":
+            version = server.registry.current()
+            self._send(200, {"status": "ok", "model_version": version.version, "queue": server.batcher.depth})
+        elif self.path == "/metrics":
+            self._send(200, {**server.metrics.snapshot(), "queue": server.batcher.depth, "cache": server.cache.stats()})
+        elif self.path == "/schema":
+            encoder = server.encoder
+            self._send(200, {
+                "numeric": NUMERIC_COLS,
+                "derived": ["totalcharges", *BOOL_COLS],
+                "categories": encoder.categories,
+                "defaults": encoder.defaults,
+            })
+        else:
+            self._send(404, {"error": f"Ruta desconocida: {self.path}"})
+
+    def do_POST(self):
+        if self.path != "/predict":
+            self._send(404, {"error": f"Ruta desconocida: {self.path}"})
+            return
+        start = time.perf_counter()
+        server = self.server
+
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            self._send(413, {"error": f"Cuerpo mayor de {MAX_BODY_BYTES} bytes"})
+            return
+        try:
+            payload = json.loads(self.rfile.read(length) or b"null")
+            single = isinstance(payload, dict) and "instances" not in payload
+            if single:
+                records = [payload]
+            else:
+                records = payload["instances"] if isinstance(payload, dict) else payload
+            if not isinstance(records, list) or not records or not all(isinstance(r, dict) for r in records):
+                raise ValueError("Se espera un objeto JSON o {\"instances\": [objetos]}")
+            X = np.concatenate([server.encoder.transform_row(r) for r in records])
+        except KeyError as exc:
+            self._send(400, {"error": f"Falta el campo {exc.args[0]!r}"})
+            return
+        except (ValueError, TypeError) as exc:
+            self._send(400, {"error": str(exc)})
+            return
+
+        try:
+            prob, version = self._predict(X)
+        except Overloaded:
+            server.metrics.observe_rejected()
+            self._send(503, {"error": "Servicio saturado, reintenta más tarde"}, {"Retry-After": "1"})
+            return
+        except FutureTimeout:
+            server.metrics.observe_error()
+            self._send(504, {"error": "Tiempo de espera agotado"})
+            return
+        except Exception as exc:
+            server.metrics.observe_error()
+            self._send(500, {"error": str(exc)})
+            return
+
+        predictions = [
+            {"churn_probability": round(float(p), 6), "risk_level": risk_level(float(p))} for p in prob
+        ]
+        body = {**predictions[0], "model_version": version} if single else {
+            "predictions": predictions, "model_version": version
+        }
+        self._send(200, body)
+        server.metrics.observe_request(len(records), time.perf_counter() - start)
+
+
+    def _predict(self, X):
+        """Probabilidades de ``X``: aciertos de la caché y el resto por el micro-batcher"""
+        server = self.server
+        version = server.registry.current().version
+        prob, hit = server.cache.lookup(X, version)
+        if hit.all():
+            return prob, version
+
+        missing = ~hit
+        start = time.perf_counter()
+        computed, batch_version = server.batcher.submit(X[missing]).result(timeout=REQUEST_TIMEOUT)
+        if batch_version != version:
+            # El modelo cambió entre la consulta y el lote: se recalcula todo con la versión nueva
+            computed, batch_version = server.batcher.submit(X).result(timeout=REQUEST_TIMEOUT)
+            return computed, batch_version
+        server.cache.store(X[missing], computed, version, time.perf_counter() - start)
+        prob[missing] = computed
+        return prob, version
+
+
+class ScoringServer(ThreadingHTTPServer):
+    """Servidor HTTP con un hilo por conexión y un ``MicroBatcher`` compartido"""
+
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, address, registry, encoder, batcher, cache=None, verbose=False):
+        super().__init__(address, ScoringHandler)
+        self.registry = registry
+        self.encoder = encoder
+        self.batcher = batcher
+        self.cache = cache if cache is not None else PredictionCache(0)
+        self.metrics = batcher.metrics
+        self.verbose = verbose
+
+
+def create_server(host="127.0.0.1", port=DEFAULT_PORT, model_path=DEFAULT_MODEL_PATH,
+                  encoder_path=DEFAULT_ENCODER_PATH, window_ms=DEFAULT_WINDOW_MS, max_batch=DEFAULT_MAX_BATCH,
+                  max_queue=DEFAULT_MAX_QUEUE, cache_entries=DEFAULT_MAX_ENTRIES, verbose=False):
+    """Carga modelo y codificador una sola vez y devuelve el servidor con el micro-batcher arrancado"""
+    registry = ModelRegistry(model_path)
+    batcher = MicroBatcher(registry, window_ms / 1000, max_batch, max_queue).start()
+    cache = PredictionCache(cache_entries)
+    return ScoringServer((host, port), registry, load_encoder(encoder_path), batcher, cache, verbose)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servicio HTTP de scoring de baja con micro-batching")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH)
+    parser.add_argument("--encoder", default=DEFAULT_ENCODER_PATH)
+    parser.add_argument("--window-ms", type=float, default=DEFAULT_WINDOW_MS, help="Ventana de agrupación (0 = sin espera)")
+    parser.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH, help="Filas máximas por lote")
+    parser.add_argument("--max-queue", type=int, default=DEFAULT_MAX_QUEUE, help="Peticiones en espera antes de responder 503")
+    parser.add_argument("--cache", type=int, default=DEFAULT_MAX_ENTRIES, help="Entradas de la caché de predicciones (0 = sin caché)")
+    parser.add_argument("--verbose", action="store_true", help="Registra cada petición")
+    args = parser.parse_args(argv)
+
+    server = create_server(args.host, args.port, args.model, args.encoder, args.window_ms, args.max_batch,
+                           args.max_queue, args.cache, args.verbose)
+    print(f"Scoring en http://{args.host}:{args.port} (ventana {args.window_ms} ms, lotes de hasta {args.max_batch})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.batcher.stop()
+
+
+if __name__ == "__main__":
+    main()
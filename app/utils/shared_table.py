@@ -0,0 +1,165 @@
+"""
+Tabla de clientes compartida por todas las sesiones, en Arrow y de solo lectura.
+
+``st.cache_data`` serializa el DataFrame guardado y devuelve una copia nueva
+en cada llamada: cada sesión y cada rerun pagan la copia y la memoria. Aquí
+el dataset se lee una vez por proceso a una tabla de Arrow y las páginas
+reciben DataFrames de pandas construidos sobre sus buffers, sin copiar: las
+columnas numéricas y los códigos de las category son vistas de solo lectura
+de la tabla (los bool se convierten una vez, porque Arrow los guarda como
+bits). Cada conjunto de columnas se convierte una sola vez por proceso y
+cada llamada recibe una copia superficial: los datos son los mismos, pero
+añadir o quitar columnas en una sesión no afecta a las demás.
+
+Con ``TELCO_ARROW_DIR`` la tabla se guarda además como fichero IPC de Arrow
+(Feather v2, sin comprimir) en esa carpeta y se abre con memory-map: los
+procesos que sirven la app en la misma máquina comparten las páginas del
+fichero en lugar de tener cada uno su copia en memoria. El primer proceso
+escribe el fichero (escritura atómica) y el resto lo reutiliza mientras no
+cambie la versión del dataset.
+"""
+import os
+import threading
+import weakref
+from typing import Dict, Optional, Sequence
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+from .tracing import TRACER
+
+ARROW_DIR_ENV = "TELCO_ARROW_DIR"
+IPC_SUFFIX = ".arrow"
+
+# Tablas vivas del proceso (las que ``st.cache_resource`` descarta desaparecen solas)
+_TABLES = weakref.WeakSet()
+
+
+def ipc_path(file_path, version, ipc_dir):
+    """Fichero IPC de ``file_path`` para ``version`` dentro de ``ipc_dir``"""
+    stem = os.path.splitext(os.path.basename(os.path.normpath(file_path)))[0]
+    return os.path.join(ipc_dir, f"{stem}-{version}{IPC_SUFFIX}")
+
+
+def write_ipc(table, path):
+    """Escribe ``table`` como fichero IPC sin comprimir (legible con memory-map), de forma atómica"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with pa.OSFile(tmp_path, "wb") as sink, ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp_path, path)
+
+
+def read_ipc(path):
+    """Tabla con los buffers sobre el fichero mapeado en memoria (no se copia nada al heap)"""
+    return ipc.open_file(pa.memory_map(path, "r")).read_all()
+
+
+def _copied_bytes(df):
+    """Bytes de las columnas de ``df`` que no son vistas de la tabla (numpy es dueño de los datos)"""
+    total = 0
+    for col in df.columns:
+        s = df[col]
+        values = s.cat.codes.to_numpy() if isinstance(s.dtype, pd.CategoricalDtype) else s.to_numpy()
+        if values.flags.writeable:
+            total += values.nbytes
+    return total
+
+
+class SharedTable:
+    """
+    Tabla de Arrow de solo lectura y los DataFrames que se sirven de ella.
+
+    Parameters
+    ----------
+    table : pyarrow.Table
+        Columnas ya con los tipos finales (``pa.Table.from_pandas`` del
+        DataFrame compactado, así las category conservan sus categorías).
+    mapped_path : str, optional
+        Fichero IPC si la tabla está mapeada en memoria.
+    """
+
+    def __init__(self, table, mapped_path=None):
+        self.table = table
+        self.mapped_path = mapped_path
+        self._frames: Dict[tuple, pd.DataFrame] = {}
+        self._copied: Dict[tuple, int] = {}
+        self._lock = threading.Lock()
+        _TABLES.add(self)
+
+    @classmethod
+    def from_frame(cls, df):
+        """Tabla en el heap a partir de un DataFrame ya leído y compactado"""
+        return cls(pa.Table.from_pandas(df, preserve_index=False))
+
+    @classmethod
+    def open(cls, source, version, read_frame, ipc_dir=None):
+        """
+        Tabla de ``source`` para ``version``; ``read_frame()`` devuelve el DataFrame.
+
+        Con ``ipc_dir`` se lee del fichero IPC mapeado (escribiéndolo antes
+        con ``read_frame()`` si todavía no existe para esta versión).
+        """
+        if not ipc_dir:
+            return cls.from_frame(read_frame())
+        path = ipc_path(source, version, ipc_dir)
+        if not os.path.exists(path):
+            write_ipc(pa.Table.from_pandas(read_frame(), preserve_index=False), path)
+        return cls(read_ipc(path), mapped_path=path)
+
+    @property
+    def columns(self):
+        return self.table.column_names
+
+    def frame(self, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        DataFrame de ``columns`` (todas por defecto) sobre los buffers de la tabla.
+
+        Cada llamada devuelve una copia superficial (``copy(deep=False)``) del
+        DataFrame convertido una vez por proceso: se pueden añadir, quitar o
+        reasignar columnas sin que lo vean otras sesiones, pero los valores
+        no se deben escribir en sitio (son los buffers compartidos; las
+        columnas que son vistas de Arrow lanzan un error si se escriben).
+        """
+        key = tuple(self.columns if columns is None else columns)
+        df = self._frames.get(key)
+        if df is not None:
+            return df.copy(deep=False)
+        with self._lock:
+            if key not in self._frames:
+                missing = [c for c in key if c not in self.columns]
+                if missing:
+                    raise KeyError(f"Columnas que no están en la tabla compartida: {missing}")
+                # ``split_blocks``: una columna por bloque, sin consolidar (consolidar copiaría)
+                df = self.table.select(list(key)).to_pandas(split_blocks=True, self_destruct=False)
+                self._copied[key] = _copied_bytes(df)
+                self._frames[key] = df
+            return self._frames[key].copy(deep=False)
+
+    def stats(self):
+        """Filas, bytes de la tabla (en el heap o mapeados), DataFrames servidos y bytes copiados al crearlos"""
+        return {
+            "rows": self.table.num_rows,
+            "columns": self.table.num_columns,
+            "table_bytes": self.table.nbytes,
+            "mapped": self.mapped_path is not None,
+            "frames": len(self._frames),
+            "frame_copied_bytes": sum(self._copied.values()),
+        }
+
+
+def shared_stats():
+    """Totales de las tablas compartidas vivas del proceso (para ``TRACER``)"""
+    tables = [t.stats() for t in list(_TABLES)]
+    return {
+        "tables": len(tables),
+        "rows": sum(t["rows"] for t in tables),
+        "heap_bytes": sum(t["table_bytes"] for t in tables if not t["mapped"]),
+        "mapped_bytes": sum(t["table_bytes"] for t in tables if t["mapped"]),
+        "frames": sum(t["frames"] for t in tables),
+        "frame_copied_bytes": sum(t["frame_copied_bytes"] for t in tables),
+    }
+
+
+TRACER.register_stats("shared_table", shared_stats)
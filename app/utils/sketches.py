@@ -0,0 +1,219 @@
+"""
+Resúmenes de una pasada y combinables para las tablas ``describe()`` del EDA.
+
+Para cada columna numérica y estado de baja se guarda conteo, media y
+varianza (combinación de Chan), mínimo/máximo y un sketch de cuantiles
+tipo KLL. El sketch ocupa memoria constante (unos pocos ``k`` valores) y
+su error de rango es del orden de ``1/k``. Todos los resúmenes se pueden
+construir por particiones en paralelo y combinarse después.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from functools import reduce
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from .dataset_scan import parquet_files
+
+SKETCH_COLUMNS = ["tenure", "monthlycharges", "totalcharges"]
+DESCRIBE_INDEX = ["count", "mean", "std", "min", "25%", "50%", "75%", "max"]
+
+
+class KLLSketch:
+    """
+    Sketch de cuantiles KLL: niveles de compactadores con pesos ``2**h``.
+
+    Parameters
+    ----------
+    k : int
+        Capacidad del nivel superior; controla memoria y precisión.
+    seed : int, optional
+        Semilla para la elección de la mitad que sube de nivel (fija por
+        defecto para que las tablas no cambien entre ejecuciones).
+    """
+
+    def __init__(self, k=200, seed=0):
+        self.k = k
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, h):
+        depth = len(self.levels) - 1 - h
+        return max(2, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self):
+        h = 0
+        while h < len(self.levels):
+            level = self.levels[h]
+            if len(level) > self._capacity(h):
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                level = np.sort(level)
+                # Con un número impar de elementos, el último se queda en el nivel
+                odd = len(level) % 2
+                promoted = level[self._rng.integers(2):len(level) - odd:2]
+                self.levels[h] = level[len(level) - odd:]
+                self.levels[h + 1] = np.concatenate([self.levels[h + 1], promoted])
+            h += 1
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other):
+        merged = KLLSketch(self.k)
+        merged._rng = self._rng
+        depth = max(len(self.levels), len(other.levels))
+        merged.levels = [
+            np.concatenate([
+                self.levels[h] if h < len(self.levels) else np.empty(0),
+                other.levels[h] if h < len(other.levels) else np.empty(0),
+            ])
+            for h in range(depth)
+        ]
+        merged._compress()
+        return merged
+
+    @property
+    def size(self):
+        return sum(len(level) for level in self.levels)
+
+    def quantile(self, q):
+        """Cuantil(es) aproximado(s) con ``q`` en [0, 1]"""
+        items = np.concatenate(self.levels)
+        if not len(items):
+            return np.full(np.shape(q), np.nan) if np.ndim(q) else np.nan
+        weights = np.concatenate([np.full(len(level), 2.0 ** h) for h, level in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        items, cum = items[order], np.cumsum(weights[order])
+        idx = np.searchsorted(cum, np.asarray(q) * cum[-1], side="left")
+        return items[np.minimum(idx, len(items) - 1)]
+
+
+class ColumnSummary:
+    """Conteo, media, varianza, extremos y sketch de cuantiles de una columna"""
+
+    def __init__(self, k=200, seed=0):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self.sketch = KLLSketch(k, seed)
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if len(values):
+            other = ColumnSummary(self.sketch.k)
+            other.n = len(values)
+            other.mean = float(values.mean())
+            other.m2 = float(((values - other.mean) ** 2).sum())
+            other.min, other.max = float(values.min()), float(values.max())
+            self._merge_moments(other)
+            self.sketch.update(values)
+        return self
+
+    def _merge_moments(self, other):
+        n = self.n + other.n
+        if n == 0:
+            return
+        delta = other.mean - self.mean
+        self.mean += delta * other.n / n
+        self.m2 += other.m2 + delta ** 2 * self.n * other.n / n
+        self.n = n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def merge(self, other):
+        merged = ColumnSummary(self.sketch.k)
+        merged._merge_moments(self)
+        merged._merge_moments(other)
+        merged.sketch = self.sketch.merge(other.sketch)
+        return merged
+
+    def describe(self, name=None):
+        """Serie con el mismo índice que ``pd.Series.describe()``"""
+        q25, q50, q75 = self.sketch.quantile([0.25, 0.5, 0.75]) if self.n else (np.nan,) * 3
+        std = np.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else np.nan
+        values = [self.n, self.mean if self.n else np.nan, std,
+                  self.min if self.n else np.nan, q25, q50, q75, self.max if self.n else np.nan]
+        return pd.Series(values, index=DESCRIBE_INDEX, name=name, dtype=float)
+
+
+class ChurnSummaries:
+    """
+    Un ``ColumnSummary`` por columna y estado de baja.
+
+    Parameters
+    ----------
+    columns : list of str
+        Columnas numéricas resumidas.
+    k : int
+        Parámetro de los sketches KLL.
+    """
+
+    def __init__(self, columns=SKETCH_COLUMNS, k=200):
+        self.columns = list(columns)
+        self.k = k
+        self.summaries = {(col, cls): ColumnSummary(k) for col in self.columns for cls in (0, 1)}
+
+    def update(self, df, target="baja_binary"):
+        y = df[target].to_numpy()
+        for cls in (0, 1):
+            rows = y == cls
+            for col in self.columns:
+                self.summaries[(col, cls)].update(df[col].to_numpy()[rows])
+        return self
+
+    def merge(self, other):
+        merged = ChurnSummaries(self.columns, self.k)
+        merged.summaries = {key: s.merge(other.summaries[key]) for key, s in self.summaries.items()}
+        return merged
+
+    def describe(self, col, cls):
+        """Tabla ``describe()`` aproximada de ``col`` para los clientes con ``baja_binary == cls``"""
+        return self.summaries[(col, cls)].describe(col)
+
+
+# ========================================
+# CONSTRUCCIÓN POR PARTICIONES
+# ========================================
+def _summarize(task):
+    path, row_groups, columns, k = task
+    pf = pq.ParquetFile(path)
+    summaries = ChurnSummaries(columns, k)
+    for rg in row_groups:
+        df = pf.read_row_group(rg, columns=columns + ["baja"]).to_pandas()
+        df["baja_binary"] = (df["baja"] == "Yes").astype("int8")
+        summaries.update(df)
+    return summaries
+
+
+def build_summaries(paths, columns=SKETCH_COLUMNS, k=200, workers=0):
+    """
+    Resúmenes de uno o varios Parquet en una sola pasada.
+
+    Con ``workers > 0`` los grupos de filas se reparten entre procesos y
+    los resúmenes parciales se combinan al final.
+    """
+    tasks = []
+    for path in parquet_files(paths):
+        n_groups = pq.ParquetFile(path).num_row_groups
+        parts = max(workers, 1)
+        for i in range(parts):
+            groups = list(range(i, n_groups, parts))
+            if groups:
+                tasks.append((path, groups, list(columns), k))
+
+    if workers > 0:
+        with ProcessPoolExecutor(workers) as pool:
+            partial = list(pool.map(_summarize, tasks))
+    else:
+        partial = [_summarize(task) for task in tasks]
+
+    return reduce(ChurnSummaries.merge, partial, ChurnSummaries(columns, k))
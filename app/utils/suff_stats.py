@@ -0,0 +1,297 @@
+"""
+Estadísticos suficientes combinables para la pestaña de correlaciones del EDA.
+
+Por bloque se calculan, para cada estado de baja, el número de filas, las
+sumas, y la matriz de productos cruzados (cuya diagonal son las sumas de
+cuadrados) de las columnas numéricas. Los estados se combinan sumando, de
+modo que se pueden calcular por bloques, ficheros o procesos y unirse en
+cualquier orden. De ellos salen la matriz de correlación y las medias por
+estado de baja.
+
+El estado guardado de un dataset (``.cache/stats``) conserva el estado de
+cada fichero junto con su mtime y tamaño. Cuando cambia la versión del
+dataset (por ejemplo, el ETL añade ficheros a una carpeta particionada) se
+parte del estado de la versión anterior y solo se leen los ficheros nuevos o
+modificados.
+
+Calcular y guardar el estado de un dataset desde la carpeta ``app/`` (el
+mismo que lee la app)::
+
+    python -m utils.suff_stats ../clean_data/telco-customer.parquet
+    python -m utils.suff_stats ../clean_data/telco-customer --workers 4
+"""
+import argparse
+import glob
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import reduce
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from .dataset_scan import parquet_files, path_version
+
+STATS_COLUMNS = ["tenure", "monthlycharges", "totalcharges", "baja_binary"]
+CACHE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), ".cache", "stats"
+)
+
+
+class MomentStats:
+    """
+    Conteos, sumas y productos cruzados por estado de baja.
+
+    Parameters
+    ----------
+    columns : list of str
+        Columnas numéricas.
+    n : np.ndarray
+        Filas por estado de baja, forma ``(2,)``.
+    sums : np.ndarray
+        Sumas por estado, forma ``(2, k)``.
+    cross : np.ndarray
+        Productos cruzados ``sum(x_i * x_j)`` por estado, forma ``(2, k, k)``.
+    """
+
+    def __init__(self, columns, n=None, sums=None, cross=None):
+        k = len(columns)
+        self.columns = list(columns)
+        self.n = np.zeros(2, dtype=np.int64) if n is None else n
+        self.sums = np.zeros((2, k)) if sums is None else sums
+        self.cross = np.zeros((2, k, k)) if cross is None else cross
+
+    @classmethod
+    def from_frame(cls, df, columns=STATS_COLUMNS, target="baja_binary"):
+        """Estado de un bloque. Se ignoran las filas con algún valor ausente."""
+        X = df[columns].to_numpy(dtype=np.float64)
+        y = df[target].to_numpy()
+        complete = ~np.isnan(X).any(axis=1)
+        X, y = X[complete], y[complete]
+
+        state = cls(columns)
+        for cls_value in (0, 1):
+            Xc = X[y == cls_value]
+            state.n[cls_value] = len(Xc)
+            state.sums[cls_value] = Xc.sum(axis=0)
+            state.cross[cls_value] = Xc.T @ Xc
+        return state
+
+    def merge(self, other):
+        """Combina dos estados (operación asociativa y conmutativa)"""
+        if other.columns != self.columns:
+            raise ValueError("No se pueden combinar estados con columnas distintas")
+        return MomentStats(self.columns, self.n + other.n, self.sums + other.sums, self.cross + other.cross)
+
+    __add__ = merge
+
+    def update(self, df):
+        """Estado resultante de añadir nuevas filas"""
+        return self.merge(MomentStats.from_frame(df, self.columns))
+
+    # ========================================
+    # RESULTADOS
+    # ========================================
+    @property
+    def count(self):
+        return int(self.n.sum())
+
+    def mean(self):
+        return pd.Series(self.sums.sum(axis=0) / self.count, index=self.columns)
+
+    def cov(self):
+        n = self.count
+        s = self.sums.sum(axis=0)
+        c = self.cross.sum(axis=0)
+        return pd.DataFrame((c - np.outer(s, s) / n) / (n - 1), index=self.columns, columns=self.columns)
+
+    def corr(self):
+        """Matriz de correlación de Pearson (como ``DataFrame.corr()``)"""
+        cov = self.cov()
+        std = np.sqrt(np.diag(cov.to_numpy()))
+        return cov / np.outer(std, std)
+
+    def class_means(self, metric_col):
+        """Media de una columna por estado de baja, en el formato de ``create_avg_metric_bar``"""
+        j = self.columns.index(metric_col)
+        return pd.DataFrame({
+            "baja_binary": [0, 1],
+            metric_col: self.sums[:, j] / self.n,
+        })
+
+    # ========================================
+    # PERSISTENCIA
+    # ========================================
+    def save(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.tmp.npz"
+        np.savez(tmp, columns=np.array(self.columns), n=self.n, sums=self.sums, cross=self.cross)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data["columns"].tolist(), data["n"], data["sums"], data["cross"])
+
+
+# ========================================
+# CÁLCULO POR BLOQUES
+# ========================================
+def _read_stats(task):
+    path, row_groups, columns = task
+    pf = pq.ParquetFile(path)
+    read_cols = [c for c in columns if c != "baja_binary"] + ["baja"]
+    state = MomentStats(columns)
+    for rg in row_groups:
+        df = pf.read_row_group(rg, columns=read_cols).to_pandas()
+        df["baja_binary"] = (df["baja"] == "Yes").astype("int8")
+        state = state.merge(MomentStats.from_frame(df, columns))
+    return state
+
+
+def compute_states(files, columns=STATS_COLUMNS, workers=0):
+    """
+    Estado de cada fichero Parquet de ``files``, leyendo grupo de filas a grupo de filas.
+
+    Con ``workers > 0`` los grupos de filas se reparten entre procesos y los
+    estados parciales de cada fichero se combinan al final.
+    """
+    tasks = []
+    for path in files:
+        n_groups = pq.ParquetFile(path).num_row_groups
+        parts = max(workers, 1)
+        for i in range(parts):
+            groups = list(range(i, n_groups, parts))
+            if groups:
+                tasks.append((path, groups, list(columns)))
+
+    if workers > 0:
+        with ProcessPoolExecutor(workers) as pool:
+            partial = list(pool.map(_read_stats, tasks))
+    else:
+        partial = [_read_stats(task) for task in tasks]
+
+    states = {path: MomentStats(columns) for path in files}
+    for (path, _, _), state in zip(tasks, partial):
+        states[path] = states[path].merge(state)
+    return states
+
+
+def compute_file_stats(paths, columns=STATS_COLUMNS, workers=0):
+    """Estado de uno o varios Parquet (las carpetas se expanden a sus ficheros)"""
+    states = compute_states(parquet_files(paths), columns, workers)
+    return reduce(MomentStats.merge, states.values(), MomentStats(columns))
+
+
+# ========================================
+# ESTADO POR VERSIÓN DEL DATASET
+# ========================================
+def _fingerprint(path):
+    stat = os.stat(path)
+    return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+
+
+def _state_prefix(data_path):
+    # El hash de la ruta separa datasets con el mismo nombre (fichero y carpeta particionada)
+    name = os.path.splitext(os.path.basename(os.path.normpath(data_path)))[0]
+    digest = hashlib.sha1(os.path.abspath(data_path).encode()).hexdigest()[:8]
+    return os.path.join(CACHE_DIR, f"{name}-{digest}")
+
+
+def state_path(data_path, version):
+    return f"{_state_prefix(data_path)}-{version}.npz"
+
+
+def save_file_states(path, columns, states):
+    """Guarda ``{fichero: (huella, MomentStats)}`` de un dataset en un ``.npz`` (escritura atómica)"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    files = sorted(states)
+    parts = [states[f][1] for f in files]
+    k = len(columns)
+    tmp = f"{path}.{os.getpid()}.tmp.npz"
+    np.savez(
+        tmp,
+        columns=np.array(columns),
+        files=np.array(files, dtype=str),
+        fingerprints=np.array([states[f][0] for f in files], dtype=str),
+        n=np.array([s.n for s in parts], dtype=np.int64).reshape(-1, 2),
+        sums=np.array([s.sums for s in parts]).reshape(-1, 2, k),
+        cross=np.array([s.cross for s in parts]).reshape(-1, 2, k, k),
+    )
+    os.replace(tmp, path)
+
+
+def load_file_states(path, columns):
+    """``{fichero: (huella, MomentStats)}`` guardado en ``path``, o ``None`` si no sirve para ``columns``"""
+    try:
+        with np.load(path) as data:
+            if "files" not in data.files or data["columns"].tolist() != list(columns):
+                return None
+            return {
+                f: (fp, MomentStats(columns, n, sums, cross))
+                for f, fp, n, sums, cross in zip(
+                    data["files"].tolist(), data["fingerprints"].tolist(), data["n"], data["sums"], data["cross"]
+                )
+            }
+    except (OSError, ValueError, KeyError, EOFError):
+        return None
+
+
+def load_or_compute(data_path, version, columns=STATS_COLUMNS, workers=0):
+    """
+    Estado de esta versión del dataset: guardado, o calculado y guardado si no existe.
+
+    Sin estado para ``version`` se reutiliza, fichero a fichero, el de la
+    versión anterior guardada: solo se leen los ficheros nuevos o cuyo mtime o
+    tamaño ha cambiado, y los que ya no existen dejan de sumar.
+    """
+    columns = list(columns)
+    path = state_path(data_path, version)
+    cached = load_file_states(path, columns) if os.path.exists(path) else None
+
+    if cached is None:
+        previous = {}
+        older = sorted(glob.glob(f"{_state_prefix(data_path)}-*.npz"), key=os.path.getmtime)
+        if older:
+            previous = load_file_states(older[-1], columns) or {}
+
+        cached = {}
+        pending = []
+        for file in parquet_files(data_path):
+            key = os.path.relpath(file, data_path) if os.path.isdir(data_path) else os.path.basename(file)
+            fingerprint = _fingerprint(file)
+            if key in previous and previous[key][0] == fingerprint:
+                cached[key] = previous[key]
+            else:
+                pending.append((key, file, fingerprint))
+        computed = compute_states([file for _, file, _ in pending], columns, workers)
+        for key, file, fingerprint in pending:
+            cached[key] = (fingerprint, computed[file])
+
+        save_file_states(path, columns, cached)
+        # Las versiones anteriores ya no se necesitan
+        for old in older:
+            if old != path:
+                try:
+                    os.remove(old)
+                except OSError:
+                    pass  # otro proceso ya lo ha borrado
+
+    return reduce(MomentStats.merge, (state for _, state in cached.values()), MomentStats(columns))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Calcula y guarda los estadísticos suficientes de un dataset")
+    parser.add_argument("data", help="Parquet o carpeta del dataset")
+    parser.add_argument("--workers", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    version = path_version(args.data)
+    state = load_or_compute(args.data, version, workers=args.workers)
+    print(f"{state.count:,} filas -> {state_path(args.data, version)}")
+    print(state.corr().round(3))
+
+
+if __name__ == "__main__":
+    main()
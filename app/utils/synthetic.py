@@ -0,0 +1,349 @@
+"""
+Generador de datos sintéticos con el esquema de ``clean_data/telco-customer``.
+
+El dataset real tiene 7,043 clientes, así que los problemas de escala solo
+aparecían en producción. Este módulo ajusta al dataset limpio un modelo
+sencillo y lo muestrea a cualquier tamaño:
+
+- ``baja`` con la tasa real;
+- cada columna categórica (y ``tenure``) condicionada a ``baja`` y a sus
+  columnas de las que depende en los datos (``CHAIN``): los complementos de
+  internet a ``internetservice`` y al tramo de antigüedad, ``multiplelines``
+  a ``phoneservice``, la antigüedad al contrato, etc. Así se mantienen las
+  combinaciones válidas (``No internet service`` solo sin internet), las
+  tasas de baja por categoría y la relación entre antigüedad y servicios
+  (de la que dependen los cargos totales);
+- ``monthlycharges`` como regresión lineal sobre los servicios contratados
+  más el ruido residual, y ``totalcharges`` como ``tenure * monthlycharges``
+  por un factor remuestreado de los datos;
+- ``cliente_larga_duracion`` y ``phone_and_internet`` se derivan igual que
+  en ``data_cleaning.ipynb``.
+
+Los ficheros se escriben por bloques (la memoria no crece con el número de
+filas) y son reproducibles para una semilla dada.
+
+Generar los ficheros de benchmark desde la carpeta ``app/``::
+
+    python -m utils.synthetic --rows 100000 1000000 10000000 --formats parquet csv
+    python -m utils.synthetic --rows 100000 --check
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .dataset_scan import MAX_ROWS_PER_GROUP
+from .etl import CLEAN_COLUMNS
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_SOURCE_PATH = os.path.join(ROOT, "clean_data", "telco-customer.parquet")
+SYNTHETIC_DIR = os.path.join(ROOT, "clean_data", "synthetic")
+DEFAULT_BLOCK_ROWS = 1_000_000
+FORMATS = {"parquet": ".parquet", "csv": ".csv"}
+
+ADDON_COLS = ["onlinesecurity", "onlinebackup", "deviceprotection", "techsupport", "streamingtv", "streamingmovies"]
+
+# (columna, columnas de las que depende), en orden de muestreo
+CHAIN = [
+    ("baja", ()),
+    ("gender", ("baja",)),
+    ("seniorcitizen", ("baja",)),
+    ("partner", ("baja", "seniorcitizen")),
+    ("dependents", ("baja", "partner")),
+    ("contract", ("baja", "seniorcitizen")),
+    ("phoneservice", ("baja",)),
+    ("internetservice", ("baja", "contract", "phoneservice")),
+    ("tenure", ("baja", "contract", "internetservice")),
+    ("multiplelines", ("baja", "phoneservice", "tenure_band")),
+    *[(col, ("baja", "internetservice", "tenure_band")) for col in ADDON_COLS],
+    ("paperlessbilling", ("baja", "contract")),
+    ("paymentmethod", ("baja", "contract")),
+]
+
+# Tramos de antigüedad (``tenure_band``): los clientes antiguos contratan más servicios
+TENURE_BANDS = np.array([6, 12, 24, 36, 48, 60])
+
+# Servicios que explican el pago mensual
+PRICE_COLS = ["phoneservice", "multiplelines", "internetservice", *ADDON_COLS]
+
+
+def size_label(rows):
+    """``100000 -> '100k'``, ``1000000 -> '1M'``"""
+    for unit, label in ((1_000_000, "M"), (1_000, "k")):
+        if rows >= unit and rows % unit == 0:
+            return f"{rows // unit}{label}"
+    return str(rows)
+
+
+def fixture_path(rows, fmt="parquet", out_dir=SYNTHETIC_DIR):
+    return os.path.join(out_dir, f"telco-customer-{size_label(rows)}{FORMATS[fmt]}")
+
+
+# ========================================
+# MODELO
+# ========================================
+def _tenure_band(tenure):
+    return np.searchsorted(TENURE_BANDS, tenure, side="right")
+
+
+class _Conditional:
+    """
+    Distribución de una columna condicionada a otras (tabla de probabilidades acumuladas).
+
+    Cada combinación de valores de ``parents`` es una fila de ``cum``; las
+    combinaciones que no aparecen en los datos usan la distribución
+    condicionada solo a la primera columna (``baja``).
+    """
+
+    def __init__(self, values, parents, radices, cum):
+        self.values = values
+        self.parents = parents
+        self.radices = radices
+        self.cum = cum
+
+    @staticmethod
+    def key(codes, parents, radices):
+        key = np.zeros(len(codes[parents[0]]), dtype=np.int64)
+        for parent, radix in zip(parents, radices):
+            key = key * radix + codes[parent]
+        return key
+
+    @classmethod
+    def fit(cls, codes, values, col, parents):
+        radices = [len(values[p]) for p in parents]
+        k = len(values[col])
+        counts = np.zeros((int(np.prod(radices)), k))
+        key = cls.key(codes, parents, radices) if parents else np.zeros(len(codes[col]), dtype=np.int64)
+        np.add.at(counts, (key, codes[col]), 1)
+
+        empty = counts.sum(axis=1) == 0
+        if parents and empty.any():
+            first = np.zeros((radices[0], k))
+            np.add.at(first, (codes[parents[0]], codes[col]), 1)
+            counts[empty] = first[np.flatnonzero(empty) // int(np.prod(radices[1:]))]
+
+        cum = np.cumsum(counts / counts.sum(axis=1, keepdims=True), axis=1)
+        cum[:, -1] = 1.0
+        return cls(values[col], parents, radices, cum)
+
+    def sample(self, codes, n, rng):
+        """Códigos (posiciones en ``values``) de ``n`` filas dadas las de sus columnas padre"""
+        if not self.parents:
+            return np.searchsorted(self.cum[0], rng.random(n), side="right").astype(np.int16)
+        key = self.key(codes, self.parents, self.radices)
+        order = np.argsort(key, kind="stable")
+        bounds = np.searchsorted(key[order], np.arange(len(self.cum) + 1))
+        out = np.empty(n, dtype=np.int16)
+        for g in range(len(self.cum)):
+            rows = order[bounds[g]:bounds[g + 1]]
+            if len(rows):
+                out[rows] = np.searchsorted(self.cum[g], rng.random(len(rows)), side="right")
+        return out
+
+
+class SyntheticTelco:
+    """
+    Modelo generativo del dataset limpio (ver el docstring del módulo).
+
+    Se construye con ``SyntheticTelco.fit(df)`` y se muestrea con
+    ``sample`` (un bloque en memoria) o ``write`` (fichero por bloques).
+    """
+
+    def __init__(self, conditionals, dtypes, price_coef, price_sd, price_range, total_ratio):
+        self.conditionals = conditionals
+        self.dtypes = dtypes
+        self.price_coef = price_coef
+        self.price_sd = price_sd
+        self.price_range = price_range
+        self.total_ratio = total_ratio
+
+    @staticmethod
+    def _values(series):
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            return series.cat.categories.to_numpy()
+        return np.sort(series.dropna().unique())
+
+    @staticmethod
+    def _design(codes, values):
+        """One-hot de los servicios (sin la primera categoría de cada uno) más el término independiente"""
+        n = len(codes[PRICE_COLS[0]])
+        blocks = [np.ones((n, 1))]
+        for col in PRICE_COLS:
+            blocks.append(np.eye(len(values[col]))[codes[col]][:, 1:])
+        return np.hstack(blocks)
+
+    @classmethod
+    def fit(cls, df):
+        chain_cols = [col for col, _ in CHAIN]
+        values = {col: cls._values(df[col]) for col in chain_cols}
+        codes = {col: pd.Categorical(df[col], categories=values[col]).codes.astype(np.int64) for col in chain_cols}
+        codes["tenure_band"] = _tenure_band(df["tenure"].to_numpy())
+        values["tenure_band"] = np.arange(len(TENURE_BANDS) + 1)
+        conditionals = {col: _Conditional.fit(codes, values, col, parents) for col, parents in CHAIN}
+
+        X = cls._design(codes, values)
+        y = df["monthlycharges"].to_numpy(dtype=float)
+        coef, *_ = np.linalg.lstsq(X, y, rcond=None)
+        price_sd = float(np.std(y - X @ coef))
+
+        # Cargos totales / (antigüedad x pago mensual): ~1 con la dispersión de subidas y descuentos
+        paid = df["tenure"].to_numpy() * y
+        ratio = df["totalcharges"].to_numpy()[paid > 0] / paid[paid > 0]
+        dtypes = {col: df[col].dtype for col in CLEAN_COLUMNS}
+        return cls(conditionals, dtypes, coef, price_sd, (float(y.min()), float(y.max())), np.sort(ratio))
+
+    @classmethod
+    def from_file(cls, path=DEFAULT_SOURCE_PATH):
+        return cls.fit(pd.read_parquet(path, columns=CLEAN_COLUMNS))
+
+    # ========================================
+    # MUESTREO
+    # ========================================
+    def sample(self, n, rng=None):
+        """``n`` clientes sintéticos con las columnas y tipos de ``clean_data/telco-customer.parquet``"""
+        rng = rng if rng is not None else np.random.default_rng()
+        values = {col: cond.values for col, cond in self.conditionals.items()}
+        codes = {}
+        for col, _ in CHAIN:
+            codes[col] = self.conditionals[col].sample(codes, n, rng)
+            if col == "tenure":
+                codes["tenure_band"] = _tenure_band(values["tenure"][codes["tenure"]])
+
+        monthly = self._design(codes, values) @ self.price_coef + rng.normal(0.0, self.price_sd, n)
+        monthly = np.round(np.clip(monthly, *self.price_range), 2)
+        tenure = values["tenure"][codes["tenure"]].astype(np.int64)
+        ratio = self.total_ratio[rng.integers(0, len(self.total_ratio), n)]
+        total = np.round(tenure * monthly * ratio, 2)
+
+        data = {}
+        for col in CLEAN_COLUMNS:
+            if col in codes:
+                if isinstance(self.dtypes[col], pd.CategoricalDtype):
+                    data[col] = pd.Categorical.from_codes(codes[col], dtype=self.dtypes[col])
+                else:
+                    data[col] = values[col][codes[col]].astype(self.dtypes[col])
+        data["tenure"] = tenure
+        data["monthlycharges"] = monthly
+        data["totalcharges"] = total
+        data["cliente_larga_duracion"] = tenure >= 24
+        data["phone_and_internet"] = (data["phoneservice"] == "Yes") & (data["internetservice"] != "No")
+        return pd.DataFrame(data, columns=CLEAN_COLUMNS)
+
+    def iter_blocks(self, rows, seed=0, block_rows=DEFAULT_BLOCK_ROWS):
+        """Bloques de hasta ``block_rows`` filas; el resultado solo depende de ``seed`` y ``block_rows``"""
+        for i, start in enumerate(range(0, rows, block_rows)):
+            yield self.sample(min(block_rows, rows - start), np.random.default_rng([seed, i]))
+
+    def write(self, path, rows, seed=0, block_rows=DEFAULT_BLOCK_ROWS):
+        """
+        Escribe ``rows`` clientes en ``path`` (``.parquet`` o ``.csv``) bloque a bloque.
+
+        El Parquet usa grupos de filas de ``MAX_ROWS_PER_GROUP`` como los
+        datasets de ``utils.dataset_scan``; el CSV, el formato de
+        ``clean_data/telco-customer.csv``.
+        """
+        ext = os.path.splitext(path)[1].lower()
+        if ext not in FORMATS.values():
+            raise ValueError(f"Formato de archivo no soportado: {ext}")
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        # Escritura atómica: un benchmark nunca lee un fichero a medias
+        tmp = f"{path}.tmp{ext}"
+        if ext == ".parquet":
+            writer = None
+            try:
+                for df in self.iter_blocks(rows, seed, block_rows):
+                    table = pa.Table.from_pandas(df, preserve_index=False)
+                    writer = writer or pq.ParquetWriter(tmp, table.schema)
+                    writer.write_table(table, row_group_size=MAX_ROWS_PER_GROUP)
+            finally:
+                if writer is not None:
+                    writer.close()
+        else:
+            with open(tmp, "w", newline="") as f:
+                for i, df in enumerate(self.iter_blocks(rows, seed, block_rows)):
+                    df.to_csv(f, header=i == 0, index=False)
+        os.replace(tmp, path)
+        return path
+
+
+def ensure_fixture(rows, fmt="parquet", seed=0, out_dir=SYNTHETIC_DIR, source=DEFAULT_SOURCE_PATH, force=False):
+    """Ruta del fichero sintético de ``rows`` filas, generándolo si no existe"""
+    path = fixture_path(rows, fmt, out_dir)
+    if force or not os.path.exists(path):
+        SyntheticTelco.from_file(source).write(path, rows, seed)
+    return path
+
+
+# ========================================
+# FIDELIDAD
+# ========================================
+def compare(real, synthetic):
+    """
+    Diferencias entre el dataset real y el sintético, por columna.
+
+    Returns
+    -------
+    pd.DataFrame
+        Para cada columna categórica, la mayor diferencia absoluta (en puntos
+        porcentuales) de sus frecuencias dentro de cada estado de baja y de
+        la tasa de baja por categoría; para las numéricas, la media real y
+        sintética por estado de baja.
+    """
+    rows = []
+    for col in CLEAN_COLUMNS:
+        if col == "baja":
+            rate = [(df["baja"] == "Yes").mean() * 100 for df in (real, synthetic)]
+            rows.append({"columna": col, "dif_frecuencia_pp": abs(rate[0] - rate[1]), "dif_tasa_baja_pp": np.nan})
+        elif pd.api.types.is_numeric_dtype(real[col]) and not pd.api.types.is_bool_dtype(real[col]):
+            for state in ("No", "Yes"):
+                means = [df.loc[df["baja"] == state, col].mean() for df in (real, synthetic)]
+                rows.append({"columna": f"{col} (baja={state})", "media_real": means[0], "media_sintetica": means[1]})
+        else:
+            freq = [pd.crosstab(df[col].astype(str), df["baja"], normalize="columns") * 100 for df in (real, synthetic)]
+            churn = [df.groupby(df[col].astype(str), observed=True)["baja"].apply(lambda s: (s == "Yes").mean() * 100)
+                     for df in (real, synthetic)]
+            rows.append({
+                "columna": col,
+                "dif_frecuencia_pp": float((freq[0] - freq[1]).abs().max().max()),
+                "dif_tasa_baja_pp": float((churn[0] - churn[1]).abs().max()),
+            })
+    return pd.DataFrame(rows).set_index("columna")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera clientes sintéticos con el esquema del dataset limpio")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000, 10_000_000])
+    parser.add_argument("--formats", nargs="+", choices=list(FORMATS), default=["parquet"])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--source", default=DEFAULT_SOURCE_PATH, help="Dataset limpio del que se ajusta el modelo")
+    parser.add_argument("--out", default=SYNTHETIC_DIR, help="Carpeta de salida")
+    parser.add_argument("--force", action="store_true", help="Regenera los ficheros que ya existen")
+    parser.add_argument("--check", action="store_true", help="Compara el primer fichero con el dataset real")
+    args = parser.parse_args(argv)
+
+    model = SyntheticTelco.from_file(args.source)
+    for rows in args.rows:
+        for fmt in args.formats:
+            path = fixture_path(rows, fmt, args.out)
+            if os.path.exists(path) and not args.force:
+                print(f"{path} ya existe (--force para regenerarlo)")
+                continue
+            start = time.perf_counter()
+            model.write(path, rows, args.seed)
+            print(f"{rows:,} filas -> {path} ({os.path.getsize(path) / 2**20:.0f} MB, "
+                  f"{time.perf_counter() - start:.1f}s)")
+
+    if args.check:
+        real = pd.read_parquet(args.source, columns=CLEAN_COLUMNS)
+        synthetic = model.sample(args.rows[0], np.random.default_rng(args.seed))
+        with pd.option_context("display.float_format", "{:.2f}".format, "display.width", 120):
+            print(compare(real, synthetic).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,570 @@
+"""
+Trazas de cada rerun de las páginas: spans con nombre, métricas y exportación.
+
+Cada rerun de una página es un span raíz (``trace_page`` ... ``end_page``)
+etiquetado con la página, la sesión y, cuando la página lo indica
+(``set_tags``), el estado de filtros. Dentro, ``span(...)`` mide una sección
+(carga de datos, filtros, construcción de una figura, ``st.plotly_chart``) y
+guarda su duración, las filas que procesó (si se indican) y los bytes de los
+mensajes que Streamlit envió al navegador mientras estaba abierta. Fuera de
+un rerun (calentamiento, benchmarks, CLI) los spans no hacen nada.
+
+Los spans terminados van a un buffer circular por proceso (``TRACER``) y a
+histogramas por página y span. Exportación:
+
+- texto de Prometheus (``TRACER.prometheus()``); con ``TELCO_METRICS_FILE``
+  se reescribe ese fichero tras los reruns, para el textfile collector de
+  node_exporter. Las etiquetas son solo página y span: el estado de filtros
+  dispararía el número de series.
+- JSON lines, un span por línea con todas sus etiquetas (``TRACER.jsonl()``);
+  con ``TELCO_TRACE_FILE`` se añaden a ese fichero al terminar cada rerun.
+
+El panel de depuración de la barra lateral solo aparece con
+``TELCO_DEBUG=1`` en el entorno del servidor: muestra el buffer de todo el
+proceso (sesiones y filtros de otros usuarios), así que no se puede abrir
+desde la URL. ``TELCO_TRACING=0`` desactiva las trazas.
+"""
+import bisect
+import functools
+import inspect
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict, defaultdict, deque
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+TRACING_ENV = "TELCO_TRACING"
+DEBUG_ENV = "TELCO_DEBUG"
+TRACE_FILE_ENV = "TELCO_TRACE_FILE"
+METRICS_FILE_ENV = "TELCO_METRICS_FILE"
+
+DEFAULT_MAX_SPANS = 5000
+# Como mucho una reescritura del fichero de métricas cada tantos segundos
+METRICS_FILE_INTERVAL_SECONDS = 5.0
+SPAN_BUCKETS_MS = (0.5, 1, 2, 5, 10, 20, 50, 100, 250, 500, 1000, 2500, 5000)
+ROOT_SPAN = "rerun"
+# Una sesión cuenta como activa hasta esta cantidad de segundos después de su último rerun
+SESSION_TTL_SECONDS = 3600
+# Versión de Streamlit con la que se comprobó el recuento de bytes enviados (``_count_sent_bytes``)
+SENT_BYTES_STREAMLIT = (1, 54)
+
+logger = logging.getLogger(__name__)
+
+
+# ========================================
+# MÉTRICAS
+# ========================================
+class Histogram:
+    """Histograma de cubetas fijas (límites superiores inclusivos, como Prometheus)"""
+
+    def __init__(self, bounds):
+        self.bounds = list(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """Límite superior de la cubeta que contiene el cuantil ``q`` (``inf`` si es la última)"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        cum = 0
+        for bound, n in zip(self.bounds + [float("inf")], self.counts):
+            cum += n
+            if cum >= rank:
+                return bound
+        return float("inf")
+
+    def snapshot(self):
+        labels = [f"le_{b:g}" for b in self.bounds] + ["le_inf"]
+        return {
+            "buckets": dict(zip(labels, self.counts)),
+            "count": self.count,
+            "sum": round(self.sum, 3),
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+    def prometheus(self, name, labels):
+        """Líneas ``_bucket`` (acumuladas), ``_sum`` y ``_count`` en formato de texto de Prometheus"""
+        lines, cum = [], 0
+        for bound, n in zip([f"{b:g}" for b in self.bounds] + ["+Inf"], self.counts):
+            cum += n
+            lines.append(f"{name}_bucket{_labels(labels, le=bound)} {cum}")
+        lines.append(f"{name}_sum{_labels(labels)} {self.sum:.3f}")
+        lines.append(f"{name}_count{_labels(labels)} {self.count}")
+        return lines
+
+
+def estimate_bytes(obj):
+    """Tamaño aproximado de ``obj``: DataFrames y arrays por sus datos, contenedores recorriendo sus elementos"""
+    if hasattr(obj, "memory_usage") and hasattr(obj, "columns"):
+        return int(obj.memory_usage(deep=True).sum())
+    if hasattr(obj, "nbytes"):
+        return int(obj.nbytes)
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(estimate_bytes(k) + estimate_bytes(v) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set)):
+        return sys.getsizeof(obj) + sum(estimate_bytes(v) for v in obj)
+    return sys.getsizeof(obj)
+
+
+def _labels(labels, **extra):
+    items = {**labels, **extra}
+    if not items:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in items.values())
+    return "{" + ",".join(f'{k}="{v}"' for k, v in zip(items, escaped)) + "}"
+
+
+# ========================================
+# SPANS
+# ========================================
+class Span:
+    """Una sección medida de un rerun; ``rows`` y ``tags`` se pueden rellenar dentro del ``with``"""
+
+    __slots__ = ("name", "parent", "tags", "started_at", "seconds", "rows", "bytes", "status", "_start")
+
+    def __init__(self, name, parent=None, tags=None):
+        self.name = name
+        self.parent = parent
+        self.tags = dict(tags or {})
+        self.started_at = time.time()
+        self.seconds = None
+        self.rows = None
+        self.bytes = 0
+        self.status = "ok"
+        self._start = time.perf_counter()
+
+    def finish(self, status=None):
+        self.seconds = time.perf_counter() - self._start
+        if status is not None:
+            self.status = status
+
+
+class _NullSpan:
+    """Span de las llamadas fuera de un rerun o con las trazas desactivadas: acepta y descarta todo"""
+
+    __slots__ = ()
+    name = None
+    tags = {}
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Rerun:
+    """Spans de un rerun de una sesión; se registran juntos al terminar, con las etiquetas finales"""
+
+    def __init__(self, page, session, number, tags=None):
+        self.page = page
+        self.session = session
+        self.number = number
+        self.tags = dict(tags or {})
+        self.root = Span(ROOT_SPAN)
+        self.stack = [self.root]
+        self.spans: List[Span] = []
+
+    def records(self):
+        """Un diccionario por span (el raíz el último), con las etiquetas del rerun y las propias"""
+        return [
+            {
+                "ts": round(s.started_at, 6),
+                "page": self.page,
+                "session": self.session,
+                "rerun": self.number,
+                "span": s.name,
+                "parent": s.parent,
+                "ms": round(s.seconds * 1000, 3),
+                "rows": s.rows,
+                "bytes": s.bytes,
+                "status": s.status,
+                "tags": {**self.tags, **s.tags},
+            }
+            for s in self.spans + [self.root]
+        ]
+
+
+class Tracer:
+    """
+    Registro de spans del proceso, compartido por todas las sesiones.
+
+    Parameters
+    ----------
+    max_spans : int
+        Tamaño del buffer circular de spans (los más antiguos se descartan).
+    enabled : bool
+    """
+
+    def __init__(self, max_spans=DEFAULT_MAX_SPANS, enabled=True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._spans = deque(maxlen=max_spans)
+        self._reruns = defaultdict(int)
+        self._duration_ms: Dict[tuple, Histogram] = {}
+        self._rows = defaultdict(int)
+        self._bytes = defaultdict(int)
+        self._stats_sources: Dict[str, Callable[[], dict]] = {}
+        self._sessions = OrderedDict()
+        self._metrics_written_at = 0.0
+
+    def record(self, rerun):
+        """Guarda los spans de un rerun terminado y actualiza las métricas; devuelve sus registros"""
+        records = rerun.records()
+        with self._lock:
+            self._spans.extend(records)
+            self._reruns[(rerun.page, rerun.root.status)] += 1
+            for r in records:
+                key = (r["page"], r["span"])
+                hist = self._duration_ms.get(key)
+                if hist is None:
+                    hist = self._duration_ms[key] = Histogram(SPAN_BUCKETS_MS)
+                hist.observe(r["ms"])
+                self._rows[key] += r["rows"] or 0
+                self._bytes[key] += r["bytes"]
+        return records
+
+    def observe_session(self, session, nbytes):
+        """Memoria propia de ``session`` en su último rerun; olvida las sesiones inactivas"""
+        now = time.monotonic()
+        with self._lock:
+            self._sessions[session] = (nbytes, now)
+            self._sessions.move_to_end(session)
+            while self._sessions and now - next(iter(self._sessions.values()))[1] > SESSION_TTL_SECONDS:
+                self._sessions.popitem(last=False)
+
+    def session_stats(self):
+        """Sesiones activas y bytes de su estado (total, medio y máximo)"""
+        with self._lock:
+            sizes = [nbytes for nbytes, _ in self._sessions.values()]
+        return {
+            "active": len(sizes),
+            "bytes_total": sum(sizes),
+            "bytes_mean": sum(sizes) / len(sizes) if sizes else 0.0,
+            "bytes_max": max(sizes, default=0),
+        }
+
+    def register_stats(self, name, stats):
+        """Añade a las métricas los valores numéricos de ``stats()`` (p. ej. ``FIGURE_CACHE.stats``)"""
+        self._stats_sources[name] = stats
+
+    def stats(self):
+        """Resultado actual de cada fuente registrada con ``register_stats``"""
+        return {name: stats() for name, stats in self._stats_sources.items()}
+
+    def spans(self, page=None, session=None, last=None):
+        """Registros del buffer, del más antiguo al más reciente, opcionalmente filtrados"""
+        with self._lock:
+            records = list(self._spans)
+        records = [r for r in records if (page is None or r["page"] == page)
+                   and (session is None or r["session"] == session)]
+        return records[-last:] if last else records
+
+    def summary(self, page=None):
+        """Por span: número, media, p50, p95 y máximo en ms, filas y bytes (de los spans del buffer)"""
+        groups = defaultdict(list)
+        for r in self.spans(page=page):
+            groups[(r["page"], r["span"])].append(r)
+        rows = []
+        for (page_name, span_name), records in groups.items():
+            ms = sorted(r["ms"] for r in records)
+            rows.append({
+                "page": page_name,
+                "span": span_name,
+                "n": len(ms),
+                "mean_ms": sum(ms) / len(ms),
+                "p50_ms": ms[int(0.5 * (len(ms) - 1))],
+                "p95_ms": ms[int(0.95 * (len(ms) - 1))],
+                "max_ms": ms[-1],
+                "rows": sum(r["rows"] or 0 for r in records),
+                "bytes": sum(r["bytes"] for r in records),
+            })
+        return sorted(rows, key=lambda r: (r["page"], -r["mean_ms"]))
+
+    def jsonl(self, records=None):
+        """Spans en JSON lines (por defecto, todo el buffer)"""
+        records = self.spans() if records is None else records
+        return "".join(json.dumps(r, ensure_ascii=False, default=str) + "\n" for r in records)
+
+    def prometheus(self):
+        """Métricas acumuladas del proceso en formato de texto de Prometheus"""
+        lines = [
+            "# HELP telco_reruns_total Reruns de cada página por estado",
+            "# TYPE telco_reruns_total counter",
+        ]
+        with self._lock:
+            lines += [f"telco_reruns_total{_labels({'page': p, 'status': s})} {n}"
+                      for (p, s), n in sorted(self._reruns.items())]
+            lines += [
+                "# HELP telco_span_duration_ms Duración de cada span por página (ms)",
+                "# TYPE telco_span_duration_ms histogram",
+            ]
+            for (page, name), hist in sorted(self._duration_ms.items()):
+                lines += hist.prometheus("telco_span_duration_ms", {"page": page, "span": name})
+            rows, sent = dict(self._rows), dict(self._bytes)
+
+        for metric, values, help_text in (
+            ("telco_span_rows_total", rows, "Filas procesadas en cada span"),
+            ("telco_span_sent_bytes_total", sent, "Bytes enviados al navegador dentro de cada span"),
+        ):
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+            lines += [f"{metric}{_labels({'page': p, 'span': s})} {n}" for (p, s), n in sorted(values.items())]
+
+        for source, stats in {"sessions": self.session_stats(), **self.stats()}.items():
+            for key, value in stats.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    metric = f"telco_{source}_{key}"
+                    lines += [f"# TYPE {metric} gauge", f"{metric} {value}"]
+        return "\n".join(lines) + "\n"
+
+    def export(self, records):
+        """Añade ``records`` a ``TELCO_TRACE_FILE`` y reescribe ``TELCO_METRICS_FILE`` (si están definidas)"""
+        trace_file = os.environ.get(TRACE_FILE_ENV)
+        if trace_file:
+            with self._lock, open(trace_file, "a", encoding="utf-8") as f:
+                f.write(self.jsonl(records))
+
+        metrics_file = os.environ.get(METRICS_FILE_ENV)
+        now = time.monotonic()
+        if metrics_file and now - self._metrics_written_at >= METRICS_FILE_INTERVAL_SECONDS:
+            self._metrics_written_at = now
+            # Escritura atómica: el collector nunca lee un fichero a medias
+            tmp_path = f"{metrics_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(self.prometheus())
+            os.replace(tmp_path, metrics_file)
+
+
+# Registro único por proceso, compartido por todas las sesiones
+TRACER = Tracer(enabled=os.environ.get(TRACING_ENV, "1") != "0")
+
+# Rerun en curso del hilo del script (cada sesión ejecuta su script en su propio hilo)
+_local = threading.local()
+
+
+def _current() -> Optional[Rerun]:
+    return getattr(_local, "rerun", None)
+
+
+@functools.lru_cache(maxsize=None)
+def _streamlit_version():
+    import streamlit
+    return tuple(int(part) for part in streamlit.__version__.split(".")[:2] if part.isdigit())
+
+
+@functools.lru_cache(maxsize=None)
+def _log_hook_once(level, message, *args):
+    logger.log(level, message, *args)
+
+
+def _count_sent_bytes(ctx):
+    """
+    Envuelve ``ctx.enqueue`` para sumar el tamaño de cada ``ForwardMsg`` a los spans abiertos.
+
+    ``ScriptRunContext.enqueue`` es el método público por el que pasan todos
+    los mensajes de la sesión (elementos, ``st.spinner``, diálogos). Si la
+    versión instalada de Streamlit no lo tiene, los spans quedan con 0 bytes
+    y se avisa una vez en el log; con una versión distinta de
+    ``SENT_BYTES_STREAMLIT`` se deja constancia por si cambia el recorrido.
+    """
+    if getattr(ctx, "_telco_traced", False):
+        return
+    version = ".".join(map(str, _streamlit_version()))
+    enqueue = getattr(ctx, "enqueue", None)
+    if not callable(enqueue):
+        _log_hook_once(logging.WARNING, "ScriptRunContext.enqueue no existe en streamlit %s: "
+                       "las trazas no cuentan los bytes enviados", version)
+        return
+    if _streamlit_version() != SENT_BYTES_STREAMLIT:
+        _log_hook_once(logging.INFO, "Recuento de bytes enviados comprobado con streamlit %s; instalado %s",
+                       ".".join(map(str, SENT_BYTES_STREAMLIT)), version)
+
+    def counting_enqueue(msg):
+        enqueue(msg)
+        # Tamaño tras ``enqueue``, que completa los metadatos y el hash del mensaje
+        rerun = _current()
+        if rerun is not None:
+            size = msg.ByteSize()
+            for s in rerun.stack:
+                s.bytes += size
+
+    ctx.enqueue = counting_enqueue
+    ctx._telco_traced = True
+
+
+# ========================================
+# API DE LAS PÁGINAS
+# ========================================
+def trace_page(page, **tags):
+    """
+    Abre el span raíz del rerun de ``page`` en el hilo actual.
+
+    Se llama al principio de la página; si el rerun anterior del hilo no
+    llegó a ``end_page`` (``st.stop()``, una excepción), se registra ahora
+    como ``interrumpido``.
+    """
+    if not TRACER.enabled:
+        return
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    previous = _current()
+    if previous is not None:
+        _finish(previous, "interrumpido")
+
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return
+    _count_sent_bytes(ctx)
+    _local.session_state = ctx.session_state
+    # El contexto dura lo que la sesión: cuenta sus reruns sin un registro global que crezca
+    ctx._telco_reruns = getattr(ctx, "_telco_reruns", 0) + 1
+    _local.rerun = Rerun(page, ctx.session_id[:8], ctx._telco_reruns, tags)
+
+
+def set_tags(**tags):
+    """Etiquetas del rerun en curso (p. ej. el estado de filtros); se aplican a todos sus spans"""
+    rerun = _current()
+    if rerun is not None:
+        rerun.tags.update(tags)
+
+
+@contextmanager
+def span(name, **tags):
+    """
+    Mide el bloque como un span hijo del span abierto más interno.
+
+    El objeto devuelto admite ``rows`` (filas procesadas) y más ``tags``.
+    Fuera de un rerun no mide nada.
+    """
+    rerun = _current()
+    if rerun is None:
+        yield _NULL_SPAN
+        return
+    current = Span(name, parent=rerun.stack[-1].name, tags=tags)
+    rerun.stack.append(current)
+    try:
+        yield current
+    except BaseException as exc:
+        # Streamlit detiene el script con excepciones (``st.stop``, reruns): no son errores
+        current.status = "error" if isinstance(exc, Exception) else "detenido"
+        raise
+    finally:
+        current.finish()
+        rerun.stack.remove(current)
+        rerun.spans.append(current)
+
+
+def traced(name=None, tags=()):
+    """
+    Decorador: cada llamada dentro de un rerun es un span ``name`` (por
+    defecto, el nombre de la función) con los argumentos ``tags`` como
+    etiquetas. Si el resultado tiene ``shape``, su primera dimensión son las filas.
+    """
+    def decorator(func):
+        span_name = name or func.__name__
+        positions = {p: i for i, p in enumerate(inspect.signature(func).parameters) if p in tags}
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current() is None:
+                return func(*args, **kwargs)
+            labels = {t: kwargs[t] if t in kwargs else args[i] for t, i in positions.items()
+                      if t in kwargs or i < len(args)}
+            with span(span_name, **labels) as s:
+                result = func(*args, **kwargs)
+                shape = getattr(result, "shape", None)
+                if shape:
+                    s.rows = int(shape[0])
+                return result
+
+        return wrapper
+
+    return decorator
+
+
+def plotly_chart(fig, **kwargs):
+    """``st.plotly_chart`` medido: serialización de la figura y bytes enviados al navegador"""
+    import streamlit as st
+
+    with span("st.plotly_chart", key=kwargs.get("key")):
+        return st.plotly_chart(fig, **kwargs)
+
+
+def _finish(rerun, status=None):
+    _local.rerun = None
+    for open_span in reversed(rerun.stack[1:]):
+        open_span.finish("interrumpido")
+        rerun.spans.append(open_span)
+    rerun.stack = [rerun.root]
+    rerun.root.finish(status)
+    # Memoria propia de la sesión: lo que guarda en ``st.session_state`` (los datos compartidos no cuentan)
+    state = _local.__dict__.pop("session_state", None)
+    if state is not None:
+        nbytes = sum(estimate_bytes(v) for v in state.filtered_state.values())
+        rerun.root.tags["session_bytes"] = nbytes
+        TRACER.observe_session(rerun.session, nbytes)
+    records = TRACER.record(rerun)
+    TRACER.export(records)
+    return records
+
+
+def debug_enabled():
+    """Panel de depuración activo: solo con ``TELCO_DEBUG=1`` en el entorno del servidor"""
+    return os.environ.get(DEBUG_ENV) == "1"
+
+
+def end_page(status=None):
+    """
+    Cierra y registra el rerun en curso; con el modo de depuración activo
+    dibuja después el panel en la barra lateral (su envío no cuenta en el rerun).
+    """
+    rerun = _current()
+    if rerun is None:
+        return
+    records = _finish(rerun, status)
+    if debug_enabled():
+        debug_panel(rerun, records)
+
+
+def debug_panel(rerun, records):
+    """Spans del último rerun, resumen de la página, estadísticas registradas y descargas"""
+    import pandas as pd
+    import streamlit as st
+
+    root = records[-1]
+    with st.sidebar.expander("🐞 Trazas del rerun", expanded=True):
+        st.caption(
+            f"Sesión `{rerun.session}` · rerun {rerun.number} · "
+            f"{root['ms']:.0f} ms · {root['bytes'] / 1024:.1f} KiB enviados · "
+            f"{root['tags'].get('session_bytes', 0) / 1024:.1f} KiB en session_state"
+        )
+        if rerun.tags:
+            st.caption(" · ".join(f"{k}: {v}" for k, v in rerun.tags.items()))
+        st.dataframe(
+            pd.DataFrame(records[:-1], columns=["span", "parent", "ms", "rows", "bytes", "status", "tags"]),
+            hide_index=True, use_container_width=True,
+        )
+
+        st.markdown(f"**{rerun.page}: últimos spans del proceso**")
+        st.dataframe(
+            pd.DataFrame(TRACER.summary(rerun.page)).drop(columns="page", errors="ignore").round(2),
+            hide_index=True, use_container_width=True,
+        )
+
+        st.json({"sessions": TRACER.session_stats(), **TRACER.stats()}, expanded=False)
+
+        st.download_button("Métricas (Prometheus)", TRACER.prometheus(), "telco-metrics.prom", "text/plain")
+        st.download_button("Spans (JSON lines)", TRACER.jsonl(), "telco-spans.jsonl", "application/x-ndjson")
@@ -0,0 +1,294 @@
+"""
+Evaluador en NumPy puro del ensemble de árboles de XGBoost.
+
+El exportador guarda cada árbol como un árbol binario completo de la
+profundidad máxima del ensemble, en orden de heap (los hijos del nodo ``i``
+son ``2i + 1`` y ``2i + 2``): arrays contiguos ``(árboles, nodos)`` con la
+variable, el umbral y la dirección por defecto de cada split y
+``(árboles, hojas)`` con los valores de hoja, en un ``.npz``. Las hojas que
+quedan por encima de la profundidad máxima se replican en todo su subárbol,
+así que el recorrido siempre da el mismo número de pasos.
+
+El evaluador puntúa lotes nivel a nivel: primero compara cada fila con
+cada split distinto del ensemble (los umbrales se repiten mucho entre
+árboles), y después avanza todos los pares (árbol, fila) un nivel por paso
+consultando esa tabla de decisiones, sin bucles de Python por árbol ni por
+fila.
+
+Solo la exportación necesita ``xgboost``; cargar y predecir no lo importan.
+
+Exportar y comprobar la paridad desde la carpeta ``app/``::
+
+    python -m utils.tree_model ../models/xgboost_model.pkl ../models/xgboost_model.npz --check
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+
+MODELS_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "models"
+)
+DEFAULT_COMPILED_MODEL_PATH = os.path.join(MODELS_DIR, "xgboost_model.npz")
+FORMAT_VERSION = 1
+# Filas por bloque: los arrays intermedios (árboles x filas) caben en caché
+CHUNK_ROWS = 128
+# Cada árbol ocupa 2**depth hojas; por encima de esto el formato no compensa
+MAX_DEPTH = 12
+
+
+class TreeEnsemble:
+    """
+    Ensemble de árboles completos con la interfaz ``predict_proba`` de ``XGBClassifier``.
+
+    Parameters
+    ----------
+    feature, threshold, default_left : np.ndarray
+        ``(árboles, 2**depth - 1)``: split de cada nodo interno en orden de
+        heap. Una fila va a la izquierda si ``x < threshold`` o si ``x`` es
+        NaN y ``default_left``.
+    value : np.ndarray
+        ``(árboles, 2**depth)``: contribución al margen de cada hoja.
+    base_margin : float
+        Margen inicial (logit de ``base_score``).
+    feature_names : list of str
+    source_sha256 : str, optional
+        SHA-256 del fichero nativo del que se compiló (ver ``utils.model_registry``).
+    """
+
+    def __init__(self, feature, threshold, default_left, value, base_margin, feature_names=(), source_sha256=None):
+        self.feature = np.ascontiguousarray(feature, dtype=np.int32)
+        self.threshold = np.ascontiguousarray(threshold, dtype=np.float32)
+        self.default_left = np.ascontiguousarray(default_left, dtype=bool)
+        self.value = np.ascontiguousarray(value, dtype=np.float32)
+        self.base_margin = float(base_margin)
+        self.feature_names = list(feature_names)
+        self.source_sha256 = source_sha256
+        self.depth = int(np.log2(self.value.shape[1]))
+
+        # Tabla de splits distintos y, para cada nodo, su fila en la tabla
+        splits, node_split = np.unique(
+            np.stack([self.feature, self.threshold.astype(np.float64), self.default_left], axis=-1).reshape(-1, 3),
+            axis=0, return_inverse=True,
+        )
+        self._split_feature = splits[:, 0].astype(np.intp)
+        self._split_threshold = splits[:, 1].astype(np.float32)[:, None]
+        self._split_default_left = splits[:, 2].astype(bool)[:, None]
+        self._node_split = node_split.reshape(self.feature.shape).astype(np.int32)
+        self._tree_nodes = (np.arange(self.n_trees, dtype=np.int32) * self.feature.shape[1])[:, None]
+        self._tree_leaves = (np.arange(self.n_trees, dtype=np.int32) * self.value.shape[1])[:, None]
+
+    @property
+    def n_trees(self):
+        return len(self.value)
+
+    @property
+    def n_splits(self):
+        return len(self._split_feature)
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.feature, self.threshold, self.default_left, self.value))
+
+    # ========================================
+    # SERIALIZACIÓN
+    # ========================================
+    def save(self, path=DEFAULT_COMPILED_MODEL_PATH):
+        # Escritura atómica: el registro de modelos nunca lee un fichero a medias
+        tmp = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(
+            tmp,
+            format_version=FORMAT_VERSION,
+            feature=self.feature,
+            threshold=self.threshold,
+            default_left=self.default_left,
+            value=self.value,
+            base_margin=self.base_margin,
+            feature_names=np.array(self.feature_names, dtype=str),
+            source_sha256=np.array(self.source_sha256 or ""),
+        )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path=DEFAULT_COMPILED_MODEL_PATH):
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["format_version"]) != FORMAT_VERSION:
+                raise ValueError(f"Versión de formato no soportada en {path}: {int(data['format_version'])}")
+            return cls(
+                data["feature"], data["threshold"], data["default_left"], data["value"],
+                float(data["base_margin"]), data["feature_names"].tolist(),
+                str(data["source_sha256"]) or None if "source_sha256" in data.files else None,
+            )
+
+    # ========================================
+    # PREDICCIÓN
+    # ========================================
+    def _block_margin(self, X):
+        """Suma de hojas de un bloque de filas float32"""
+        n = len(X)
+        # Decisiones (splits x filas): 1 = izquierda
+        x = np.ascontiguousarray(X.T)[self._split_feature]
+        go_left = x < self._split_threshold
+        missing = np.isnan(x)
+        if missing.any():
+            go_left |= missing & self._split_default_left
+        decisions = go_left.view(np.uint8).ravel()
+
+        # Posición de cada nodo en ``decisions`` sin la fila, y fila de cada par (árbol, fila)
+        node_offset = (self._node_split * n).ravel()
+        rows = np.arange(n, dtype=np.int32)
+        node = np.zeros((self.n_trees, n), dtype=np.int32)
+        index = np.empty_like(node)
+        step = np.empty(node.shape, dtype=np.uint8)
+        for _ in range(self.depth):
+            # Operaciones in situ: sin reservar arrays (árboles x filas) en cada nivel
+            np.add(self._tree_nodes, node, out=index)
+            np.add(node_offset.take(index), rows, out=index)
+            decisions.take(index, out=step)
+            node *= 2
+            node += 2
+            node -= step
+        node += self._tree_leaves - self.feature.shape[1]
+        return self.value.ravel().take(node).sum(axis=0, dtype=np.float64)
+
+    def predict_margin(self, X):
+        """Margen (log-odds) de cada fila; los lotes grandes se evalúan por bloques de ``CHUNK_ROWS``"""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None, :]
+        margin = np.empty(len(X), dtype=np.float64)
+        for start in range(0, len(X), CHUNK_ROWS):
+            margin[start:start + CHUNK_ROWS] = self._block_margin(X[start:start + CHUNK_ROWS])
+        return margin + self.base_margin
+
+    def predict_proba(self, X):
+        """Probabilidades ``(filas, 2)`` como ``XGBClassifier.predict_proba``"""
+        prob = 1.0 / (1.0 + np.exp(-self.predict_margin(X)))
+        return np.column_stack([1.0 - prob, prob]).astype(np.float32)
+
+    def predict(self, X):
+        return (self.predict_proba(X)[:, 1] > 0.5).astype(np.int64)
+
+
+# ========================================
+# EXPORTACIÓN (requiere xgboost)
+# ========================================
+def _parse_float(value):
+    # Desde XGBoost 2 los parámetros vectoriales se guardan como "[5.0E-1]"
+    return float(str(value).strip("[]").split(",")[0])
+
+
+def _tree_depth(tree):
+    left, right = tree["left_children"], tree["right_children"]
+    depth = [0] * len(left)
+    # Los hijos siempre tienen índice mayor que su padre
+    for i in range(len(left)):
+        if left[i] != -1:
+            depth[left[i]] = depth[right[i]] = depth[i] + 1
+    return max(depth)
+
+
+def export_booster(model):
+    """
+    Aplana un ``XGBClassifier`` o ``Booster`` binario (``binary:logistic``) en un ``TreeEnsemble``.
+
+    Raises
+    ------
+    ValueError
+        Si el modelo no es un ``gbtree`` binario con splits numéricos.
+    """
+    booster = model.get_booster() if hasattr(model, "get_booster") else model
+    learner = json.loads(bytes(booster.save_raw("json")))["learner"]
+
+    objective = learner["objective"]["name"]
+    if objective != "binary:logistic":
+        raise ValueError(f"Objetivo no soportado: {objective}")
+    if learner["gradient_booster"]["name"] != "gbtree":
+        raise ValueError(f"Booster no soportado: {learner['gradient_booster']['name']}")
+
+    base_score = _parse_float(learner["learner_model_param"]["base_score"])
+    base_margin = np.log(base_score / (1.0 - base_score))
+
+    trees = learner["gradient_booster"]["model"]["trees"]
+    depth = max(_tree_depth(tree) for tree in trees)
+    if depth > MAX_DEPTH:
+        raise ValueError(f"Profundidad {depth} mayor que la admitida ({MAX_DEPTH})")
+
+    n_internal = 2 ** depth - 1
+    feature = np.zeros((len(trees), n_internal), dtype=np.int32)
+    threshold = np.zeros((len(trees), n_internal), dtype=np.float32)
+    default_left = np.zeros((len(trees), n_internal), dtype=bool)
+    value = np.zeros((len(trees), 2 ** depth), dtype=np.float32)
+
+    for t, tree in enumerate(trees):
+        if any(tree["split_type"]):
+            raise ValueError("Los splits categóricos no están soportados")
+        left, right = tree["left_children"], tree["right_children"]
+        cond = np.asarray(tree["split_conditions"], dtype=np.float32)
+        # (nodo de XGBoost, posición en el heap)
+        stack = [(0, 0)]
+        while stack:
+            node, pos = stack.pop()
+            if pos >= n_internal:
+                value[t, pos - n_internal] = cond[node]
+            elif left[node] == -1:
+                # Hoja temprana: se replica en los dos hijos (el split da igual)
+                stack += [(node, 2 * pos + 1), (node, 2 * pos + 2)]
+            else:
+                feature[t, pos] = tree["split_indices"][node]
+                threshold[t, pos] = cond[node]
+                default_left[t, pos] = tree["default_left"][node]
+                stack += [(left[node], 2 * pos + 1), (right[node], 2 * pos + 2)]
+
+    return TreeEnsemble(feature, threshold, default_left, value, base_margin, booster.feature_names or [])
+
+
+def _load_source(path):
+    if path.endswith(".pkl"):
+        import pandas as pd
+        return pd.read_pickle(path)
+    from xgboost import Booster
+    booster = Booster()
+    booster.load_model(path)
+    return booster
+
+
+def check_parity(source, compiled, X):
+    """Máxima diferencia absoluta de probabilidad entre el modelo de XGBoost y el compilado"""
+    if hasattr(source, "predict_proba"):
+        expected = source.predict_proba(X)[:, 1]
+    else:
+        expected = source.inplace_predict(X)
+    return float(np.abs(compiled.predict_proba(X)[:, 1] - expected).max())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exporta el booster de XGBoost a arrays de NumPy")
+    parser.add_argument("source", nargs="?", default=os.path.join(MODELS_DIR, "xgboost_model.pkl"),
+                        help="Modelo de XGBoost (.pkl, .ubj o .json)")
+    parser.add_argument("dest", nargs="?", default=DEFAULT_COMPILED_MODEL_PATH)
+    parser.add_argument("--check", action="store_true", help="Compara las probabilidades con las de XGBoost")
+    parser.add_argument("--data", default=os.path.join(os.path.dirname(MODELS_DIR), "clean_data", "telco-customer.parquet"),
+                        help="Datos para la comprobación de paridad")
+    args = parser.parse_args(argv)
+
+    source = _load_source(args.source)
+    compiled = export_booster(source)
+    compiled.save(args.dest)
+    print(f"{compiled.n_trees} árboles de profundidad {compiled.depth}, {compiled.n_splits} splits distintos "
+          f"({compiled.nbytes / 1024:.0f} KB) -> {args.dest}")
+
+    if args.check:
+        import pandas as pd
+        from .encoder import FeatureEncoder
+
+        X = FeatureEncoder.load().transform(pd.read_parquet(args.data))
+        diff = check_parity(source, compiled, X)
+        print(f"Paridad sobre {len(X):,} filas: diferencia máxima {diff:.2e}")
+        if diff > 1e-5:
+            raise SystemExit("La diferencia supera 1e-5")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,568 @@
+"""
+Búsqueda de hiperparámetros con Optuna para los modelos de ``ML.ipynb``.
+
+El notebook anida paralelismo (``cross_val_score(n_jobs=-1)`` sobre modelos
+con ``n_jobs=-1``) y guarda los estudios solo en memoria. Aquí:
+
+- el presupuesto de núcleos se reparte entre trials en paralelo (procesos)
+  e hilos dentro de cada modelo (``split_cores``), sin anidar pools;
+- los estudios se guardan en SQLite (``.cache/optuna/studies.db``) y se
+  pueden reanudar o ampliar desde varios procesos a la vez;
+- cada ejecución registra trials por segundo y uso de CPU en los
+  atributos del estudio (``runs``);
+- cada trial informa al pruner (mediana o successive halving) de una sola
+  métrica, el F1 medio de validación: tras cada fold el de los folds ya
+  terminados y, en XGBoost, cada ``REPORT_EVERY`` rondas la estimación con
+  el F1 del fold en curso a esa ronda; los folds de XGBoost usan early
+  stopping sobre una partición de validación interna;
+- en XGBoost, los folds se construyen una sola vez por proceso como
+  ``QuantileDMatrix`` (entrenamiento, histogramas ya calculados) y
+  ``DMatrix`` (validación) y se reutilizan en todos los trials
+  (``FoldCache``).
+
+Uso desde la carpeta ``app/``::
+
+    python -m utils.tuning xgb --trials 50 --cores 8
+    python -m utils.tuning rf --trials 100 --workers 2 --study rf-f1
+    python -m utils.tuning xgb --pruner halving --early-stopping-rounds 30
+    python -m utils.tuning xgb --summary
+    python -m utils.tuning xgb --benchmark 10 --scale 100
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import optuna
+import pandas as pd
+import xgboost as xgb
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import f1_score
+from sklearn.model_selection import StratifiedKFold, train_test_split
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.svm import SVC
+from sklearn.tree import DecisionTreeClassifier
+from threadpoolctl import threadpool_limits
+from xgboost import XGBClassifier
+from xgboost.callback import TrainingCallback
+
+from .encoder import FeatureEncoder
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_DATA_PATH = os.path.join(ROOT, "clean_data", "telco-customer.parquet")
+DEFAULT_STORAGE = f"sqlite:///{os.path.join(ROOT, '.cache', 'optuna', 'studies.db')}"
+N_SPLITS = 5
+RANDOM_STATE = 42
+
+# Pasos de los valores intermedios (siempre F1 medio): las rondas del fold k van
+# de k * ROUND_STRIDE en adelante y el F1 del fold se informa en (k + 1) * ROUND_STRIDE - 1
+ROUND_STRIDE = 1000
+REPORT_EVERY = 25
+EARLY_STOPPING_ROUNDS = 50
+INNER_VALID_SIZE = 0.15
+MAX_BIN = 256
+PRUNERS = ("median", "halving", "none")
+
+
+# ========================================
+# ESPACIOS DE BÚSQUEDA (los de ML.ipynb)
+# ========================================
+def _logreg_params(trial):
+    return {
+        "C": trial.suggest_float("C", 1e-4, 1e2, log=True),
+        "penalty": trial.suggest_categorical("penalty", ["l1", "l2"]),
+        "solver": "liblinear",
+        "class_weight": trial.suggest_categorical("class_weight", [None, "balanced"]),
+        "max_iter": 2000,
+        "random_state": RANDOM_STATE,
+    }
+
+
+def _knn_params(trial):
+    return {
+        "n_neighbors": trial.suggest_int("n_neighbors", 3, 25),
+        "weights": trial.suggest_categorical("weights", ["uniform", "distance"]),
+        "metric": trial.suggest_categorical("metric", ["euclidean", "manhattan"]),
+    }
+
+
+def _svc_params(trial):
+    return {
+        "C": trial.suggest_float("C", 1e-3, 1e2, log=True),
+        "kernel": trial.suggest_categorical("kernel", ["rbf", "linear"]),
+        "class_weight": trial.suggest_categorical("class_weight", [None, "balanced"]),
+        "random_state": RANDOM_STATE,
+    }
+
+
+def _tree_params(trial):
+    return {
+        "criterion": trial.suggest_categorical("criterion", ["gini", "entropy", "log_loss"]),
+        "max_depth": trial.suggest_int("max_depth", 2, 30),
+        "min_samples_split": trial.suggest_int("min_samples_split", 2, 50),
+        "min_samples_leaf": trial.suggest_int("min_samples_leaf", 1, 30),
+        "max_features": trial.suggest_categorical("max_features", [None, "sqrt", "log2"]),
+        "class_weight": trial.suggest_categorical("class_weight", [None, "balanced"]),
+        "random_state": RANDOM_STATE,
+    }
+
+
+def _rf_params(trial):
+    return {
+        "n_estimators": trial.suggest_int("n_estimators", 100, 500),
+        "max_depth": trial.suggest_int("max_depth", 3, 20),
+        "min_samples_split": trial.suggest_int("min_samples_split", 2, 30),
+        "min_samples_leaf": trial.suggest_int("min_samples_leaf", 1, 20),
+        "max_features": trial.suggest_categorical("max_features", ["sqrt", "log2"]),
+        "class_weight": "balanced",
+        "random_state": RANDOM_STATE,
+    }
+
+
+def _xgb_params(trial):
+    return {
+        "n_estimators": trial.suggest_int("n_estimators", 100, 500),
+        "max_depth": trial.suggest_int("max_depth", 3, 10),
+        "learning_rate": trial.suggest_float("learning_rate", 0.01, 0.3, log=True),
+        "subsample": trial.suggest_float("subsample", 0.6, 1.0),
+        "colsample_bytree": trial.suggest_float("colsample_bytree", 0.6, 1.0),
+        "gamma": trial.suggest_float("gamma", 0.0, 5.0),
+        "reg_alpha": trial.suggest_float("reg_alpha", 0.0, 5.0),
+        "reg_lambda": trial.suggest_float("reg_lambda", 0.0, 5.0),
+        "scale_pos_weight": trial.suggest_float("scale_pos_weight", 1.0, 5.0),
+        "objective": "binary:logistic",
+        "eval_metric": "logloss",
+        "random_state": RANDOM_STATE,
+    }
+
+
+# ``threaded``: el modelo usa varios hilos (``n_jobs``); ``scaled``: se
+# estandarizan las variables (dentro de cada fold, sin fuga de información)
+MODELS = {
+    "logreg": {"params": _logreg_params, "cls": LogisticRegression, "threaded": False, "scaled": True},
+    "knn": {"params": _knn_params, "cls": KNeighborsClassifier, "threaded": False, "scaled": True},
+    "svc": {"params": _svc_params, "cls": SVC, "threaded": False, "scaled": True},
+    "tree": {"params": _tree_params, "cls": DecisionTreeClassifier, "threaded": False, "scaled": False},
+    "rf": {"params": _rf_params, "cls": RandomForestClassifier, "threaded": True, "scaled": False},
+    "xgb": {"params": _xgb_params, "cls": XGBClassifier, "threaded": True, "scaled": False},
+}
+
+
+def build_model(name, params, threads=1):
+    """Modelo sin entrenar con ``threads`` hilos (solo en los modelos multihilo)"""
+    spec = MODELS[name]
+    if spec["threaded"]:
+        params = {**params, "n_jobs": threads}
+    model = spec["cls"](**params)
+    return make_pipeline(StandardScaler(), model) if spec["scaled"] else model
+
+
+# ========================================
+# REPARTO DE NÚCLEOS
+# ========================================
+def split_cores(name, cores=None, workers=None, max_threads=4):
+    """
+    Reparte ``cores`` entre trials en paralelo e hilos por modelo.
+
+    Los modelos de un solo hilo usan un proceso por núcleo. Los multihilo
+    usan hasta ``max_threads`` hilos (por encima escalan mal con este
+    tamaño de datos) y el resto de núcleos se dedica a más trials.
+
+    Returns
+    -------
+    tuple
+        ``(procesos, hilos por trial)`` con ``procesos * hilos <= cores``.
+    """
+    cores = max(1, cores or os.cpu_count() or 1)
+    threaded = MODELS[name]["threaded"]
+    if workers is None:
+        workers = cores // min(cores, max_threads) if threaded else cores
+    workers = max(1, min(workers, cores))
+    threads = max(1, cores // workers) if threaded else 1
+    return workers, threads
+
+
+# ========================================
+# DATOS Y OBJETIVO
+# ========================================
+def load_training_data(path=DEFAULT_DATA_PATH, encoder=None):
+    """Matriz de variables (orden del modelo, ver ``FeatureEncoder``) y objetivo binario"""
+    encoder = encoder or FeatureEncoder.load()
+    df = pd.read_parquet(path)
+    X = encoder.transform(df)
+    y = (df["baja"] == "Yes").to_numpy().astype(np.int8)
+    return X, y
+
+
+def make_folds(y, n_splits=N_SPLITS, random_state=RANDOM_STATE):
+    """Índices (train, valid) de ``StratifiedKFold`` con la misma semilla que el notebook"""
+    cv = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=random_state)
+    return list(cv.split(np.zeros(len(y)), y))
+
+
+class _RoundReporter(TrainingCallback):
+    """
+    Informa al pruner cada ``every`` rondas del F1 medio estimado del trial.
+
+    Es la misma métrica que se informa al terminar cada fold: la media de
+    ``scores`` (F1 de los folds ya terminados) y del F1 del fold en curso con
+    los árboles de esta ronda sobre su validación (``dvalid``, ``y_valid``).
+    Así el pruner nunca compara valores de métricas distintas.
+    """
+
+    def __init__(self, trial, fold, dvalid, y_valid, scores, every=REPORT_EVERY):
+        self.trial = trial
+        self.offset = fold * ROUND_STRIDE
+        self.dvalid = dvalid
+        self.y_valid = y_valid
+        self.scores = list(scores)
+        self.every = every
+
+    def after_iteration(self, model, epoch, evals_log):
+        if (epoch + 1) % self.every == 0:
+            pred = (model.predict(self.dvalid, iteration_range=(0, epoch + 1)) > 0.5).astype(np.int8)
+            score = f1_score(self.y_valid, pred, zero_division=1)
+            self.trial.report(float(np.mean(self.scores + [score])), self.offset + epoch)
+            if self.trial.should_prune():
+                raise optuna.TrialPruned(f"ronda {epoch + 1}")
+        return False
+
+
+def _inner_split(y, train_idx):
+    """Partición del entrenamiento de un fold en ajuste y validación para el early stopping"""
+    return train_test_split(train_idx, test_size=INNER_VALID_SIZE, stratify=y[train_idx], random_state=RANDOM_STATE)
+
+
+def _fit_xgb(trial, params, X, y, train_idx, valid_idx, fold, scores, threads, early_stopping_rounds):
+    """Entrena un fold de XGBoost con early stopping sobre una partición interna del entrenamiento"""
+    fit_idx, stop_idx = _inner_split(y, train_idx)
+    dvalid = xgb.DMatrix(X[valid_idx], nthread=threads)
+    model = build_model("xgb", {
+        **params,
+        "early_stopping_rounds": early_stopping_rounds or None,
+        "callbacks": [_RoundReporter(trial, fold, dvalid, y[valid_idx], scores)],
+    }, threads)
+    model.fit(X[fit_idx], y[fit_idx], eval_set=[(X[stop_idx], y[stop_idx])], verbose=False)
+    return model
+
+
+class FoldCache:
+    """
+    Matrices de XGBoost de cada fold, construidas una vez y compartidas por todos los trials.
+
+    El entrenamiento de cada fold se guarda como ``QuantileDMatrix`` (los
+    bordes de los histogramas se calculan una sola vez) y la validación
+    interna y la del fold como ``DMatrix``. Sustituye a pasar ``X`` en cada
+    trial, que obliga a XGBoost a recortar y recuantizar los mismos datos.
+
+    Parameters
+    ----------
+    X, y : np.ndarray
+        Variables y objetivo completos.
+    folds : list of tuple
+        Índices ``(train, valid)`` de ``make_folds``.
+    threads : int
+        Hilos para construir las matrices.
+    max_bin : int
+        Número de bins de los histogramas (fijo en toda la búsqueda).
+    """
+
+    def __init__(self, X, y, folds, threads=1, max_bin=MAX_BIN):
+        self.max_bin = max_bin
+        self.folds = []
+        for train_idx, valid_idx in folds:
+            fit_idx, stop_idx = _inner_split(y, train_idx)
+            dtrain = xgb.QuantileDMatrix(X[fit_idx], y[fit_idx], max_bin=max_bin, nthread=threads)
+            dstop = xgb.DMatrix(X[stop_idx], y[stop_idx], nthread=threads)
+            dvalid = xgb.DMatrix(X[valid_idx], nthread=threads)
+            self.folds.append((dtrain, dstop, dvalid, y[valid_idx]))
+
+    def __len__(self):
+        return len(self.folds)
+
+    def booster_params(self, params, threads=1):
+        """Parámetros del estimador de sklearn traducidos a ``xgb.train``: ``(params, rondas)``"""
+        params = dict(params)
+        rounds = params.pop("n_estimators")
+        params["seed"] = params.pop("random_state")
+        params.update(nthread=threads, tree_method="hist", max_bin=self.max_bin)
+        return params, rounds
+
+    def fit_score(self, trial, params, fold, threads=1, early_stopping_rounds=EARLY_STOPPING_ROUNDS, scores=()):
+        """F1 de validación del fold ``fold`` y rondas usadas (``scores``: F1 de los folds anteriores)"""
+        dtrain, dstop, dvalid, y_valid = self.folds[fold]
+        booster_params, rounds = self.booster_params(params, threads)
+        booster = xgb.train(
+            booster_params,
+            dtrain,
+            num_boost_round=rounds,
+            evals=[(dstop, "valid")],
+            early_stopping_rounds=early_stopping_rounds or None,
+            callbacks=[_RoundReporter(trial, fold, dvalid, y_valid, scores)],
+            verbose_eval=False,
+        )
+        used = booster.best_iteration + 1 if early_stopping_rounds else rounds
+        pred = (booster.predict(dvalid, iteration_range=(0, used)) > 0.5).astype(np.int8)
+        return f1_score(y_valid, pred, zero_division=1), used
+
+
+def make_objective(name, X, y, folds, threads=1, early_stopping_rounds=EARLY_STOPPING_ROUNDS, fold_cache=None):
+    """
+    Objetivo de Optuna: F1 medio de validación cruzada.
+
+    Los folds se entrenan uno tras otro dentro del trial; el paralelismo
+    está en los trials y en los hilos del modelo, nunca anidado. Tras cada
+    fold se informa del F1 medio acumulado y el trial se poda si el pruner
+    lo indica (en XGBoost también cada ``REPORT_EVERY`` rondas, con la misma
+    métrica; ver ``_RoundReporter``). En XGBoost, el número de rondas efectivo medio se guarda en
+    ``trial.user_attrs['best_n_estimators']``; con ``fold_cache`` los folds
+    se entrenan sobre sus matrices ya construidas.
+    """
+    suggest = MODELS[name]["params"]
+
+    def objective(trial):
+        model_params = suggest(trial)
+        scores, rounds = [], []
+        for fold, (train_idx, valid_idx) in enumerate(folds):
+            if fold_cache is not None:
+                score, used = fold_cache.fit_score(trial, model_params, fold, threads, early_stopping_rounds, scores)
+                scores.append(score)
+                rounds.append(used)
+            elif name == "xgb":
+                model = _fit_xgb(trial, model_params, X, y, train_idx, valid_idx, fold, scores, threads,
+                                 early_stopping_rounds)
+                rounds.append(model.best_iteration + 1 if early_stopping_rounds else model_params["n_estimators"])
+                scores.append(f1_score(y[valid_idx], model.predict(X[valid_idx]), zero_division=1))
+            else:
+                model = build_model(name, model_params, threads)
+                model.fit(X[train_idx], y[train_idx])
+                scores.append(f1_score(y[valid_idx], model.predict(X[valid_idx]), zero_division=1))
+
+            trial.report(float(np.mean(scores)), (fold + 1) * ROUND_STRIDE - 1)
+            if trial.should_prune():
+                raise optuna.TrialPruned(f"fold {fold + 1}")
+
+        if rounds:
+            trial.set_user_attr("best_n_estimators", int(round(np.mean(rounds))))
+        return float(np.mean(scores))
+
+    return objective
+
+
+# ========================================
+# ESTUDIOS PERSISTENTES
+# ========================================
+def get_storage(url=DEFAULT_STORAGE):
+    """Almacenamiento RDB de Optuna; con SQLite se crea la carpeta y se tolera concurrencia"""
+    if url.startswith("sqlite:///"):
+        os.makedirs(os.path.dirname(url[len("sqlite:///"):]), exist_ok=True)
+        return optuna.storages.RDBStorage(url, engine_kwargs={"connect_args": {"timeout": 60}})
+    return optuna.storages.RDBStorage(url)
+
+
+def make_pruner(kind="median"):
+    """Pruner de Optuna: ``median``, ``halving`` (successive halving) o ``none``"""
+    if kind == "median":
+        # Sin podar hasta tener 5 trials y 100 rondas del primer fold
+        return optuna.pruners.MedianPruner(n_startup_trials=5, n_warmup_steps=100)
+    if kind == "halving":
+        return optuna.pruners.SuccessiveHalvingPruner(min_resource=REPORT_EVERY * 4)
+    if kind == "none":
+        return optuna.pruners.NopPruner()
+    raise ValueError(f"Pruner desconocido: {kind} (opciones: {', '.join(PRUNERS)})")
+
+
+def load_study(name, study_name=None, storage=DEFAULT_STORAGE, pruner="median", seed=None):
+    """Crea o recupera el estudio ``study_name`` (por defecto ``<modelo>-f1``)"""
+    return optuna.create_study(
+        study_name=study_name or f"{name}-f1",
+        storage=get_storage(storage),
+        direction="maximize",
+        pruner=make_pruner(pruner),
+        sampler=optuna.samplers.TPESampler(seed=seed),
+        load_if_exists=True,
+    )
+
+
+def _finished_trials(study):
+    states = (optuna.trial.TrialState.COMPLETE, optuna.trial.TrialState.PRUNED)
+    return len(study.get_trials(deepcopy=False, states=states))
+
+
+def _worker(name, study_name, storage, n_trials, threads, data_path, pruner, early_stopping_rounds, seed):
+    # Hilos de BLAS/OpenMP acotados al presupuesto del trial
+    with threadpool_limits(threads):
+        optuna.logging.set_verbosity(optuna.logging.WARNING)
+        X, y = load_training_data(data_path)
+        folds = make_folds(y)
+        fold_cache = FoldCache(X, y, folds, threads) if name == "xgb" else None
+        study = load_study(name, study_name, storage, pruner, seed)
+        study.optimize(
+            make_objective(name, X, y, folds, threads, early_stopping_rounds, fold_cache),
+            callbacks=[optuna.study.MaxTrialsCallback(
+                n_trials, states=(optuna.trial.TrialState.COMPLETE, optuna.trial.TrialState.PRUNED)
+            )],
+        )
+
+
+def run_search(
+    name,
+    n_trials=50,
+    cores=None,
+    workers=None,
+    study_name=None,
+    storage=DEFAULT_STORAGE,
+    data_path=DEFAULT_DATA_PATH,
+    pruner="median",
+    early_stopping_rounds=EARLY_STOPPING_ROUNDS,
+    seed=None,
+):
+    """
+    Ejecuta (o reanuda) la búsqueda hasta que el estudio tenga ``n_trials`` trials terminados
+    (completos o podados).
+
+    Returns
+    -------
+    dict
+        Estadísticas de la ejecución, también guardadas en ``study.user_attrs['runs']``.
+    """
+    cores = max(1, cores or os.cpu_count() or 1)
+    workers, threads = split_cores(name, cores, workers)
+    study = load_study(name, study_name, storage, pruner, seed)
+    before = _finished_trials(study)
+    pruned_before = len(study.get_trials(deepcopy=False, states=(optuna.trial.TrialState.PRUNED,)))
+
+    start = time.perf_counter()
+    cpu_start = os.times()
+    if workers > 1:
+        with ProcessPoolExecutor(workers) as pool:
+            futures = [
+                pool.submit(
+                    _worker, name, study.study_name, storage, n_trials, threads, data_path,
+                    pruner, early_stopping_rounds, None if seed is None else seed + i,
+                )
+                for i in range(workers)
+            ]
+            for future in futures:
+                future.result()
+    else:
+        _worker(name, study.study_name, storage, n_trials, threads, data_path, pruner, early_stopping_rounds, seed)
+    elapsed = time.perf_counter() - start
+    cpu_end = os.times()
+
+    # CPU de este proceso y de los workers ya terminados
+    cpu = sum(getattr(cpu_end, f) - getattr(cpu_start, f) for f in ("user", "system", "children_user", "children_system"))
+    done = _finished_trials(study) - before
+    pruned = len(study.get_trials(deepcopy=False, states=(optuna.trial.TrialState.PRUNED,))) - pruned_before
+    run = {
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(time.time() - elapsed)),
+        "trials": done,
+        "pruned": pruned,
+        "pruner": pruner,
+        "early_stopping_rounds": early_stopping_rounds,
+        "seconds": round(elapsed, 3),
+        "trials_per_second": round(done / elapsed, 4) if elapsed else 0.0,
+        "cores": cores,
+        "workers": workers,
+        "threads_per_trial": threads,
+        "cpu_seconds": round(cpu, 3),
+        "cpu_utilization": round(cpu / (elapsed * cores), 4) if elapsed else 0.0,
+    }
+    study.set_user_attr("runs", study.user_attrs.get("runs", []) + [run])
+    return run
+
+
+def runs_table(name, study_name=None, storage=DEFAULT_STORAGE):
+    """Ejecuciones registradas de un estudio como DataFrame"""
+    return pd.DataFrame(load_study(name, study_name, storage).user_attrs.get("runs", []))
+
+
+def benchmark_fold_cache(X, y, n_trials=10, scale=1, threads=1, seed=0):
+    """
+    Tiempo por trial de XGBoost con y sin ``FoldCache``.
+
+    Ambas variantes evalúan los mismos parámetros (muestreo aleatorio con
+    ``seed``) y sin poda. ``scale`` repite las filas para simular un dataset
+    mayor; las filas repetidas caen en folds distintos, así que el F1
+    resultante solo sirve para comprobar que las dos variantes coinciden.
+
+    Returns
+    -------
+    pd.DataFrame
+        Construcción de la caché, tiempo medio y mediano por trial y mejor F1.
+    """
+    if scale > 1:
+        X, y = np.tile(X, (scale, 1)), np.tile(y, scale)
+    folds = make_folds(y)
+    rows = {}
+    for label, cached in (("sin caché", False), ("con caché", True)):
+        start = time.perf_counter()
+        fold_cache = FoldCache(X, y, folds, threads) if cached else None
+        build = time.perf_counter() - start
+        study = optuna.create_study(
+            direction="maximize", sampler=optuna.samplers.RandomSampler(seed), pruner=optuna.pruners.NopPruner()
+        )
+        study.optimize(make_objective("xgb", X, y, folds, threads, fold_cache=fold_cache), n_trials=n_trials)
+        seconds = [(t.datetime_complete - t.datetime_start).total_seconds() for t in study.trials]
+        rows[label] = {
+            "rows": len(y),
+            "build_seconds": round(build, 3),
+            "trial_seconds_mean": round(float(np.mean(seconds)), 3),
+            "trial_seconds_median": round(float(np.median(seconds)), 3),
+            "best_f1": round(study.best_value, 4),
+        }
+    return pd.DataFrame.from_dict(rows, orient="index")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Búsqueda de hiperparámetros reanudable y en paralelo")
+    parser.add_argument("model", choices=sorted(MODELS), help="Modelo a ajustar")
+    parser.add_argument("--trials", type=int, default=50, help="Trials terminados que debe alcanzar el estudio")
+    parser.add_argument("--cores", type=int, default=None, help="Núcleos disponibles (por defecto todos)")
+    parser.add_argument("--workers", type=int, default=None, help="Trials en paralelo (por defecto según el modelo)")
+    parser.add_argument("--study", default=None, help="Nombre del estudio (por defecto <modelo>-f1)")
+    parser.add_argument("--storage", default=DEFAULT_STORAGE, help="URL del almacenamiento de Optuna")
+    parser.add_argument("--data", default=DEFAULT_DATA_PATH, help="Parquet limpio de entrenamiento")
+    parser.add_argument("--pruner", choices=PRUNERS, default="median", help="Poda de trials poco prometedores")
+    parser.add_argument("--early-stopping-rounds", type=int, default=EARLY_STOPPING_ROUNDS,
+                        help="Rondas sin mejora antes de parar cada fold de XGBoost (0 = sin early stopping)")
+    parser.add_argument("--seed", type=int, default=None, help="Semilla del sampler TPE")
+    parser.add_argument("--benchmark", type=int, default=0, metavar="TRIALS",
+                        help="Compara el tiempo por trial de XGBoost con y sin caché de folds")
+    parser.add_argument("--scale", type=int, default=1, help="Repeticiones de las filas en --benchmark")
+    parser.add_argument("--summary", action="store_true", help="Muestra el mejor trial y las ejecuciones sin entrenar")
+    args = parser.parse_args(argv)
+
+    if args.benchmark:
+        optuna.logging.set_verbosity(optuna.logging.WARNING)
+        X, y = load_training_data(args.data)
+        print(benchmark_fold_cache(X, y, args.benchmark, args.scale, args.cores or 1, args.seed or 0).to_string())
+        return
+
+    if not args.summary:
+        run = run_search(
+            args.model, args.trials, args.cores, args.workers, args.study, args.storage, args.data,
+            args.pruner, args.early_stopping_rounds, args.seed,
+        )
+        print(
+            f"{run['trials']} trials ({run['pruned']} podados) en {run['seconds']:.1f}s "
+            f"({run['trials_per_second']:.2f} trials/s) "
+            f"con {run['workers']} procesos x {run['threads_per_trial']} hilos, "
+            f"CPU {run['cpu_utilization']:.0%}"
+        )
+
+    study = load_study(args.model, args.study, args.storage)
+    if _finished_trials(study):
+        print(f"Mejor F1: {study.best_value:.4f}")
+        print(f"Mejores parámetros: {study.best_params}")
+        if "best_n_estimators" in study.best_trial.user_attrs:
+            print(f"Rondas efectivas (early stopping): {study.best_trial.user_attrs['best_n_estimators']}")
+    print(runs_table(args.model, args.study, args.storage).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
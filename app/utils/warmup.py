@@ -0,0 +1,156 @@
+"""
+Calentamiento en segundo plano tras el arranque del servidor.
+
+Las instancias escalan a cero, así que la primera visita paga todos los
+imports y lecturas del proceso. La primera página que se dibuja en un
+proceso nuevo llama a ``start_warmup()`` al terminar: un hilo importa los
+módulos pesados (Plotly, scoring, what-if) y deja en las cachés de
+Streamlit los datos, índices y el modelo de las vistas por defecto (Panel
+Ejecutivo, EDA y Predictor). Cuando el usuario cambia de página ya no
+espera a nada de eso.
+
+El hilo usa las mismas funciones y argumentos que las páginas
+(``utils.load_data``), así que rellena exactamente las entradas de caché que
+ellas van a pedir; si una sesión pide algo que el hilo está calculando,
+Streamlit la hace esperar a ese cálculo en lugar de repetirlo.
+
+Se desactiva con la variable de entorno ``TELCO_WARMUP=0``.
+"""
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+import streamlit as st
+
+from utils import load_data as data
+from utils.lazy import preload
+
+WARMUP_ENV = "TELCO_WARMUP"
+THREAD_NAME = "telco-warmup"
+# Espera antes de empezar, para no competir con el envío de la página que lo lanzó
+START_DELAY_SECONDS = 0.5
+
+MODULES = (
+    "plotly.express",
+    "plotly.graph_objects",
+    "utils.charts",
+    "utils.scoring",
+    "utils.what_if",
+    "streamlit.emojis",
+)
+
+
+# ========================================
+# VISTAS POR DEFECTO
+# ========================================
+def _home():
+    path = data.data_source()
+    data.load_frame(path, columns=data.HOME_COLUMNS)
+    data.load_columns(path)
+
+
+def _dashboard():
+    path = data.data_source()
+    version = data.dataset_version(path)
+    data.load_columns(path)
+    data.load_churn_cube(path, version)
+    if not data.is_partitioned(path):
+        data.load_frame(path, columns=data.DASHBOARD_COLUMNS, version=version)
+        data.load_row_index(path, version)
+
+
+def _eda():
+    path = data.data_source()
+    version = data.dataset_version(path)
+    data.load_frame(path, columns=data.EDA_COLUMNS, version=version)
+    data.load_moment_stats(path, version)
+    data.load_churn_summaries(path, version)
+
+
+def _predictor():
+    data.get_model_registry().current()
+    data.load_encoder()
+    data.get_prediction_cache()
+
+
+STEPS = (
+    ("imports", lambda: preload(*MODULES)),
+    ("home", _home),
+    ("dashboard", _dashboard),
+    ("eda", _eda),
+    ("predictor", _predictor),
+)
+
+
+# ========================================
+# HILO
+# ========================================
+class _WarmupThreadFilter(logging.Filter):
+    """Descarta el aviso de Streamlit por usar cachés desde un hilo sin sesión"""
+
+    def filter(self, record):
+        return record.threadName != THREAD_NAME
+
+
+class WarmupState:
+    """Progreso del calentamiento: segundos y error (si lo hubo) de cada paso"""
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.started_at: Optional[float] = None
+        self.seconds: Dict[str, float] = {}
+        self.errors: Dict[str, str] = {}
+        self._done = threading.Event()
+        if not enabled:
+            self._done.set()
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        """Espera a que termine; ``True`` si terminó antes de ``timeout``"""
+        return self._done.wait(timeout)
+
+    def run(self, steps=STEPS, delay=START_DELAY_SECONDS):
+        time.sleep(delay)
+        self.started_at = time.time()
+        try:
+            for name, step in steps:
+                start = time.perf_counter()
+                try:
+                    step()
+                except Exception as exc:  # noqa: BLE001 - un paso fallido no detiene los demás
+                    self.errors[name] = repr(exc)
+                self.seconds[name] = time.perf_counter() - start
+        finally:
+            self._done.set()
+
+    def summary(self):
+        """Diccionario con el estado y los tiempos en ms, para informes y métricas"""
+        return {
+            "enabled": self.enabled,
+            "done": self.done,
+            "total_ms": sum(self.seconds.values()) * 1000,
+            "steps_ms": {name: s * 1000 for name, s in self.seconds.items()},
+            "errors": dict(self.errors),
+        }
+
+
+@st.cache_resource(show_spinner=False)
+def start_warmup() -> WarmupState:
+    """
+    Lanza el calentamiento una sola vez por proceso y devuelve su estado.
+
+    Las páginas lo llaman al final, después de dibujarse: las siguientes
+    llamadas solo devuelven el estado del hilo ya lanzado.
+    """
+    state = WarmupState(enabled=os.environ.get(WARMUP_ENV, "1") != "0")
+    if state.enabled:
+        logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").addFilter(
+            _WarmupThreadFilter()
+        )
+        threading.Thread(target=state.run, name=THREAD_NAME, daemon=True).start()
+    return state
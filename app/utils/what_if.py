@@ -0,0 +1,114 @@
+"""
+Análisis what-if del Predictor: probabilidad de baja de un cliente en una
+rejilla de escenarios (antigüedad x contrato x método de pago, por ejemplo).
+
+La fila del cliente se codifica una sola vez y se replica; en cada copia
+solo se cambian las columnas de los campos barridos (y las variables
+derivadas que dependen de ellos), sin pasar por ``transform_row`` punto a
+punto. Toda la rejilla se puntúa con una única llamada a ``predict_proba``.
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from .encoder import check_contract
+
+TENURE_RANGE = np.arange(0, 73)
+CONTRACTS = ["Month-to-month", "One year", "Two year"]
+PAYMENT_METHODS = ["Electronic check", "Mailed check", "Bank transfer (automatic)", "Credit card (automatic)"]
+
+# Campos de los que dependen los valores por defecto de otros (``FeatureEncoder.complete``)
+_NOT_SWEEPABLE = {"internetservice", "totalcharges", "cliente_larga_duracion", "phone_and_internet"}
+
+
+def default_grid(tenures=TENURE_RANGE):
+    """Rejilla del panel: antigüedad 0-72 x cada contrato x cada método de pago"""
+    return {"tenure": list(tenures), "contract": CONTRACTS, "paymentmethod": PAYMENT_METHODS}
+
+
+def encode_grid(encoder, record, grid):
+    """
+    Codifica todas las combinaciones de ``grid`` alrededor de ``record``.
+
+    Parameters
+    ----------
+    encoder : FeatureEncoder
+    record : dict
+        Cliente con los valores crudos del formulario.
+    grid : dict
+        ``campo -> valores``; se toma el producto cartesiano en ese orden.
+
+    Returns
+    -------
+    tuple
+        ``(escenarios, X)``: DataFrame con una columna por campo barrido y
+        matriz ``(len(escenarios), n_features)`` float32, idéntica fila a fila
+        a ``transform_row`` del registro modificado.
+
+    Raises
+    ------
+    ValueError
+        Si se barre un campo no admitido o una categoría desconocida.
+    """
+    bad = set(grid) & _NOT_SWEEPABLE
+    if bad:
+        raise ValueError(f"Campos no admitidos en el barrido: {sorted(bad)}")
+
+    rec = encoder.complete(record)
+    base = encoder.transform_row(rec)
+    fields = list(grid)
+    options = [list(values) for values in grid.values()]
+    # Índice de cada escenario en cada eje (producto cartesiano en orden C)
+    axes = np.indices([len(values) for values in options]).reshape(len(fields), -1)
+    n = axes.shape[1]
+    X = np.repeat(base, n, axis=0)
+    rows = np.arange(n)
+    numeric = dict(encoder.numeric_index)
+
+    for col, values, axis in zip(fields, options, axes):
+        if col in encoder.category_index:
+            index = encoder.category_index[col]
+            if col == "contract":
+                check_contract(pd.Series(values, dtype=object))
+            unknown = sorted({str(v) for v in values} - set(index))
+            if unknown:
+                raise ValueError(f"Categorías desconocidas en '{col}': {unknown}")
+            X[:, list(index.values())] = 0.0
+            X[rows, np.array([index[str(v)] for v in values])[axis]] = 1.0
+        elif col in numeric:
+            X[:, numeric[col]] = np.asarray(values, dtype=np.float32)[axis]
+        else:
+            raise ValueError(f"Campo desconocido: {col!r}")
+
+    scenarios = pd.DataFrame({
+        col: np.array(values, dtype=object)[axis] for col, values, axis in zip(fields, options, axes)
+    }).infer_objects()
+
+    # Variables derivadas que el formulario no trae (como en ``FeatureEncoder.complete``)
+    tenure = X[:, numeric["tenure"]]
+    if "totalcharges" not in record:
+        X[:, numeric["totalcharges"]] = tenure * X[:, numeric["monthlycharges"]]
+    if "cliente_larga_duracion" not in record:
+        X[:, numeric["cliente_larga_duracion"]] = tenure >= 24
+    if "phone_and_internet" not in record and "phoneservice" in grid:
+        X[:, numeric["phone_and_internet"]] = (scenarios["phoneservice"] == "Yes").to_numpy() & (
+            rec["internetservice"] != "No"
+        )
+    return scenarios, X
+
+
+def sweep(model, encoder, record, grid=None):
+    """
+    Probabilidad de baja de ``record`` en cada escenario de ``grid`` (una sola llamada al modelo).
+
+    Returns
+    -------
+    tuple
+        ``(escenarios, segundos)``: DataFrame con los campos barridos y
+        ``churn_probability``, y el tiempo total de codificación y predicción.
+    """
+    start = time.perf_counter()
+    scenarios, X = encode_grid(encoder, record, grid or default_grid())
+    scenarios["churn_probability"] = model.predict_proba(X)[:, 1]
+    return scenarios, time.perf_counter() - start
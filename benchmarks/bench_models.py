@@ -0,0 +1,219 @@
+"""
+Benchmark de los modelos de ``ML.ipynb`` (``evaluar_modelo``) con métricas de producción.
+
+Para cada modelo y escala de datos se mide, en un proceso propio: calidad
+(precisión, recall, F1, AUC), tiempo de entrenamiento, latencia de
+``predict_proba`` para una fila y por lotes (p50/p99), pico de memoria
+(RSS máximo del proceso) y tamaño del modelo serializado. Los resultados se
+guardan en JSON y CSV para comparar ejecuciones.
+
+La división 70/30 estratificada es la del notebook; con ``--scales`` mayores
+que 1 se remuestrean por separado entrenamiento y test, sin filas
+compartidas entre ambos.
+
+Uso desde la raíz del repositorio::
+
+    python benchmarks/bench_models.py
+    python benchmarks/bench_models.py --scales 1 10 100 --workers 4 --models logreg tree rf xgb
+"""
+import argparse
+import json
+import os
+import pickle
+import resource
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import f1_score, precision_score, recall_score, roc_auc_score
+from sklearn.model_selection import train_test_split
+from threadpoolctl import threadpool_limits
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "app"))
+
+from utils.tuning import DEFAULT_DATA_PATH, build_model, load_training_data  # noqa: E402
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+# Modelos de ``evaluar_modelo`` con los hiperparámetros del notebook
+ZOO = {
+    "logreg": {"max_iter": 1000},
+    "knn": {"n_neighbors": 3},
+    "tree": {"criterion": "entropy", "random_state": 0},
+    "svc": {"kernel": "rbf", "probability": True, "class_weight": "balanced"},
+    "rf": {"n_estimators": 200, "max_depth": None, "random_state": 42, "class_weight": "balanced"},
+    "xgb": {
+        "n_estimators": 300,
+        "max_depth": 4,
+        "learning_rate": 0.05,
+        "subsample": 0.8,
+        "colsample_bytree": 0.8,
+        "random_state": 42,
+        "eval_metric": "logloss",
+    },
+}
+
+# Filas de entrenamiento a partir de las cuales un modelo se omite (coste cuadrático)
+ROW_LIMITS = {"svc": 25_000}
+
+
+def make_split(scale=1, data_path=DEFAULT_DATA_PATH, seed=0):
+    """División 70/30 del notebook; con ``scale > 1`` cada parte se remuestrea ``scale`` veces"""
+    X, y = load_training_data(data_path)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.3, random_state=42, stratify=y)
+    if scale > 1:
+        rng = np.random.default_rng(seed)
+        train = rng.integers(0, len(y_train), len(y_train) * scale)
+        test = rng.integers(0, len(y_test), len(y_test) * scale)
+        X_train, y_train, X_test, y_test = X_train[train], y_train[train], X_test[test], y_test[test]
+    return X_train, X_test, y_train, y_test
+
+
+def _rss_peak_mb():
+    # ru_maxrss está en KB en Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _percentiles(seconds):
+    ms = np.asarray(seconds) * 1000
+    return float(np.percentile(ms, 50)), float(np.percentile(ms, 99))
+
+
+def run_one(task):
+    """Entrena y mide un modelo a una escala (se ejecuta en un proceso nuevo)"""
+    name, scale, threads, single_rows, batch_size, batch_repeats, data_path = task
+    record = {"model": name, "scale": scale, "threads": threads}
+
+    with threadpool_limits(threads):
+        X_train, X_test, y_train, y_test = make_split(scale, data_path)
+        record.update(train_rows=len(y_train), test_rows=len(y_test))
+        if len(y_train) > ROW_LIMITS.get(name, np.inf):
+            return {**record, "status": "omitido"}
+
+        rss_before = _rss_peak_mb()
+        model = build_model(name, ZOO[name], threads)
+        start = time.perf_counter()
+        model.fit(X_train, y_train)
+        record["fit_seconds"] = time.perf_counter() - start
+
+        # Calidad (mismas métricas que ``evaluar_modelo``)
+        y_pred = model.predict(X_test)
+        y_prob = model.predict_proba(X_test)[:, 1]
+        record.update(
+            precision=precision_score(y_test, y_pred, zero_division=1),
+            recall=recall_score(y_test, y_pred, zero_division=1),
+            f1=f1_score(y_test, y_pred, zero_division=1),
+            auc=roc_auc_score(y_test, y_prob),
+        )
+
+        # Latencia de una fila (caso del Predictor)
+        rows = np.random.default_rng(1).integers(0, len(X_test), single_rows)
+        times = []
+        for i in rows:
+            start = time.perf_counter()
+            model.predict_proba(X_test[i:i + 1])
+            times.append(time.perf_counter() - start)
+        record["single_p50_ms"], record["single_p99_ms"] = _percentiles(times)
+
+        # Latencia por lotes (caso del scoring por lotes)
+        batch = X_test[:batch_size]
+        times = []
+        for _ in range(batch_repeats):
+            start = time.perf_counter()
+            model.predict_proba(batch)
+            times.append(time.perf_counter() - start)
+        record["batch_size"] = len(batch)
+        record["batch_p50_ms"], record["batch_p99_ms"] = _percentiles(times)
+        record["batch_rows_per_second"] = len(batch) / np.median(times)
+
+        record["peak_rss_mb"] = _rss_peak_mb()
+        record["fit_predict_rss_mb"] = record["peak_rss_mb"] - rss_before
+        record["model_bytes"] = len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
+    return {**record, "status": "ok"}
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(models, scales, workers=None, threads=1, single_rows=200, batch_size=1000, batch_repeats=20,
+                  data_path=DEFAULT_DATA_PATH):
+    """
+    Ejecuta todas las combinaciones modelo x escala en paralelo.
+
+    Cada tarea corre en un proceso nuevo (``max_tasks_per_child=1``) para
+    que el pico de memoria medido sea solo el suyo.
+
+    Returns
+    -------
+    pd.DataFrame
+        Una fila por modelo y escala.
+    """
+    tasks = [(m, s, threads, single_rows, batch_size, batch_repeats, data_path) for s in scales for m in models]
+    workers = max(1, min(workers or os.cpu_count() or 1, len(tasks)))
+    with ProcessPoolExecutor(workers, max_tasks_per_child=1) as pool:
+        records = list(pool.map(run_one, tasks))
+    return pd.DataFrame(records)
+
+
+def save_report(results, meta, out_dir=RESULTS_DIR, name=None):
+    """Guarda ``<name>.json`` (metadatos y resultados) y ``<name>.csv``; devuelve ambas rutas"""
+    os.makedirs(out_dir, exist_ok=True)
+    name = name or f"models-{time.strftime('%Y%m%d-%H%M%S')}"
+    json_path = os.path.join(out_dir, f"{name}.json")
+    csv_path = os.path.join(out_dir, f"{name}.csv")
+    records = json.loads(results.to_json(orient="records"))
+    with open(json_path, "w") as f:
+        json.dump({"meta": meta, "results": records}, f, indent=2)
+    results.to_csv(csv_path, index=False)
+    return json_path, csv_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--models", nargs="+", choices=list(ZOO), default=list(ZOO))
+    parser.add_argument("--scales", nargs="+", type=int, default=[1], help="Multiplicadores del tamaño de los datos")
+    parser.add_argument("--workers", type=int, default=None, help="Procesos en paralelo (por defecto, núcleos)")
+    parser.add_argument("--threads", type=int, default=1, help="Hilos por modelo")
+    parser.add_argument("--single-rows", type=int, default=200, help="Predicciones de una fila a medir")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--batch-repeats", type=int, default=20)
+    parser.add_argument("--data", default=DEFAULT_DATA_PATH)
+    parser.add_argument("--out", default=RESULTS_DIR, help="Carpeta del informe")
+    parser.add_argument("--name", default=None, help="Nombre del informe (por defecto, con fecha y hora)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    results = run_benchmark(
+        args.models, args.scales, args.workers, args.threads,
+        args.single_rows, args.batch_size, args.batch_repeats, args.data,
+    )
+    meta = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": git_commit(),
+        "cpu_count": os.cpu_count(),
+        "workers": args.workers,
+        "threads": args.threads,
+        "scales": args.scales,
+        "data": os.path.relpath(args.data, ROOT),
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+    json_path, csv_path = save_report(results, meta, args.out, args.name)
+
+    columns = ["model", "scale", "status", "f1", "auc", "fit_seconds", "single_p50_ms", "single_p99_ms",
+               "batch_p50_ms", "batch_p99_ms", "fit_predict_rss_mb", "model_bytes"]
+    print(results.reindex(columns=columns).round(4).to_string(index=False))
+    print(f"\n{json_path}\n{csv_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark del filtrado del Panel Ejecutivo: filtros encadenados con pandas
+(``select_todos`` + ``between``) frente a ``RowIndex``.
+
+Uso desde la raíz del repositorio::
+
+    python benchmarks/bench_row_index.py --rows 10000000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "app"))
+
+from utils.churn_cube import DIMENSIONS  # noqa: E402
+from utils.row_index import RowIndex  # noqa: E402
+
+RANGE_COLS = ["tenure", "monthlycharges"]
+
+# Estados de filtro representativos de la barra lateral
+ESCENARIOS = {
+    "sin filtros": ({}, {}),
+    "1 filtro": ({"internetservice": "Fiber optic"}, {}),
+    "3 filtros": ({"contract": "Month-to-month", "internetservice": "Fiber optic", "paymentmethod": "Electronic check"}, {}),
+    "3 filtros + rangos": (
+        {"contract": "Month-to-month", "internetservice": "Fiber optic", "paymentmethod": "Electronic check"},
+        {"tenure": (6, 48), "monthlycharges": (50.0, 100.0, "left")},
+    ),
+    "solo rangos": ({}, {"tenure": (0, 12), "monthlycharges": (70.0, 119.0, "left")}),
+}
+
+
+def make_data(rows, seed=0):
+    """Remuestrea el dataset limpio hasta ``rows`` filas"""
+    base = pd.read_parquet(os.path.join(ROOT, "clean_data", "telco-customer.parquet"), columns=DIMENSIONS + RANGE_COLS)
+    idx = np.random.default_rng(seed).integers(0, len(base), rows)
+    return base.iloc[idx].reset_index(drop=True)
+
+
+def pandas_filter(df, filters, ranges):
+    """Ruta original: un DataFrame intermedio por filtro"""
+    df_f = df.copy()
+    for col, value in filters.items():
+        df_f = df_f[df_f[col] == value]
+    for col, bounds in ranges.items():
+        df_f = df_f[df_f[col].between(bounds[0], bounds[1], inclusive=bounds[2] if len(bounds) > 2 else "both")]
+    return df_f
+
+
+def timeit(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    df = make_data(args.rows)
+    print(f"Filas: {len(df):,}")
+
+    start = time.perf_counter()
+    index = RowIndex.build(df, DIMENSIONS, RANGE_COLS)
+    print(f"Construcción del índice: {time.perf_counter() - start:.2f}s ({index.nbytes / 2**20:.0f} MB)\n")
+
+    print(f"{'escenario':<22}{'pandas (ms)':>14}{'índice (ms)':>14}{'x':>8}{'filas':>14}")
+    for name, (filters, ranges) in ESCENARIOS.items():
+        t_pandas, df_f = timeit(lambda: pandas_filter(df, filters, ranges), args.repeat)
+        t_index, pos = timeit(lambda: index.positions(filters, ranges), args.repeat)
+        n = len(df) if pos is None else len(pos)
+        assert n == len(df_f), name
+        print(f"{name:<22}{t_pandas * 1000:>14.1f}{t_index * 1000:>14.1f}{t_pandas / t_index:>8.1f}{n:>14,}")
+
+
+if __name__ == "__main__":
+    main()
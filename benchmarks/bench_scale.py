@@ -0,0 +1,255 @@
+"""
+Benchmark de escala: la app sobre datos sintéticos de 100k, 1M y 10M clientes.
+
+Los datos salen de ``utils.synthetic`` (mismo esquema y distribuciones
+condicionadas a la baja que el dataset limpio) y se generan la primera vez.
+Para cada tamaño, en un proceso propio, se mide el mejor de ``--repeat``:
+
+- ``carga``: ``load_data`` del Parquet (columnas del panel y todas) y del CSV;
+- ``panel``: construcción del cubo y del índice de filas, y la ruta de
+  filtrado del Panel Ejecutivo (cubo + ``RowIndex``) en los estados de
+  ``bench_row_index.ESCENARIOS``;
+- ``gráficos``: cada función de ``utils/charts.py`` (sin caché de figuras);
+- ``eda``: estadísticos suficientes y resúmenes por baja, desde el
+  DataFrame y desde el fichero;
+- ``predictor``: codificación y scoring de todo el DataFrame (por bloques,
+  como ``utils.scoring``) con el modelo compilado y el nativo, y el barrido
+  what-if.
+
+El informe (JSON y CSV, una fila por tamaño y paso) se guarda en
+``benchmarks/results/scale-<commit>``; ``--compare`` lo compara con el de
+otro commit.
+
+Uso desde la raíz del repositorio::
+
+    python benchmarks/bench_scale.py
+    python benchmarks/bench_scale.py --rows 100000 1000000 10000000 --formats parquet csv --repeat 1
+    python benchmarks/bench_scale.py --compare benchmarks/results/scale-3114d73.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "app"))
+
+from bench_row_index import ESCENARIOS  # noqa: E402
+from utils.synthetic import ensure_fixture  # noqa: E402
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+GROUPS = ["carga", "panel", "gráficos", "eda", "predictor"]
+
+
+def best_of(fn, repeat):
+    """Menor tiempo de ``repeat`` llamadas y el resultado de la última"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def _rss_peak_mb():
+    return int(next(l for l in open("/proc/self/status") if l.startswith("VmHWM")).split()[1]) / 1024
+
+
+def run_scale(task):
+    """Todos los pasos sobre un tamaño (se ejecuta en un proceso nuevo)"""
+    rows, paths, groups, repeat = task
+    # Imports aquí: el proceso padre no carga Streamlit, Plotly ni el modelo
+    from utils import charts
+    from utils.churn_cube import ChurnCube
+    from utils.encoder import FeatureEncoder
+    from utils.load_data import DASHBOARD_COLUMNS, EDA_COLUMNS, RANGE_COLUMNS, cube_columns, load_data
+    from utils.model_registry import DEFAULT_NATIVE_MODEL_PATH, load_model_file
+    from utils.row_index import RowIndex
+    from utils.scoring import DEFAULT_CHUNKSIZE, score_frame
+    from utils.sketches import ChurnSummaries, build_summaries
+    from utils.suff_stats import MomentStats, compute_file_stats
+    from utils.tree_model import DEFAULT_COMPILED_MODEL_PATH
+    from utils.what_if import default_grid, sweep
+
+    # Sin la caché de Streamlit: cada repetición lee el fichero
+    read = load_data.__wrapped__
+    parquet = paths["parquet"]
+    records = []
+
+    def measure(group, step, fn, n=rows):
+        if group not in groups:
+            return None
+        seconds, result = best_of(fn, repeat)
+        records.append({"rows": rows, "group": group, "step": step, "seconds": seconds,
+                        "rows_per_second": n / seconds if n else None})
+        return result
+
+    # ---- Carga ----
+    measure("carga", "load_data parquet (panel)", lambda: read(parquet, columns=DASHBOARD_COLUMNS))
+    measure("carga", "load_data parquet (todas)", lambda: read(parquet))
+    if "csv" in paths:
+        measure("carga", "load_data csv (todas)", lambda: read(paths["csv"]))
+    df = read(parquet)
+
+    # ---- Panel Ejecutivo ----
+    # El cubo y el índice hacen falta para los gráficos aunque no se mida el panel
+    build_cube = lambda: ChurnCube.build(df[cube_columns()])  # noqa: E731
+    cube = measure("panel", "ChurnCube.build", build_cube) if "panel" in groups else build_cube()
+    build_index = lambda: RowIndex.build(df, cube.dimensions, RANGE_COLUMNS)  # noqa: E731
+    index = measure("panel", "RowIndex.build", build_index) if "panel" in groups else build_index()
+
+    def filter_path(filters, ranges):
+        # Lo que hace cada rerun del panel: métricas y barras del cubo y filas para los gráficos de detalle
+        tenure = ranges.get("tenure")
+        monthly = ranges["monthlycharges"][:2] if "monthlycharges" in ranges else None
+        mask = cube.select({k: v for k, v in filters.items() if k in cube.dimensions}, tenure, monthly)
+        cube.kpis(mask)
+        for col in cube.dimensions:
+            cube.churn_pct(mask, col)
+        return index.positions(filters, ranges)
+
+    for name, (filters, ranges) in ESCENARIOS.items():
+        measure("panel", f"filtrado: {name}", lambda: filter_path(filters, ranges))
+    filas = filter_path(*ESCENARIOS["3 filtros"])
+
+    # ---- Gráficos ----
+    encoder = FeatureEncoder.load()
+    model = load_model_file(DEFAULT_COMPILED_MODEL_PATH)
+    cliente = {"tenure": 12, "monthlycharges": 70.0, "contract": "Month-to-month", "paymentmethod": "Electronic check"}
+    escenarios, _ = sweep(model, encoder, cliente, default_grid())
+    stats = MomentStats.from_frame(df)
+    for column in ("tenure", "monthlycharges"):
+        measure("gráficos", f"create_histogram {column}", lambda: charts.create_histogram(df, column))
+    measure("gráficos", "create_histogram tenure (filas filtradas)",
+            lambda: charts.create_histogram(df, "tenure", rows=filas), n=len(filas))
+    measure("gráficos", "create_pie_chart", lambda: charts.create_pie_chart(df))
+    measure("gráficos", "create_churn_bar gender", lambda: charts.create_churn_bar(df, "gender"))
+    measure("gráficos", "create_churn_bar gender (filas filtradas)",
+            lambda: charts.create_churn_bar(df, "gender", rows=filas), n=len(filas))
+    measure("gráficos", "create_churn_bar contract (cubo)",
+            lambda: charts.create_churn_bar(None, "contract", churn_pct=cube.churn_pct(cube.select(), "contract")))
+    measure("gráficos", "create_avg_metric_bar", lambda: charts.create_avg_metric_bar(df, "monthlycharges"))
+    measure("gráficos", "create_correlation_heatmap", lambda: charts.create_correlation_heatmap(stats.corr()), n=0)
+    measure("gráficos", "create_gauge_chart", lambda: charts.create_gauge_chart(0.5), n=0)
+    measure("gráficos", "create_what_if_curves",
+            lambda: charts.create_what_if_curves(escenarios[escenarios["paymentmethod"] == "Electronic check"]), n=0)
+    measure("gráficos", "create_what_if_heatmap",
+            lambda: charts.create_what_if_heatmap(escenarios[escenarios["tenure"] == 12]), n=0)
+
+    # ---- EDA ----
+    eda = df[EDA_COLUMNS]
+    measure("eda", "MomentStats.from_frame", lambda: MomentStats.from_frame(eda))
+    measure("eda", "compute_file_stats", lambda: compute_file_stats(parquet))
+    measure("eda", "ChurnSummaries.update", lambda: ChurnSummaries().update(eda))
+    measure("eda", "build_summaries", lambda: build_summaries(parquet))
+    measure("eda", "corr + class_means", lambda: (stats.corr(), stats.class_means("tenure")), n=0)
+
+    # ---- Predictor ----
+    # Por bloques como ``utils.scoring``: la matriz codificada de 10M filas no cabe entera en memoria
+    chunks = [df.iloc[start:start + DEFAULT_CHUNKSIZE] for start in range(0, len(df), DEFAULT_CHUNKSIZE)]
+    measure("predictor", "FeatureEncoder.transform", lambda: [encoder.transform(chunk) for chunk in chunks])
+    measure("predictor", "score_frame (.npz)", lambda: [score_frame(chunk, model, encoder) for chunk in chunks])
+    native = load_model_file(DEFAULT_NATIVE_MODEL_PATH)
+    measure("predictor", "score_frame (.ubj)", lambda: [score_frame(chunk, native, encoder) for chunk in chunks])
+    measure("predictor", "sweep what-if", lambda: sweep(model, encoder, cliente, default_grid()), n=0)
+
+    for record in records:
+        record["rss_peak_mb"] = _rss_peak_mb()
+    return records
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(rows, formats=("parquet",), groups=GROUPS, repeat=3, seed=0):
+    """Genera los ficheros que falten y mide cada tamaño en su propio proceso, uno detrás de otro"""
+    tasks = []
+    for n in rows:
+        paths = {fmt: ensure_fixture(n, fmt, seed) for fmt in dict.fromkeys(["parquet", *formats])}
+        tasks.append((n, paths, list(groups), repeat))
+    records = []
+    with ProcessPoolExecutor(1, max_tasks_per_child=1) as pool:
+        for result in pool.map(run_scale, tasks):
+            records += result
+    return pd.DataFrame(records)
+
+
+def save_report(results, meta, out_dir=RESULTS_DIR, name=None):
+    """Guarda ``<name>.json`` (metadatos y resultados) y ``<name>.csv``; devuelve ambas rutas"""
+    os.makedirs(out_dir, exist_ok=True)
+    name = name or f"scale-{meta['commit'] or time.strftime('%Y%m%d-%H%M%S')}"
+    json_path = os.path.join(out_dir, f"{name}.json")
+    csv_path = os.path.join(out_dir, f"{name}.csv")
+    with open(json_path, "w") as f:
+        json.dump({"meta": meta, "results": json.loads(results.to_json(orient="records"))}, f, indent=2)
+    results.to_csv(csv_path, index=False)
+    return json_path, csv_path
+
+
+def compare(results, baseline_path):
+    """Tiempos actuales frente a los de otro informe (``x`` > 1: ahora es más lento)"""
+    with open(baseline_path) as f:
+        report = json.load(f)
+    baseline = pd.DataFrame(report["results"])[["rows", "group", "step", "seconds"]]
+    merged = results.merge(baseline, on=["rows", "group", "step"], suffixes=("", "_base"))
+    merged["x"] = merged["seconds"] / merged["seconds_base"]
+    return report["meta"].get("commit"), merged
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--formats", nargs="+", choices=["parquet", "csv"], default=["parquet"],
+                        help="Formatos de la carga (los demás pasos leen el Parquet)")
+    parser.add_argument("--groups", nargs="+", choices=GROUPS, default=GROUPS)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=RESULTS_DIR, help="Carpeta del informe")
+    parser.add_argument("--name", default=None, help="Nombre del informe (por defecto, scale-<commit>)")
+    parser.add_argument("--compare", default=None, help="Informe JSON de otro commit con el que comparar")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    results = run_benchmark(args.rows, args.formats, args.groups, args.repeat, args.seed)
+    meta = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": git_commit(),
+        "cpu_count": os.cpu_count(),
+        "python": sys.version.split()[0],
+        "rows": args.rows,
+        "repeat": args.repeat,
+        "seed": args.seed,
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+    json_path, csv_path = save_report(results, meta, args.out, args.name)
+
+    table = results.assign(ms=results["seconds"] * 1000).pivot_table(
+        index=["group", "step"], columns="rows", values="ms", sort=False
+    )
+    with pd.option_context("display.float_format", "{:,.1f}".format, "display.width", 160):
+        print("Tiempo (ms, mejor de {0})".format(args.repeat))
+        print(table.to_string())
+        print("\nPico de memoria (MB): " + ", ".join(
+            f"{n:,} filas {mb:.0f}" for n, mb in results.groupby("rows")["rss_peak_mb"].max().items()))
+
+        if args.compare:
+            commit, merged = compare(results, args.compare)
+            print(f"\nFrente a {commit or args.compare} (x > 1: más lento ahora)")
+            print(merged.pivot_table(index=["group", "step"], columns="rows", values="x", sort=False).to_string(
+                float_format="{:.2f}".format))
+    print(f"\n{json_path}\n{csv_path}")
+
+
+if __name__ == "__main__":
+    main()
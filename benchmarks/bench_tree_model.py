@@ -0,0 +1,153 @@
+"""
+Benchmark del ensemble compilado a NumPy (``utils.tree_model``) frente a XGBoost.
+
+Mide la paridad de probabilidades con ``xgboost_model.pkl`` sobre el
+dataset limpio (también con un 20 % de valores ausentes), la latencia de
+``predict_proba`` para una fila (p50/p99) y por lotes, y el arranque en
+frío: en un proceso nuevo, importar, cargar el modelo y puntuar una fila,
+con el pico de memoria y si ``xgboost`` llegó a importarse.
+
+Uso desde la raíz del repositorio::
+
+    python benchmarks/bench_tree_model.py
+    python benchmarks/bench_tree_model.py --single-rows 500 --batch-sizes 1 100 10000 100000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "app"))
+
+from utils.encoder import FeatureEncoder  # noqa: E402
+from utils.model_registry import DEFAULT_NATIVE_MODEL_PATH  # noqa: E402
+from utils.tree_model import DEFAULT_COMPILED_MODEL_PATH, TreeEnsemble, check_parity, export_booster  # noqa: E402
+
+PICKLE_PATH = os.path.join(ROOT, "models", "xgboost_model.pkl")
+DATA_PATH = os.path.join(ROOT, "clean_data", "telco-customer.parquet")
+TOLERANCE = 1e-5
+
+# Arranque en frío: lo que hace un contenedor nuevo antes de su primera predicción
+STARTUP_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import numpy as np
+from utils.model_registry import load_model_file
+imported = time.perf_counter()
+model = load_model_file({path!r})
+loaded = time.perf_counter()
+model.predict_proba(np.zeros((1, {n_features}), dtype=np.float32))
+done = time.perf_counter()
+print(json.dumps({{
+    "import_ms": (imported - start) * 1000,
+    "load_ms": (loaded - imported) * 1000,
+    "first_predict_ms": (done - loaded) * 1000,
+    "total_ms": (done - start) * 1000,
+    # VmHWM y no ru_maxrss, que hereda el pico del proceso padre
+    "rss_peak_mb": int(next(l for l in open("/proc/self/status") if l.startswith("VmHWM")).split()[1]) / 1024,
+    "xgboost_imported": "xgboost" in sys.modules,
+}}))
+"""
+
+
+def latencies(fn, X, rows):
+    """Segundos de ``fn`` fila a fila sobre las ``rows`` primeras filas de ``X``"""
+    times = []
+    for i in range(rows):
+        row = X[i:i + 1]
+        start = time.perf_counter()
+        fn(row)
+        times.append(time.perf_counter() - start)
+    return np.asarray(times)
+
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def startup(path, n_features, repeat):
+    """Mejor arranque en frío de ``repeat`` procesos nuevos"""
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", STARTUP_SCRIPT.format(path=path, n_features=n_features)],
+            cwd=os.path.join(ROOT, "app"), capture_output=True, text=True, check=True,
+        )
+        runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return min(runs, key=lambda r: r["total_ms"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--single-rows", type=int, default=300)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[100, 1_000, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    encoder = FeatureEncoder.load()
+    X = encoder.transform(pd.read_parquet(DATA_PATH))
+    sklearn_model = pd.read_pickle(PICKLE_PATH)
+    booster = sklearn_model.get_booster()
+    compiled = export_booster(sklearn_model)
+
+    # ---- Paridad ----
+    X_missing = X.copy()
+    X_missing[np.random.default_rng(1).random(X.shape) < 0.2] = np.nan
+    parity = {
+        "exportado ahora": check_parity(sklearn_model, compiled, X),
+        os.path.basename(DEFAULT_COMPILED_MODEL_PATH): check_parity(
+            sklearn_model, TreeEnsemble.load(DEFAULT_COMPILED_MODEL_PATH), X),
+        "20 % ausentes": check_parity(sklearn_model, compiled, X_missing),
+    }
+    print(f"Paridad sobre {len(X):,} filas (diferencia máxima de probabilidad)")
+    for name, diff in parity.items():
+        print(f"  {name:<22}{diff:.2e}")
+    if max(parity.values()) > TOLERANCE:
+        raise SystemExit(f"La diferencia supera {TOLERANCE:g}")
+
+    paths = {
+        "XGBClassifier.predict_proba": lambda A: sklearn_model.predict_proba(A),
+        "Booster.inplace_predict": lambda A: booster.inplace_predict(A),
+        "TreeEnsemble.predict_proba": lambda A: compiled.predict_proba(A),
+    }
+
+    # ---- Una fila ----
+    print(f"\nLatencia de una fila ({args.single_rows} filas)")
+    print(f"{'ruta':<30}{'p50 (ms)':>12}{'p99 (ms)':>12}")
+    for name, fn in paths.items():
+        times = latencies(fn, X, args.single_rows) * 1000
+        print(f"{name:<30}{np.percentile(times, 50):>12.3f}{np.percentile(times, 99):>12.3f}")
+
+    # ---- Lotes ----
+    print("\nLotes (mejor de {0}, filas/s)".format(args.repeat))
+    print(f"{'ruta':<30}" + "".join(f"{n:>12,}" for n in args.batch_sizes))
+    rng = np.random.default_rng(0)
+    batches = {n: X[rng.integers(0, len(X), n)] for n in args.batch_sizes}
+    for name, fn in paths.items():
+        rates = [n / best_of(lambda: fn(batches[n]), args.repeat) for n in args.batch_sizes]
+        print(f"{name:<30}" + "".join(f"{rate:>12,.0f}" for rate in rates))
+
+    # ---- Arranque en frío ----
+    print(f"\nArranque en frío (mejor de {args.repeat} procesos)")
+    print(f"{'modelo':<26}{'import':>10}{'carga':>10}{'1ª pred.':>10}{'total':>10}{'RSS MB':>10}  xgboost")
+    for path in (DEFAULT_NATIVE_MODEL_PATH, DEFAULT_COMPILED_MODEL_PATH):
+        r = startup(path, X.shape[1], args.repeat)
+        print(f"{os.path.basename(path):<26}{r['import_ms']:>10.0f}{r['load_ms']:>10.0f}{r['first_predict_ms']:>10.1f}"
+              f"{r['total_ms']:>10.0f}{r['rss_peak_mb']:>10.0f}  {'sí' if r['xgboost_imported'] else 'no'}")
+    print(f"\nTamaño en disco: {os.path.getsize(DEFAULT_NATIVE_MODEL_PATH) / 1024:.0f} KB (.ubj), "
+          f"{os.path.getsize(DEFAULT_COMPILED_MODEL_PATH) / 1024:.0f} KB (.npz)")
+
+
+if __name__ == "__main__":
+    main()
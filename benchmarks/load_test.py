@@ -0,0 +1,397 @@
+"""
+Prueba de carga de las páginas de Streamlit con sesiones simuladas (``AppTest``).
+
+Cada sesión es un hilo que abre una página y repite un guion de
+interacciones (cambios de filtro, selectores dentro de las pestañas, envíos
+del formulario del Predictor); cada interacción es un rerun completo de la
+página, como en el servidor. Las sesiones de un mismo nivel comparten un
+proceso, y con él las cachés de Streamlit, los módulos y el modelo, como las
+sesiones de un contenedor. Cambiar de pestaña no vuelve a ejecutar el
+script (Streamlit dibuja todas las pestañas en cada rerun), así que en el
+guion se cambian los selectores de dentro de cada pestaña.
+
+Para cada número de sesiones, en un proceso nuevo, se mide:
+
+- latencia de los reruns (p50/p90/p99/máximo), en total y por página y paso;
+- primer render de cada sesión (aparte: incluye cargar datos y cachés);
+- throughput (reruns por segundo del proceso);
+- RSS del proceso antes de abrir sesiones, pico y al cerrarlas, y el
+  crecimiento por sesión.
+
+Las sesiones de cada nivel se reparten por turnos entre las páginas de
+``--pages``, así que cada nivel necesita al menos una sesión por página (un
+nivel con menos sesiones dejaría páginas sin medir y se rechaza). Sin
+``--sessions`` los niveles son 1, 2 y 4 sesiones por página.
+
+Con ``--rows`` las páginas leen datos sintéticos de ese tamaño
+(``utils.synthetic``, variable ``TELCO_DATA_PATH``) en lugar del dataset real.
+
+Uso desde la raíz del repositorio::
+
+    python benchmarks/load_test.py --sessions 3 6 12 --duration 30
+    python benchmarks/load_test.py --sessions 8 --pages dashboard --rows 1000000
+"""
+import argparse
+import gc
+import itertools
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_DIR = os.path.join(ROOT, "app")
+sys.path.insert(0, APP_DIR)
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+PERCENTILES = (50, 90, 99)
+RSS_INTERVAL_SECONDS = 0.2
+
+
+# ========================================
+# GUIONES
+# ========================================
+def _select(at, value, key=None, index=None, label=None):
+    if key is not None:
+        widget = at.selectbox(key=key)
+    elif label is not None:
+        widget = next(w for w in at.selectbox if w.label == label)
+    else:
+        widget = at.selectbox[index]
+    return widget.set_value(value)
+
+
+def _full_range(at, key):
+    slider = at.slider(key=key)
+    return slider.set_value((slider.min, slider.max))
+
+
+def _submit(at, tenure, contract):
+    at.slider[0].set_value(tenure)
+    _select(at, contract, label="Tipo de Contrato")
+    return at.button[0].click()
+
+
+# página -> (script, [(paso, interacción)]); los pasos se repiten en bucle
+SCENARIOS = {
+    "home": ("app.py", [
+        ("rerun", lambda at: at),
+    ]),
+    "dashboard": ("pages/Dashboard.py", [
+        ("filtro pago", lambda at: _select(at, "Electronic check", key="sb_paymentmethod")),
+        ("filtro internet", lambda at: _select(at, "Fiber optic", key="sb_internetservice")),
+        ("rango antigüedad", lambda at: at.slider(key="tenure_slider").set_value((6, 48))),
+        ("pestaña servicios", lambda at: _select(at, "techsupport", key="servicio_select")),
+        ("pestaña perfil", lambda at: _select(at, "gender", key="perfil_select")),
+        ("quitar rango", lambda at: _full_range(at, "tenure_slider")),
+        ("quitar internet", lambda at: _select(at, "Todos", key="sb_internetservice")),
+        ("quitar pago", lambda at: _select(at, "Todos", key="sb_paymentmethod")),
+    ]),
+    "eda": ("pages/EDA.py", [
+        ("numérica: pago mensual", lambda at: _select(at, "Pago mensual", index=0)),
+        ("numérica: pago total", lambda at: _select(at, "Pago total", index=0)),
+        ("categórica: jubilados", lambda at: _select(at, "Jubilados", index=1)),
+        ("categórica: internet", lambda at: _select(at, "Tipo de internet", index=1)),
+        ("numérica: permanencia", lambda at: _select(at, "Permanencia", index=0)),
+        ("categórica: contrato", lambda at: _select(at, "Tipo de contrato", index=1)),
+    ]),
+    "predictor": ("pages/Predictor.py", [
+        ("enviar formulario", lambda at: _submit(at, 24, "One year")),
+        ("curvas what-if", lambda at: _select(at, "Mailed check", label="Método de pago de las curvas")),
+        ("enviar otro cliente", lambda at: _submit(at, 5, "Month-to-month")),
+        ("rerun con what-if", lambda at: at),
+    ]),
+}
+
+
+# ========================================
+# SESIONES
+# ========================================
+def _rss_mb(field="VmRSS"):
+    return int(next(l for l in open("/proc/self/status") if l.startswith(field)).split()[1]) / 1024
+
+
+def make_session_class():
+    """
+    Subclase de ``AppTest`` para ejecutar varias sesiones a la vez en un proceso.
+
+    ``AppTest.run`` instala un runtime simulado y parchea la configuración
+    en cada ejecución, y los deshace al terminar: con varias sesiones en
+    paralelo se pisan entre sí. Aquí el runtime, la configuración y la
+    caché de bytecode del script se instalan una vez por proceso
+    (``shared_runtime``) y cada rerun solo crea su ``ScriptRunner``, como
+    hace el servidor con cada sesión.
+    """
+    from streamlit.runtime.pages_manager import PagesManager
+    from streamlit.testing.v1 import AppTest
+    from streamlit.testing.v1.local_script_runner import LocalScriptRunner
+
+    class Session(AppTest):
+        script_cache = None
+
+        def _run(self, widget_state=None, timeout=None):
+            runner = LocalScriptRunner(
+                self._script_path, self.session_state,
+                PagesManager(self._script_path, self.script_cache, setup_watcher=False),
+                args=self.args, kwargs=self.kwargs,
+            )
+            # El bytecode del script se compila una vez para todas las sesiones, como en el servidor
+            runner._script_cache = self.script_cache
+            self._tree = runner.run(widget_state, self.query_params, timeout or self.default_timeout, self._page_hash)
+            self._tree._runner = self
+            return self
+
+    return Session
+
+
+def shared_runtime():
+    """
+    Runtime simulado del proceso (el de ``AppTest._run``), la clase de sesión
+    que lo usa y el parche de configuración que debe estar activo mientras
+    corren las sesiones (también baja el log a errores: los avisos de
+    deprecación de cada rerun tapan el informe).
+    """
+    from unittest.mock import MagicMock
+
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1.util import patch_config_options
+
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    Runtime._instance = runtime
+
+    Session = make_session_class()
+    Session.script_cache = ScriptCache()
+    return Session, patch_config_options({"global.appTest": True, "logger.level": "error"})
+
+
+def run_session(Session, page, deadline, think_seconds, timeout, records, errors, start_delay=0.0):
+    """Abre ``page`` y repite su guion hasta ``deadline``; añade a ``records`` un registro por rerun"""
+    script, steps = SCENARIOS[page]
+    time.sleep(start_delay)
+
+    def rerun(step, interaction, at):
+        start = time.perf_counter()
+        try:
+            at = interaction(at).run(timeout=timeout)
+            failed = [e.value for e in at.exception]
+        except Exception as exc:  # noqa: BLE001 - un fallo de la sesión no detiene la prueba
+            failed = [repr(exc)]
+        records.append({"page": page, "step": step, "seconds": time.perf_counter() - start, "at": time.time(),
+                        "ok": not failed})
+        if failed:
+            errors.append({"page": page, "step": step, "errors": failed})
+        return not failed
+
+    at = Session(os.path.join(APP_DIR, script), default_timeout=timeout)
+    if not rerun("primer render", lambda a: a, at):
+        return
+    for step, interaction in itertools.cycle(steps):
+        if time.time() >= deadline:
+            break
+        rerun(step, interaction, at)
+        if think_seconds:
+            time.sleep(think_seconds)
+
+
+def _summary(seconds):
+    ms = np.asarray(seconds) * 1000
+    if not len(ms):
+        return {"n": 0}
+    return {"n": int(len(ms)), **{f"p{p}_ms": float(np.percentile(ms, p)) for p in PERCENTILES},
+            "max_ms": float(ms.max())}
+
+
+def run_level(task):
+    """Una prueba con ``sessions`` sesiones simultáneas (se ejecuta en un proceso nuevo)"""
+    sessions, pages, duration, think_seconds, ramp_seconds, timeout, data_path = task
+    if data_path:
+        os.environ["TELCO_DATA_PATH"] = data_path
+    os.chdir(APP_DIR)
+
+    Session, config_patch = shared_runtime()
+    from utils.tracing import TRACER
+
+    records, errors, rss = [], [], []
+    with config_patch:
+        import streamlit.logger
+        streamlit.logger.set_log_level("error")
+        gc.collect()
+        rss_before = _rss_mb()
+        stop = threading.Event()
+
+        def sample_rss():
+            while not stop.wait(RSS_INTERVAL_SECONDS):
+                rss.append((time.time(), _rss_mb()))
+
+        sampler = threading.Thread(target=sample_rss, daemon=True)
+        sampler.start()
+
+        # Las sesiones se reparten entre las páginas y entran escalonadas en ``ramp_seconds``
+        start = time.time()
+        deadline = start + duration
+        threads = [
+            threading.Thread(
+                target=run_session,
+                args=(Session, pages[i % len(pages)], deadline, think_seconds, timeout, records, errors,
+                      ramp_seconds * i / sessions),
+                name=f"session-{i}", daemon=True,
+            )
+            for i in range(sessions)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.time() - start
+        stop.set()
+        sampler.join()
+
+        rss_during = [mb for _, mb in rss] or [_rss_mb()]
+        rss_end = rss_during[-1]
+        del threads
+        gc.collect()
+        rss_after = _rss_mb()
+
+    reruns = [r for r in records if r["step"] != "primer render"]
+    by_step = {}
+    for r in reruns:
+        by_step.setdefault(f"{r['page']} · {r['step']}", []).append(r["seconds"])
+    by_page = {}
+    for r in reruns:
+        by_page.setdefault(r["page"], []).append(r["seconds"])
+
+    return {
+        "sessions": sessions,
+        "pages": pages,
+        "seconds": elapsed,
+        "reruns": len(reruns),
+        "throughput_rps": len(reruns) / elapsed if elapsed else 0.0,
+        "errors": len(errors),
+        "error_samples": errors[:5],
+        "first_render": _summary([r["seconds"] for r in records if r["step"] == "primer render"]),
+        "latency": _summary([r["seconds"] for r in reruns]),
+        "latency_by_page": {page: _summary(values) for page, values in by_page.items()},
+        "latency_by_step": {step: _summary(values) for step, values in by_step.items()},
+        "rss_before_mb": rss_before,
+        "rss_peak_mb": max(rss_during),
+        "rss_end_mb": rss_end,
+        "rss_after_mb": rss_after,
+        "rss_growth_per_session_mb": (max(rss_during) - rss_before) / sessions,
+        "rss_hwm_mb": _rss_mb("VmHWM"),
+        # Desglose por sección de las páginas (``utils.tracing``) de todos los reruns del nivel
+        "spans": TRACER.summary(),
+        # Memoria propia de cada sesión en su último rerun (``st.session_state``)
+        "session_state": TRACER.session_stats(),
+    }
+
+
+# ========================================
+# INFORME
+# ========================================
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_load_test(levels, pages, duration=30.0, think_seconds=0.0, ramp_seconds=1.0, timeout=300.0, data_path=None):
+    """Cada nivel de sesiones en su propio proceso, uno detrás de otro"""
+    tasks = [(n, list(pages), duration, think_seconds, ramp_seconds, timeout, data_path) for n in levels]
+    with ProcessPoolExecutor(1, max_tasks_per_child=1) as pool:
+        return list(pool.map(run_level, tasks))
+
+
+def save_report(results, meta, out_dir=RESULTS_DIR, name=None):
+    """Guarda ``<name>.json`` (todo) y ``<name>.csv`` (latencia por nivel y paso); devuelve ambas rutas"""
+    os.makedirs(out_dir, exist_ok=True)
+    name = name or f"load-{meta['commit'] or time.strftime('%Y%m%d-%H%M%S')}"
+    json_path = os.path.join(out_dir, f"{name}.json")
+    csv_path = os.path.join(out_dir, f"{name}.csv")
+    with open(json_path, "w") as f:
+        json.dump({"meta": meta, "results": results}, f, indent=2)
+    rows = [
+        {"sessions": r["sessions"], "step": step, **summary}
+        for r in results
+        for step, summary in {"total": r["latency"], **r["latency_by_step"]}.items()
+    ]
+    pd.DataFrame(rows).to_csv(csv_path, index=False)
+    return json_path, csv_path
+
+
+def print_report(results):
+    print(f"{'sesiones':>9}{'reruns':>8}{'rerun/s':>9}{'p50':>8}{'p90':>8}{'p99':>8}{'máx':>8}"
+          f"{'1er p50':>9}{'RSS ini':>9}{'pico':>7}{'final':>7}{'MB/ses.':>9}{'errores':>9}")
+    for r in results:
+        lat, first = r["latency"], r["first_render"]
+        cells = [f"{lat.get(f'p{p}_ms', float('nan')):>8.0f}" for p in PERCENTILES]
+        print(f"{r['sessions']:>9}{r['reruns']:>8}{r['throughput_rps']:>9.1f}{''.join(cells)}"
+              f"{lat.get('max_ms', float('nan')):>8.0f}{first.get('p50_ms', float('nan')):>9.0f}"
+              f"{r['rss_before_mb']:>9.0f}{r['rss_peak_mb']:>7.0f}{r['rss_after_mb']:>7.0f}"
+              f"{r['rss_growth_per_session_mb']:>9.1f}{r['errors']:>9}")
+
+    print("\nLatencia por paso (ms, p50 / p99)")
+    steps = list(dict.fromkeys(step for r in results for step in r["latency_by_step"]))
+    print(f"{'':<40}" + "".join(f"{r['sessions']:>14}" for r in results))
+    for step in steps:
+        cells = []
+        for r in results:
+            s = r["latency_by_step"].get(step, {"n": 0})
+            cells.append(f"{s['p50_ms']:>7.0f}/{s['p99_ms']:<6.0f}" if s["n"] else f"{'-':>14}")
+        print(f"{step:<40}" + "".join(cells))
+
+    for r in results:
+        for sample in r["error_samples"]:
+            print(f"\n[{r['sessions']} sesiones] {sample['page']} · {sample['step']}: {sample['errors'][0]}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, nargs="+", default=None,
+                        help="Sesiones simultáneas por nivel, al menos una por página (por defecto 1, 2 y 4 por página)")
+    parser.add_argument("--pages", nargs="+", choices=list(SCENARIOS), default=["dashboard", "eda", "predictor"],
+                        help="Páginas (las sesiones se reparten entre ellas)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Segundos por nivel")
+    parser.add_argument("--think", type=float, default=0.0, help="Pausa entre interacciones de una sesión (s)")
+    parser.add_argument("--ramp", type=float, default=1.0, help="Segundos en los que entran todas las sesiones")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Tiempo máximo de un rerun (s)")
+    parser.add_argument("--rows", type=int, default=None, help="Usa datos sintéticos de este tamaño")
+    parser.add_argument("--out", default=RESULTS_DIR, help="Carpeta del informe ('' para no guardarlo)")
+    args = parser.parse_args(argv)
+    if args.sessions is None:
+        args.sessions = [k * len(args.pages) for k in (1, 2, 4)]
+    short = [n for n in args.sessions if n < len(args.pages)]
+    if short:
+        parser.error(f"niveles con menos sesiones que páginas ({len(args.pages)}), alguna página no se mediría: {short}")
+
+    data_path = None
+    if args.rows:
+        from utils.synthetic import ensure_fixture
+        data_path = ensure_fixture(args.rows)
+
+    results = run_load_test(args.sessions, args.pages, args.duration, args.think, args.ramp, args.timeout, data_path)
+    print_report(results)
+
+    if args.out:
+        meta = {"created_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "commit": git_commit(), "cpu_count": os.cpu_count(),
+                "python": sys.version.split()[0], "pages": args.pages, "duration": args.duration,
+                "think": args.think, "rows": args.rows, "data": data_path}
+        json_path, csv_path = save_report(results, meta, args.out)
+        print(f"\nInforme: {json_path}\n         {csv_path}")
+
+if __name__ == "__main__":
+    main()
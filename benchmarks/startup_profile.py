@@ -0,0 +1,234 @@
+"""
+Perfil de arranque en frío de la app de Streamlit.
+
+Cada página se ejecuta con ``AppTest`` en un proceso nuevo (como la primera
+visita tras escalar desde cero) y se mide:
+
+- ``import_ms``: lo que tardan en importarse los módulos que importa la
+  página (``python -X importtime``), y los más lentos;
+- ``first_render_ms``: la primera ejecución completa de la página (imports,
+  carga de datos y modelo, gráficos);
+- ``rerun_ms``: la segunda ejecución, con módulos y cachés ya cargados;
+- ``rss_mb``: pico de memoria del proceso y qué módulos pesados quedaron
+  importados;
+- ``after_warmup_ms``: primer render de la página en un proceso donde antes
+  se abrió la página principal y terminó el calentamiento en segundo plano
+  (``utils.warmup``), es decir, lo que espera el usuario al cambiar de página.
+
+En el resto de medidas el calentamiento se desactiva para que sean las de
+cada página por separado.
+
+Cada medida es la mediana de ``--repeat`` procesos (3 por defecto): un solo
+proceso varía lo bastante en 1 CPU como para que el presupuesto falle o pase
+según la ejecución.
+
+Con ``--check`` se comparan los resultados con ``startup_budget.json`` y el
+script termina con error si alguna página supera su presupuesto o importa un
+módulo prohibido.
+
+Uso desde la raíz del repositorio::
+
+    python benchmarks/startup_profile.py
+    python benchmarks/startup_profile.py --check --repeat 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_DIR = os.path.join(ROOT, "app")
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+BUDGET_PATH = os.path.join(ROOT, "benchmarks", "startup_budget.json")
+
+PAGES = {
+    "home": "app.py",
+    "dashboard": "pages/Dashboard.py",
+    "eda": "pages/EDA.py",
+    "predictor": "pages/Predictor.py",
+}
+# plotly.graph_objects no aparece: Streamlit ya lo importa (y es diferido por dentro)
+HEAVY_MODULES = ["pandas", "pyarrow", "plotly.express", "xgboost", "sklearn", "scipy"]
+RENDER_MARK = "# --- render ---"
+
+# Proceso hijo: Streamlit ya importado (lo carga el servidor antes de la primera visita)
+CHILD_SCRIPT = """
+import json, sys, time
+import streamlit
+from streamlit.testing.v1 import AppTest
+sys.stderr.write({mark!r} + "\\n")
+start = time.perf_counter()
+at = AppTest.from_file({page!r}, default_timeout=300)
+at.run()
+first = time.perf_counter()
+at.run()
+second = time.perf_counter()
+print(json.dumps({{
+    "first_render_ms": (first - start) * 1000,
+    "rerun_ms": (second - first) * 1000,
+    "exception": [str(e.value) for e in at.exception],
+    "rss_mb": int(next(l for l in open("/proc/self/status") if l.startswith("VmHWM")).split()[1]) / 1024,
+    "modules": [m for m in {heavy!r} if m in sys.modules],
+}}))
+"""
+
+# Proceso hijo: página principal, espera al calentamiento y primer render del resto
+WARM_SCRIPT = """
+import json, time
+from streamlit.testing.v1 import AppTest
+from utils.warmup import start_warmup
+AppTest.from_file("app.py", default_timeout=300).run()
+state = start_warmup()
+state.wait(300)
+renders = {{}}
+for name, page in {pages!r}.items():
+    start = time.perf_counter()
+    AppTest.from_file(page, default_timeout=300).run()
+    renders[name] = (time.perf_counter() - start) * 1000
+print(json.dumps({{"warmup": state.summary(), "renders": renders}}))
+"""
+
+
+def parse_importtime(stderr):
+    """Tiempo total y módulos de primer nivel más lentos importados tras ``RENDER_MARK``"""
+    lines = stderr.split(RENDER_MARK, 1)[-1].splitlines()
+    top = []
+    for line in lines:
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, self_us, cumulative_us, name = (part.strip() for part in line.replace("import time:", "|", 1).split("|"))
+        # Los módulos de primer nivel no llevan sangría en la columna del nombre
+        if not line.rsplit("|", 1)[1].startswith("  "):
+            top.append((name, int(cumulative_us) / 1000))
+    top.sort(key=lambda item: -item[1])
+    return sum(ms for _, ms in top), top
+
+
+def profile_page(page, top=8):
+    env = dict(os.environ, TELCO_WARMUP="0")
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c",
+         CHILD_SCRIPT.format(page=page, mark=RENDER_MARK, heavy=HEAVY_MODULES)],
+        cwd=APP_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    import_ms, modules = parse_importtime(out.stderr)
+    result["import_ms"] = import_ms
+    result["slowest_imports"] = [{"module": name, "ms": round(ms, 1)} for name, ms in modules[:top]]
+    return result
+
+
+def profile_warm(pages):
+    """Estado del calentamiento y primer render de ``pages`` una vez terminado"""
+    env = dict(os.environ)
+    env.pop("TELCO_WARMUP", None)
+    out = subprocess.run(
+        [sys.executable, "-c", WARM_SCRIPT.format(pages=pages)],
+        cwd=APP_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def _median_run(runs, metrics):
+    """Mediana de cada métrica de ``runs``; módulos y excepciones de cualquiera de ellos"""
+    result = {metric: statistics.median(run[metric] for run in runs) for metric in metrics}
+    result["modules"] = sorted({module for run in runs for module in run["modules"]})
+    result["exception"] = [error for run in runs for error in run["exception"]]
+    # Desglose de imports del proceso con el tiempo de import más próximo a la mediana
+    closest = min(runs, key=lambda run: abs(run["import_ms"] - result["import_ms"]))
+    result["slowest_imports"] = closest["slowest_imports"]
+    return result
+
+
+def profile(pages, repeat):
+    """Mediana de ``repeat`` procesos por página, y del calentamiento"""
+    results = {}
+    for name in pages:
+        runs = [profile_page(PAGES[name]) for _ in range(repeat)]
+        results[name] = _median_run(runs, ("import_ms", "first_render_ms", "rerun_ms", "rss_mb"))
+
+    others = {name: PAGES[name] for name in pages if name != "home"}
+    warms = [profile_warm(others) for _ in range(repeat)]
+    for name in others:
+        results[name]["after_warmup_ms"] = statistics.median(w["renders"][name] for w in warms)
+    # Resumen del calentamiento de la ejecución con errores, si la hubo
+    warmup = next((w["warmup"] for w in warms if w["warmup"]["errors"]), warms[-1]["warmup"])
+    return results, warmup
+
+
+def check_budget(results, warmup, budget):
+    """Lista de incumplimientos del presupuesto (vacía si todo está dentro)"""
+    failures = []
+    for name, limits in budget.get("pages", {}).items():
+        if name not in results:
+            continue
+        result = results[name]
+        if result["exception"]:
+            failures.append(f"{name}: la página lanza excepciones: {result['exception']}")
+        for metric in ("import_ms", "first_render_ms", "rerun_ms", "rss_mb", "after_warmup_ms"):
+            if metric in limits and metric in result and result[metric] > limits[metric]:
+                failures.append(f"{name}: {metric} = {result[metric]:.0f} > {limits[metric]}")
+        for module in limits.get("forbidden_modules", []):
+            if module in result["modules"]:
+                failures.append(f"{name}: importa {module}")
+    if budget.get("warmup_errors") is False and warmup["errors"]:
+        failures.append(f"calentamiento con errores: {warmup['errors']}")
+    return failures
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", nargs="+", choices=list(PAGES), default=list(PAGES))
+    parser.add_argument("--repeat", type=int, default=3, help="Procesos por página (se usa la mediana)")
+    parser.add_argument("--check", action="store_true", help="Falla si se supera startup_budget.json")
+    parser.add_argument("--budget", default=BUDGET_PATH)
+    parser.add_argument("--out", default=RESULTS_DIR, help="Carpeta del informe JSON ('' para no guardarlo)")
+    args = parser.parse_args(argv)
+
+    results, warmup = profile(args.pages, args.repeat)
+
+    print(f"{'página':<12}{'imports':>10}{'1er render':>12}{'rerun':>10}{'tras calent.':>14}{'RSS MB':>9}"
+          f"  módulos pesados")
+    for name, r in results.items():
+        after = f"{r['after_warmup_ms']:.0f}" if "after_warmup_ms" in r else "-"
+        print(f"{name:<12}{r['import_ms']:>10.0f}{r['first_render_ms']:>12.0f}{r['rerun_ms']:>10.0f}{after:>14}"
+              f"{r['rss_mb']:>9.0f}  {', '.join(r['modules'])}")
+    for name, r in results.items():
+        slowest = ", ".join(f"{m['module']} {m['ms']:.0f}" for m in r["slowest_imports"])
+        print(f"  {name}: {slowest}")
+    steps = ", ".join(f"{name} {ms:.0f}" for name, ms in warmup["steps_ms"].items())
+    print(f"\nCalentamiento: {warmup['total_ms']:.0f} ms ({steps})" + (f" errores: {warmup['errors']}" if warmup["errors"] else ""))
+
+    if args.out:
+        os.makedirs(args.out, exist_ok=True)
+        commit = git_commit()
+        path = os.path.join(args.out, f"startup-{commit or time.strftime('%Y%m%d-%H%M%S')}.json")
+        with open(path, "w") as f:
+            json.dump({"meta": {"commit": commit, "python": sys.version.split()[0], "repeat": args.repeat},
+                       "pages": results, "warmup": warmup}, f, indent=2)
+        print(f"\nInforme: {path}")
+
+    if args.check:
+        with open(args.budget) as f:
+            failures = check_budget(results, warmup, json.load(f))
+        if failures:
+            print("\nPresupuesto superado:")
+            for failure in failures:
+                print(f"  - {failure}")
+            raise SystemExit(1)
+        print("\nPresupuesto de arranque: OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Paridad del ensemble compilado (``models/xgboost_model.npz``) con el modelo
+entrenado (``models/xgboost_model.pkl``).
+
+Desde la raíz del repositorio::
+
+    python -m pytest tests
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "app"))
+
+from utils.encoder import FeatureEncoder  # noqa: E402
+from utils.model_registry import DEFAULT_NATIVE_MODEL_PATH, _file_hash  # noqa: E402
+from utils.tree_model import DEFAULT_COMPILED_MODEL_PATH, MODELS_DIR, TreeEnsemble, check_parity, export_booster  # noqa: E402
+
+pytest.importorskip("xgboost")
+
+PICKLE_PATH = os.path.join(MODELS_DIR, "xgboost_model.pkl")
+DATA_PATH = os.path.join(ROOT, "clean_data", "telco-customer.parquet")
+# Misma tolerancia que ``python -m utils.tree_model --check``
+TOLERANCE = 1e-5
+
+
+@pytest.fixture(scope="module")
+def source():
+    return pd.read_pickle(PICKLE_PATH)
+
+
+@pytest.fixture(scope="module")
+def compiled():
+    return TreeEnsemble.load(DEFAULT_COMPILED_MODEL_PATH)
+
+
+@pytest.fixture(scope="module")
+def X():
+    return FeatureEncoder.load().transform(pd.read_parquet(DATA_PATH))
+
+
+@pytest.fixture(scope="module")
+def X_missing(X):
+    """Las filas del dataset con un ~30% de valores a NaN, y alguna fila entera a NaN"""
+    rng = np.random.default_rng(0)
+    X = X.astype(np.float32, copy=True)
+    X[rng.random(X.shape) < 0.3] = np.nan
+    X[:10] = np.nan
+    return X
+
+
+def test_compiled_from_current_native_model(compiled):
+    # El registro solo usa el .npz si se compiló del .ubj vigente
+    assert compiled.source_sha256 == _file_hash(DEFAULT_NATIVE_MODEL_PATH)
+
+
+def test_parity(source, compiled, X):
+    assert check_parity(source, compiled, X) < TOLERANCE
+
+
+def test_parity_missing_values(source, compiled, X_missing):
+    # Los NaN siguen la dirección por defecto de cada split
+    assert check_parity(source, compiled, X_missing) < TOLERANCE
+
+
+def test_parity_single_rows(source, compiled, X, X_missing):
+    for row in (X[0], X_missing[0], X_missing[42]):
+        expected = source.predict_proba(row[None, :])[:, 1]
+        np.testing.assert_allclose(compiled.predict_proba(row)[:, 1], expected, atol=TOLERANCE)
+
+
+def test_export_matches_saved(source, compiled, X_missing):
+    fresh = export_booster(source)
+    assert fresh.n_trees == compiled.n_trees
+    np.testing.assert_allclose(fresh.predict_proba(X_missing), compiled.predict_proba(X_missing), atol=TOLERANCE)